@@ -3,7 +3,12 @@ from sqlalchemy.orm import Session
 from ...models import schemas
 from ...db.session import get_db
 from ...services import pdf_ingestion_service, collection_service
+from ...services.ingestion_job_service import get_ingestion_job, notify_ingestion_workers
+from ...services.collection_stats_service import record_pdf_removed
+from ...rag_components.vector_store_interface import delete_pdf_chunks_from_vector_store
+from ...core.config import settings
 from typing import List
+from datetime import datetime
 
 router = APIRouter(prefix="/collections", tags=["pdfs"])
 
@@ -28,6 +33,7 @@ def upload_pdf(collection_id: int, pdf_file: UploadFile = File(...), db: Session
         pdf_doc = pdf_ingestion_service.add_pdf_record_to_db(
             db, title, pdf_file.filename, str(file_path), collection_id
         )
+        notify_ingestion_workers()
         return {
             "id": pdf_doc.id, 
             "filename": pdf_doc.filename, 
@@ -62,6 +68,7 @@ def add_pdf_by_url(collection_id: int, url: str, filename: str, db: Session = De
         pdf_doc = pdf_ingestion_service.add_pdf_record_to_db(
             db, title, filename, str(file_path), collection_id
         )
+        notify_ingestion_workers()
         return {
             "id": pdf_doc.id, 
             "filename": pdf_doc.filename, 
@@ -80,11 +87,24 @@ def list_pdfs(collection_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Collection not found")
     return db.query(pdf_ingestion_service.db_models.PDFDocument).filter_by(collection_id=collection_id).all()
 
+@router.get("/pdfs/{pdf_id}/ingestion", response_model=schemas.IngestionJobStatus)
+def get_pdf_ingestion_status(pdf_id: int, db: Session = Depends(get_db)):
+    job = get_ingestion_job(db, pdf_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No ingestion job for this PDF")
+    return job
+
 @router.delete("/pdfs/{pdf_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_pdf(pdf_id: int, db: Session = Depends(get_db)):
     pdf = db.query(pdf_ingestion_service.db_models.PDFDocument).filter_by(id=pdf_id).first()
     if not pdf:
         raise HTTPException(status_code=404, detail="PDF not found")
+    # Remove the PDF's chunks so they stop matching searches; the background
+    # vector GC picks up anything left behind if this fails
+    delete_pdf_chunks_from_vector_store(settings.CHROMA_DEFAULT_COLLECTION_NAME, pdf_id)
+    if pdf.collection is not None:
+        pdf.collection.updated_at = datetime.utcnow()  # Invalidates cached answers
+    record_pdf_removed(db, pdf)
     db.delete(pdf)
     db.commit()
     return
@@ -2,25 +2,57 @@
 Q&A API Router - Handles RAG-based question answering endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, List
+from typing import Dict, List, Optional
+from contextlib import aclosing
+from datetime import datetime
+import json
 
-from ...db.session import get_db
+from ...db.session import get_db, SessionLocal
+from ...core.config import settings
+from ...core.tracing import start_trace
 from ...services.rag_service import (
     answer_question_from_collection,
+    answer_question_across_collections,
+    stream_answer_from_collection,
+    answer_questions_batch,
     get_collection_summary,
     get_recent_queries,
+    iter_query_history,
     validate_question
 )
 from ...services.admin_service import reindex_collection, reindex_collection_batch, get_system_stats
+from ...services.vector_snapshot_service import export_vector_snapshot, resolve_snapshot_dir, restore_vector_snapshot
+from ...services.vector_gc_service import collect_vector_garbage, get_vector_gc_stats
+from ...services.answer_cache_service import get_answer_cache_stats
+from ...services.request_coalescing_service import get_request_coalescing_stats
+from ...services.health_monitor_service import get_health_snapshot
+from ...services.ingestion_job_service import get_ingestion_queue_stats
+from ...services.history_writer_service import get_history_writer_stats
+from ...services.collection_routing_service import get_collection_routing_stats, rebuild_collection_centroids
+from ...services.collection_stats_service import rebuild_collection_stats
+from ...services.collection_cache_service import get_collection_cache_stats
+from ...rag_components.llm_handler import get_cascade_stats, get_http_pool_stats, get_llm_timing_stats
+from ...rag_components.llm_router import get_llm_router_stats
+from ...rag_components.llm_resilience import get_llm_resilience_stats
+from ...rag_components.extractive_answerer import get_extractive_stats
 from ...models.schemas import (
     QuestionRequest, 
+    BatchQuestionRequest,
+    MultiCollectionQuestionRequest,
+    MultiCollectionQuestionResponse,
     QuestionResponse,
     CollectionSummaryResponse,
     RecentQueriesResponse,
     ReindexResponse,
-    SystemStats
+    SystemStats,
+    VectorSnapshotRequest,
+    VectorRestoreRequest,
+    VectorSnapshotResponse,
+    VectorGCResponse
 )
 from pydantic import BaseModel
 
@@ -32,11 +64,15 @@ router = APIRouter(prefix="/qa", tags=["Q&A"])
 @router.post("/ask", response_model=QuestionResponse)
 async def ask_question(
     request: QuestionRequest,
+    response: Response,
+    include_timings: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Ask a question about documents in a specific collection.
     Uses RAG pipeline to retrieve relevant context and generate answers.
+    Per-stage timings are returned in the Server-Timing header, and in the
+    body as `timings` when include_timings=true.
     """
     # Validate the question
     validation = validate_question(request.question)
@@ -44,18 +80,125 @@ async def ask_question(
         raise HTTPException(status_code=400, detail=validation["error"])
     
     # Process the question through RAG pipeline
-    result = await answer_question_from_collection(
-        db=db,
-        collection_id=request.collection_id,
-        question_text=validation["cleaned_question"],
-        top_k=request.top_k
-    )
+    with start_trace() as trace:
+        result = await answer_question_from_collection(
+            db=db,
+            collection_id=request.collection_id,
+            question_text=validation["cleaned_question"],
+            top_k=request.top_k,
+            answer_mode=request.answer_mode
+        )
+    response.headers["Server-Timing"] = trace.server_timing()
     
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
     
+    if include_timings:
+        result = dict(result, timings=trace.as_dict())
     return QuestionResponse(**result)
 
+@router.post("/ask/multi", response_model=MultiCollectionQuestionResponse)
+async def ask_question_multi(
+    request: MultiCollectionQuestionRequest,
+    response: Response,
+    include_timings: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Ask one question across several collections, or across all collections when
+    collection_ids is omitted (searching only the fan_out collections whose centroids
+    are most similar to the question).
+    Searches the collections concurrently, merges their results into one global top_k
+    and generates a single answer; `collections` reports each collection's share and search time.
+    """
+    if request.collection_ids is not None and len(request.collection_ids) > settings.QA_MULTI_MAX_COLLECTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many collections (max {settings.QA_MULTI_MAX_COLLECTIONS})"
+        )
+    
+    validation = validate_question(request.question)
+    if not validation["valid"]:
+        raise HTTPException(status_code=400, detail=validation["error"])
+    
+    with start_trace() as trace:
+        result = await answer_question_across_collections(
+            db=db,
+            collection_ids=request.collection_ids,
+            question_text=validation["cleaned_question"],
+            top_k=request.top_k,
+            fan_out=request.fan_out
+        )
+    response.headers["Server-Timing"] = trace.server_timing()
+    
+    if not result["success"]:
+        status_code = 404 if result.get("error", "").startswith("Collections not found") else 500
+        raise HTTPException(status_code=status_code, detail=result.get("error", "Unknown error"))
+    
+    if include_timings:
+        result = dict(result, timings=trace.as_dict())
+    return MultiCollectionQuestionResponse(**result)
+
+def format_sse_event(event: Dict) -> str:
+    """Serialize a pipeline event as a server-sent event frame."""
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+@router.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Ask a question and stream the answer as server-sent events.
+    Emits a `sources` event after retrieval, `token` events as the LLM generates,
+    and a final `done` event with the cleaned answer and timing data.
+    """
+    validation = validate_question(request.question)
+    if not validation["valid"]:
+        raise HTTPException(status_code=400, detail=validation["error"])
+    
+    async def event_stream():
+        # The session must outlive the request handler, so the stream owns it
+        db = SessionLocal()
+        try:
+            async for event in stream_answer_from_collection(
+                db=db,
+                collection_id=request.collection_id,
+                question_text=validation["cleaned_question"],
+                top_k=request.top_k
+            ):
+                yield format_sse_event(event)
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/ask/batch")
+async def ask_questions_batch(request: BatchQuestionRequest):
+    """
+    Answer many questions (across collections) in one request.
+    Streams one NDJSON line per question in completion order, each tagged with the
+    question's index in the request, followed by a final summary line.
+    """
+    if len(request.questions) > settings.QA_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many questions in batch (max {settings.QA_BATCH_MAX_QUESTIONS})"
+        )
+    
+    async def result_stream():
+        db = SessionLocal()
+        try:
+            # aclosing runs the batch's cleanup (bulk history write) even if the client disconnects
+            async with aclosing(answer_questions_batch(db, [q.model_dump() for q in request.questions])) as results:
+                async for result in results:
+                    yield json.dumps(result, default=str) + "\n"
+        finally:
+            db.close()
+    
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
 @router.get("/collection/{collection_id}/summary", response_model=CollectionSummaryResponse)
 async def get_collection_qa_summary(
     collection_id: int,
@@ -76,21 +219,28 @@ async def get_collection_qa_summary(
 async def get_collection_recent_queries(
     collection_id: int,
     limit: int = 10,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Get recent Q&A queries for a collection.
+    Get recent Q&A queries for a collection, newest first.
+    Pass the response's next_cursor as `cursor` to get the next, older page.
     """
-    queries = await get_recent_queries(
+    result = await get_recent_queries(
         db=db,
         collection_id=collection_id,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
     
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result.get("error", "Unknown error"))
+    
     return RecentQueriesResponse(
         collection_id=collection_id,
-        queries=queries,
-        count=len(queries)
+        queries=result["queries"],
+        count=len(result["queries"]),
+        next_cursor=result["next_cursor"]
     )
 
 # Admin endpoints
@@ -143,18 +293,222 @@ async def admin_get_system_stats(db: Session = Depends(get_db)):
     
     return SystemStats(**stats)
 
+@router.post("/admin/vector-snapshot", response_model=VectorSnapshotResponse)
+async def admin_export_vector_snapshot(request: VectorSnapshotRequest):
+    """
+    Admin endpoint: Export the vector store to a snapshot directory under VECTOR_SNAPSHOT_DIR.
+    Embeddings are written as a memory-mapped .npy file with checksums.
+    """
+    snapshot_dir = None
+    if request.snapshot_dir is not None:
+        try:
+            snapshot_dir = resolve_snapshot_dir(request.snapshot_dir)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await run_in_threadpool(
+        export_vector_snapshot,
+        snapshot_dir=snapshot_dir,
+        collection_names=request.collection_names
+    )
+    
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result.get("error", "Snapshot export failed"))
+    
+    return VectorSnapshotResponse(**result)
+
+@router.post("/admin/vector-restore", response_model=VectorSnapshotResponse)
+async def admin_restore_vector_snapshot(request: VectorRestoreRequest):
+    """
+    Admin endpoint: Bulk-load a snapshot under VECTOR_SNAPSHOT_DIR back into the vector store.
+    Interrupted restores resume from the last completed batch.
+    """
+    try:
+        snapshot_dir = resolve_snapshot_dir(request.snapshot_dir)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await run_in_threadpool(
+        restore_vector_snapshot,
+        snapshot_dir=snapshot_dir,
+        collection_names=request.collection_names,
+        resume=request.resume
+    )
+    
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result.get("error", "Snapshot restore failed"))
+    
+    return VectorSnapshotResponse(**result)
+
+@router.post("/admin/vector-gc", response_model=VectorGCResponse)
+async def admin_collect_vector_garbage(
+    dry_run: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Admin endpoint: Delete vectors whose PDF or collection no longer exists.
+    Defaults to a dry run that only reports what would be deleted.
+    """
+    result = await run_in_threadpool(collect_vector_garbage, db, dry_run=dry_run)
+    
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result.get("error", "Vector GC failed"))
+    
+    return VectorGCResponse(**result)
+
+@router.get("/admin/vector-gc/stats")
+async def admin_get_vector_gc_stats():
+    """
+    Admin endpoint: Cumulative vector GC metrics (orphans deleted, bytes reclaimed).
+    """
+    return get_vector_gc_stats()
+
+@router.get("/admin/answer-cache/stats")
+async def admin_get_answer_cache_stats():
+    """
+    Admin endpoint: Answer cache hit rates and LLM seconds saved.
+    """
+    return get_answer_cache_stats()
+
+@router.get("/admin/request-coalescing/stats")
+async def admin_get_request_coalescing_stats():
+    """
+    Admin endpoint: Q&A pipeline executions saved by coalescing identical in-flight requests.
+    """
+    return get_request_coalescing_stats()
+
+@router.get("/admin/llm-pool/stats")
+async def admin_get_llm_pool_stats():
+    """
+    Admin endpoint: LLM HTTP connection-pool utilisation.
+    """
+    return get_http_pool_stats()
+
+@router.get("/admin/llm-backends/stats")
+async def admin_get_llm_backend_stats():
+    """
+    Admin endpoint: Outstanding requests, failures and ejection state per LLM backend.
+    """
+    return get_llm_router_stats()
+
+@router.get("/admin/llm-timings/stats")
+async def admin_get_llm_timing_stats():
+    """
+    Admin endpoint: Aggregated Ollama load, prompt-eval and generation timings.
+    """
+    return get_llm_timing_stats()
+
+@router.get("/admin/llm-resilience/stats")
+async def admin_get_llm_resilience_stats():
+    """
+    Admin endpoint: LLM retries, hedges, deadline misses and circuit breaker state.
+    """
+    return get_llm_resilience_stats()
+
+@router.get("/admin/llm-cascade/stats")
+async def admin_get_llm_cascade_stats():
+    """
+    Admin endpoint: Share of answers served by the small and large model tiers.
+    """
+    return get_cascade_stats()
+
+@router.get("/admin/extractive/stats")
+async def admin_get_extractive_stats():
+    """
+    Admin endpoint: How often extractive mode answered without LLM generation.
+    """
+    return get_extractive_stats()
+
+@router.get("/admin/query-history/export")
+async def admin_export_query_history(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    collection_id: Optional[int] = None
+):
+    """
+    Admin endpoint: Export query history in [start, end) as NDJSON, oldest first.
+    Rows are streamed from a server-side cursor, so exports of any size use constant memory.
+    """
+    def history_lines():
+        db = SessionLocal()
+        try:
+            for row in iter_query_history(db, start=start, end=end, collection_id=collection_id):
+                yield json.dumps(row, default=str) + "\n"
+        finally:
+            db.close()
+    
+    return StreamingResponse(history_lines(), media_type="application/x-ndjson")
+
+@router.get("/admin/ingestion/stats")
+async def admin_get_ingestion_stats(db: Session = Depends(get_db)):
+    """
+    Admin endpoint: Ingestion queue depth, job counts by status and worker metrics.
+    """
+    return await run_in_threadpool(get_ingestion_queue_stats, db)
+
+@router.get("/admin/history-writer/stats")
+async def admin_get_history_writer_stats():
+    """
+    Admin endpoint: Write-behind buffer depth, flushes and rows written synchronously under backpressure.
+    """
+    return get_history_writer_stats()
+
+@router.post("/admin/collection-centroids/rebuild")
+async def admin_rebuild_collection_centroids(db: Session = Depends(get_db)):
+    """
+    Admin endpoint: Recompute every collection's routing centroid from the vector store,
+    e.g. after deleting PDFs or changing the embedding model.
+    """
+    result = await run_in_threadpool(rebuild_collection_centroids, db)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+    return result
+
+@router.post("/admin/collection-stats/rebuild")
+async def admin_rebuild_collection_stats(db: Session = Depends(get_db)):
+    """
+    Admin endpoint: Reconcile every collection's PDF, chunk, byte and token counters
+    with the PDF table and the vector store.
+    """
+    result = await run_in_threadpool(rebuild_collection_stats, db)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+    return result
+
+@router.get("/admin/collection-routing/stats")
+async def admin_get_collection_routing_stats():
+    """
+    Admin endpoint: Routed question count and number of collections with centroids.
+    """
+    return get_collection_routing_stats()
+
+@router.get("/admin/collection-cache/stats")
+async def admin_get_collection_cache_stats():
+    """
+    Admin endpoint: Collection metadata cache hit ratio and change-notification listener state.
+    """
+    return get_collection_cache_stats()
+
 @router.get("/health")
 async def health_check():
     """
     Health check endpoint for the Q&A service.
+    Answers from the background health monitor's cached probe results.
     """
-    from ...rag_components.llm_handler import health_check_llm_service
-    
-    # Check LLM service health
-    llm_healthy = await health_check_llm_service()
+    snapshot = get_health_snapshot()
+    llm_status = snapshot["components"]["llm_service"]["status"]
     
     return {
         "qa_service": "healthy",
-        "llm_service": "healthy" if llm_healthy else "unhealthy",
-        "overall_status": "healthy" if llm_healthy else "degraded"
+        "llm_service": llm_status,
+        "overall_status": snapshot["overall_status"],
+        "components": snapshot["components"]
     }
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness endpoint: 200 once every dependency passed its latest probe, 503 otherwise.
+    """
+    snapshot = get_health_snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
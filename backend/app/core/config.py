@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Dict, List
 import os
 
 class Settings(BaseSettings):
@@ -18,9 +19,122 @@ class Settings(BaseSettings):
     CHROMA_DEFAULT_COLLECTION_NAME: str = "rag_documents"
     CHROMA_HTTP_HOST: str = "localhost"  # ChromaDB HTTP host
     CHROMA_HTTP_PORT: int = 8001  # ChromaDB HTTP port
+    VECTOR_METADATA_LEGACY_COMPAT: bool = True  # Also match un-migrated string collection_ids; disable after migrate-vector-metadata
+    
+    # Vector snapshot settings (export/restore of ChromaDB data)
+    VECTOR_SNAPSHOT_DIR: str = "./data/vector_store/snapshots"
+    VECTOR_SNAPSHOT_BATCH_SIZE: int = 1000  # Rows read/written per ChromaDB call
+    
+    # Vector garbage collection (orphaned chunk cleanup)
+    VECTOR_GC_ENABLED: bool = True
+    VECTOR_GC_INTERVAL_SECONDS: int = 3600
+    VECTOR_GC_BATCH_SIZE: int = 500
+    VECTOR_GC_REBUILD_THRESHOLD: float = 0.2  # Recommend an offline rebuild once this fraction has been deleted
     
     # LLM Service settings (Ollama service)
     LLM_SERVICE_URL: str = "http://llm-service:11434"  # Use Docker service name
     LLM_COMPLETION_ENDPOINT: str = "/api/generate"
+    LLM_HEALTH_ENDPOINT: str = "/api/tags"  # Cheap metadata endpoint used for health probes
+    LLM_MODEL_NAME: str = "tinyllama"
+    LLM_KEEP_ALIVE: str = "30m"  # How long Ollama keeps the model loaded after a request (-1 = forever)
+    LLM_PRELOAD_ON_STARTUP: bool = True
+    LLM_ROUTE_MODELS: Dict[str, str] = {}  # Per-route model override, e.g. {"qa": "tinyllama"} (JSON in env)
+    
+    # Model cascade: small model first, escalate to the large model on low confidence
+    LLM_CASCADE_ENABLED: bool = False
+    LLM_CASCADE_SMALL_MODEL: str = "tinyllama"
+    LLM_CASCADE_LARGE_MODEL: str = "llama3.2:3b"
+    LLM_CASCADE_SMALL_MAX_TOKENS: int = 200  # Tight budget; hitting it escalates
+    LLM_CASCADE_COLLECTION_POLICIES: Dict[str, str] = {}  # Collection id or name -> cascade | small_only | large_only
+    
+    # LLM backend pool (requests go to the least-loaded healthy backend)
+    LLM_BACKEND_URLS: List[str] = []  # JSON list in env; empty means just LLM_SERVICE_URL
+    LLM_BACKEND_MAX_CONCURRENCY: int = 4  # Outstanding generations per backend
+    LLM_BACKEND_QUEUE_TIMEOUT_SECONDS: float = 30.0  # Wait for a free slot when all backends are busy
+    LLM_BACKEND_EJECT_AFTER_FAILURES: int = 3
+    LLM_BACKEND_EJECT_SECONDS: float = 30.0
+    
+    # LLM call resilience (deadline, retries, hedging, circuit breaker)
+    LLM_REQUEST_DEADLINE_SECONDS: float = 45.0  # Total time for all attempts of one generation
+    LLM_RETRY_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.2  # Full-jitter exponential backoff base
+    LLM_RETRY_BUDGET_RATIO: float = 0.2  # Retries allowed per request, averaged over time
+    LLM_RETRY_BUDGET_MAX_TOKENS: float = 10.0  # Retry burst allowance
+    LLM_HEDGE_ENABLED: bool = False  # Duplicate slow requests to another backend after p95 latency
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # Latency samples needed before hedging starts
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+    LLM_CONTEXT_TOKEN_BUDGET: int = 1200  # Max context tokens in a RAG prompt (tinyllama has a 2048-token window)
+    LLM_CONTEXT_MIN_TRIM_TOKENS: int = 50  # Smallest leftover budget worth filling with a trimmed chunk
+    
+    # Extractive answers (answer_mode="extractive"): return a retrieved sentence without generation
+    EXTRACTIVE_ANSWER_THRESHOLD: float = 0.75  # Min question/sentence cosine similarity
+    EXTRACTIVE_MAX_CHUNKS: int = 3  # Top chunks whose sentences are scored
+    EXTRACTIVE_MIN_SENTENCE_WORDS: int = 5
+    
+    # Request tracing (per-stage spans; Server-Timing header is always sent on /qa/ask)
+    TRACING_EXPORTER: str = "none"  # "none" or "opentelemetry" (requires opentelemetry-api)
+    
+    # Answer cache settings
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.92  # Cosine similarity for a semantic (paraphrase) hit
+    ANSWER_CACHE_MAX_ENTRIES_PER_COLLECTION: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: int = 86400
+    
+    # LLM HTTP client pool (one client shared by all requests)
+    LLM_HTTP_MAX_CONNECTIONS: int = 20
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_HTTP_READ_TIMEOUT_SECONDS: float = 30.0  # Max gap between bytes, not total generation time
+    LLM_HTTP_WRITE_TIMEOUT_SECONDS: float = 10.0
+    LLM_HTTP_POOL_TIMEOUT_SECONDS: float = 10.0  # Wait for a free pooled connection
+    LLM_HTTP2_ENABLED: bool = False  # Requires the h2 package and an HTTP/2-capable endpoint
+    
+    # Background health probes (LLM service, ChromaDB, PostgreSQL)
+    HEALTH_PROBE_ENABLED: bool = True
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 10.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 3.0
+    HEALTH_PROBE_MAX_BACKOFF_SECONDS: float = 60.0  # Ceiling for the interval while a service keeps failing
+    
+    # Share one pipeline execution between concurrent identical questions
+    QA_REQUEST_COALESCING_ENABLED: bool = True
+    
+    # Batch Q&A (/qa/ask/batch)
+    QA_BATCH_MAX_QUESTIONS: int = 500
+    QA_BATCH_MAX_CONCURRENCY: int = 4  # Concurrent LLM generations per batch
+    
+    # Multi-collection Q&A (/qa/ask/multi)
+    QA_MULTI_MAX_COLLECTIONS: int = 20
+    
+    # Routing of "all collections" questions by per-collection centroid similarity
+    COLLECTION_ROUTING_FAN_OUT: int = 3  # Collections searched per routed question
+    COLLECTION_ROUTING_REFRESH_SECONDS: float = 60.0  # Reload of centroids changed by other workers
+    
+    # Write-behind buffer for history rows (QueryHistory, Answer, ...)
+    HISTORY_WRITE_BEHIND_ENABLED: bool = True
+    HISTORY_BUFFER_MAX_ROWS: int = 10000  # Rows beyond this are written synchronously by the caller
+    HISTORY_FLUSH_INTERVAL_SECONDS: float = 1.0
+    HISTORY_FLUSH_BATCH_SIZE: int = 500  # Rows per multi-row INSERT; a full batch flushes early
+    
+    # Background ingestion of uploaded PDFs (durable queue in the ingestion_jobs table)
+    INGESTION_WORKERS_ENABLED: bool = True
+    INGESTION_WORKER_CONCURRENCY: int = 2  # PDFs processed at once per process
+    INGESTION_POLL_INTERVAL_SECONDS: float = 2.0  # Pickup delay for jobs enqueued by other processes
+    INGESTION_JOB_MAX_ATTEMPTS: int = 3
+    INGESTION_RETRY_BACKOFF_SECONDS: float = 30.0  # Doubles with each failed attempt
+    INGESTION_JOB_LEASE_SECONDS: float = 900.0  # Renewed at every pipeline step; expired jobs are retried
+    INGESTION_EMBEDDING_BATCH_SIZE: int = 256  # Chunks embedded per model call; the lease is renewed between calls
+    
+    # Query history API
+    QUERY_HISTORY_MAX_PAGE_SIZE: int = 500
+    QUERY_HISTORY_EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per round trip from the server-side cursor
+    
+    # Collection metadata cache, kept coherent across workers with LISTEN/NOTIFY
+    COLLECTION_CACHE_ENABLED: bool = True
+    COLLECTION_CACHE_TTL_SECONDS: float = 300.0  # Safety net while change notifications are received
+    COLLECTION_CACHE_UNSYNCED_TTL_SECONDS: float = 2.0  # Used while the listener is disconnected
+    COLLECTION_CACHE_NOTIFY_CHANNEL: str = "collection_changed"
+    COLLECTION_CACHE_LISTEN_RETRY_SECONDS: float = 5.0
 
 settings = Settings()
@@ -0,0 +1,109 @@
+"""
+Metrics - Prometheus metrics for the backend, served at /metrics.
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty, writable
+directory before the workers start: each worker then writes its samples there and
+/metrics aggregates all workers (gauges are summed over live processes).
+"""
+
+import os
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 45, 60, 120)
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until response headers are sent",
+    ["method", "route", "status"], buckets=_LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", multiprocess_mode="livesum"
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "rag_embedding_batch_size", "Texts per embedding model call", ["source"], buckets=_BATCH_BUCKETS
+)
+EMBEDDING_DURATION = Histogram(
+    "rag_embedding_duration_seconds", "Embedding model call latency", ["source"], buckets=_LATENCY_BUCKETS
+)
+EMBEDDED_TEXTS = Counter("rag_embedded_texts_total", "Texts embedded", ["source"])
+
+VECTOR_SEARCH_DURATION = Histogram(
+    "rag_vector_search_duration_seconds", "ChromaDB query latency (one call may carry several queries)",
+    buckets=_LATENCY_BUCKETS
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "rag_llm_request_duration_seconds", "LLM generation latency including retries", ["model", "outcome"],
+    buckets=_LLM_BUCKETS
+)
+LLM_TOKENS = Counter("rag_llm_tokens_total", "Tokens processed by the LLM", ["model", "kind"])
+LLM_EVAL_SECONDS = Counter(
+    "rag_llm_eval_seconds_total", "LLM time spent evaluating tokens; tokens/sec = rate(tokens) / rate(seconds)",
+    ["model", "kind"]
+)
+
+ANSWER_CACHE_LOOKUPS = Counter("rag_answer_cache_lookups_total", "Answer cache lookups by result", ["result"])
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out", "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum"
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections_open", "Database connections currently open", multiprocess_mode="livesum"
+)
+
+HISTORY_BUFFER_DEPTH = Gauge(
+    "history_buffer_rows", "History rows waiting in the write-behind buffer", multiprocess_mode="livesum"
+)
+HISTORY_ROWS_WRITTEN = Counter("history_rows_written_total", "History rows written by the write-behind flusher", ["outcome"])
+HISTORY_BUFFER_REJECTED = Counter(
+    "history_buffer_rejected_total", "History rows written synchronously because the buffer was full"
+)
+HISTORY_FLUSH_DURATION = Histogram(
+    "history_flush_duration_seconds", "Duration of one write-behind INSERT batch", buckets=_LATENCY_BUCKETS
+)
+
+INGESTION_IN_PROGRESS = Gauge(
+    "rag_ingestion_jobs_in_progress", "PDFs currently being processed", multiprocess_mode="livesum"
+)
+INGESTION_QUEUE_DEPTH = Gauge(
+    "rag_ingestion_queue_depth", "PDFs waiting to be processed", multiprocess_mode="livemostrecent"
+)
+
+
+def instrument_db_pool(engine):
+    """Track pool usage through SQLAlchemy pool events, so every worker reports its own pool."""
+    from sqlalchemy import event
+
+    event.listen(engine, "connect", lambda *args: DB_POOL_CONNECTIONS.inc())
+    event.listen(engine, "close", lambda *args: DB_POOL_CONNECTIONS.dec())
+    event.listen(engine, "checkout", lambda *args: DB_POOL_CHECKED_OUT.inc())
+    event.listen(engine, "checkin", lambda *args: DB_POOL_CHECKED_OUT.dec())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in Prometheus text format.
+
+    Returns:
+        Tuple of (body, content_type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,122 @@
+"""
+Request tracing - per-stage timing spans for the RAG pipeline.
+A Trace collects the spans of one request (reported in a Server-Timing header and
+optionally in the response body); a pluggable exporter forwards them to an external
+tracer. The exporter is a no-op by default and OpenTelemetry when TRACING_EXPORTER
+is "opentelemetry" and the opentelemetry-api package is installed.
+"""
+
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class NoOpExporter:
+    """Discards spans."""
+
+    def start_span(self, name: str):
+        return nullcontext()
+
+
+class OpenTelemetryExporter:
+    """Forwards spans to the globally configured OpenTelemetry tracer provider."""
+
+    def __init__(self):
+        from opentelemetry import trace
+        self._tracer = trace.get_tracer("pdf_rag")
+
+    def start_span(self, name: str):
+        return self._tracer.start_as_current_span(name)
+
+
+def _create_exporter():
+    if settings.TRACING_EXPORTER == "opentelemetry":
+        try:
+            return OpenTelemetryExporter()
+        except ImportError:
+            logger.warning("TRACING_EXPORTER is 'opentelemetry' but opentelemetry-api is not installed; tracing disabled")
+    return NoOpExporter()
+
+
+_exporter = None
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+def get_exporter():
+    global _exporter
+    if _exporter is None:
+        _exporter = _create_exporter()
+    return _exporter
+
+
+class Trace:
+    """Timing spans of one request, in completion order."""
+
+    def __init__(self):
+        self.spans: List[Dict] = []
+        self._open: List[Dict] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        record = {"name": name, "duration_ms": 0.0, "attributes": dict(attributes)}
+        self._open.append(record)
+        started = time.perf_counter()
+        with get_exporter().start_span(name) as external:
+            try:
+                yield record
+            finally:
+                record["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                self._open.remove(record)
+                self.spans.append(record)
+                if external is not None:
+                    for key, value in record["attributes"].items():
+                        external.set_attribute(key, value)
+
+    def annotate(self, **attributes):
+        """Attach attributes to the innermost open span."""
+        if self._open:
+            self._open[-1]["attributes"].update(attributes)
+
+    def server_timing(self) -> str:
+        """Spans as a Server-Timing header value."""
+        return ", ".join(f"{s['name']};dur={s['duration_ms']}" for s in self.spans)
+
+    def as_dict(self) -> Dict:
+        # Spans may nest (embedding inside the cache lookup), so total is wall-clock time
+        return {
+            "spans": self.spans,
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 2)
+        }
+
+
+@contextmanager
+def start_trace():
+    """Make a new Trace current for the enclosed block (and tasks it creates)."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def trace_span(name: str, **attributes):
+    """Time a pipeline stage in the current trace; free when no trace is active."""
+    trace = _current_trace.get()
+    if trace is None:
+        return nullcontext()
+    return trace.span(name, **attributes)
+
+
+def annotate_span(**attributes):
+    """Attach attributes to the current trace's innermost open span, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotate(**attributes)
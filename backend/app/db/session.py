@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
+from app.core.metrics import instrument_db_pool
 from app.models.db_models import Base
 from typing import Generator
 
@@ -10,13 +11,21 @@ engine = create_engine(
     pool_pre_ping=True,  # Verify connections before use
     pool_recycle=300     # Recreate connections every 5 minutes
 )
+instrument_db_pool(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Call this to create tables
 
+def create_missing_indexes(bind=engine):
+    """create_all skips existing tables; add indexes introduced since they were created."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
 def init_db():
     print("[init_db] Starting DB initialization...")
     Base.metadata.create_all(bind=engine)
+    create_missing_indexes()
     print("[init_db] DB initialization complete.")
 
 def get_db() -> Generator[Session, None, None]:
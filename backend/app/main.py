@@ -1,24 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.apis.v1.router_collections import router as collections_router
 from app.apis.v1.router_pdfs import router as pdfs_router  
 from app.apis.v1.router_qa import router as qa_router
 from app.db.session import init_db, SessionLocal
 from app.utils.initial_corpus_ingest import ingest_initial_corpus
+from app.services.vector_gc_service import start_vector_gc_task, stop_vector_gc_task
+from app.services.health_monitor_service import start_health_monitor, stop_health_monitor
+from app.services.history_writer_service import start_history_writer, stop_history_writer
+from app.services.collection_cache_service import start_collection_cache_listener, stop_collection_cache_listener
+from app.services.collection_routing_service import start_centroid_backfill, stop_centroid_backfill
+from app.services.collection_stats_service import start_collection_stats_backfill, stop_collection_stats_backfill
+from app.services.ingestion_job_service import get_ingestion_queue_depth, start_ingestion_workers, stop_ingestion_workers
+from app.rag_components.llm_handler import open_http_client, close_http_client, start_llm_preload
+from contextlib import asynccontextmanager
 import time
 import psycopg2
 from app.core.config import settings
-
-app = FastAPI(title="PDF RAG Q&A System", version="1.0.0")
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your frontend URLs
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, INGESTION_QUEUE_DEPTH, render_metrics
 
 def wait_for_postgres(max_retries=30, delay=2):
     """Wait for PostgreSQL to be ready before starting the application"""
@@ -43,7 +42,6 @@ def wait_for_postgres(max_retries=30, delay=2):
     print("[startup] PostgreSQL failed to become ready in time!")
     return False
 
-@app.on_event("startup")
 def on_startup():
     print("[startup] Startup event begins.")
     
@@ -85,6 +83,62 @@ def on_startup():
     # finally:
     #     db.close()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    on_startup()
+    await open_http_client()
+    start_llm_preload()
+    start_vector_gc_task()
+    start_health_monitor()
+    start_history_writer()
+    start_collection_cache_listener()
+    start_ingestion_workers()
+    start_centroid_backfill()
+    start_collection_stats_backfill()
+    print("[startup] Background tasks and LLM HTTP client started.")
+    
+    yield
+    
+    # Stop background work first, then drain pooled LLM connections
+    await stop_ingestion_workers()
+    await stop_centroid_backfill()
+    await stop_collection_stats_backfill()
+    await stop_health_monitor()
+    await stop_vector_gc_task()
+    await stop_history_writer()  # Flushes buffered history rows
+    await stop_collection_cache_listener()
+    await close_http_client()
+    print("[shutdown] Background tasks stopped and LLM HTTP client closed.")
+
+app = FastAPI(title="PDF RAG Q&A System", version="1.0.0", lifespan=lifespan)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, specify your frontend URLs
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    with HTTP_REQUESTS_IN_FLIGHT.track_inprogress():
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            # Label by route template, not raw path, to keep label cardinality bounded
+            route = request.scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code)
+            ).observe(time.perf_counter() - started)
+
 app.include_router(collections_router)
 app.include_router(pdfs_router)
 app.include_router(qa_router)
@@ -92,3 +146,16 @@ app.include_router(qa_router)
 @app.get("/")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    db = SessionLocal()
+    try:
+        INGESTION_QUEUE_DEPTH.set(get_ingestion_queue_depth(db))
+    except Exception:
+        pass  # Still serve the other metrics when the database is unavailable
+    finally:
+        db.close()
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 
@@ -29,6 +29,60 @@ class PDFDocument(Base):
 # Create an alias for compatibility
 PDF = PDFDocument
 
+class CollectionCentroid(Base):
+    __tablename__ = "collection_centroids"
+    collection_id = Column(Integer, ForeignKey("collections.id", ondelete="CASCADE"), primary_key=True)
+    centroid = Column(Text, nullable=False)  # JSON list: mean of the collection's chunk embeddings
+    chunk_count = Column(Integer, default=0, nullable=False)  # Embeddings averaged into the centroid
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CollectionStats(Base):
+    __tablename__ = "collection_stats"
+    collection_id = Column(Integer, ForeignKey("collections.id", ondelete="CASCADE"), primary_key=True)
+    pdf_count = Column(Integer, default=0, nullable=False)
+    chunk_count = Column(Integer, default=0, nullable=False)  # Chunks stored in the vector store
+    text_bytes = Column(BigInteger, default=0, nullable=False)  # UTF-8 bytes of the stored chunk texts
+    token_count = Column(BigInteger, default=0, nullable=False)  # Estimated tokens of the stored chunk texts
+    last_ingested_at = Column(DateTime)
+    needs_recount = Column(Boolean, default=False, nullable=False)  # Created on a write path; the backfill recounts it
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PDFChunkStats(Base):
+    __tablename__ = "pdf_chunk_stats"
+    # Each PDF's current share of its collection's counters, so re-indexing and deleting subtract exactly
+    pdf_id = Column(Integer, ForeignKey("pdf_documents.id", ondelete="CASCADE"), primary_key=True)
+    collection_id = Column(Integer, ForeignKey("collections.id", ondelete="CASCADE"), nullable=False)
+    chunk_count = Column(Integer, default=0, nullable=False)
+    text_bytes = Column(BigInteger, default=0, nullable=False)
+    token_count = Column(BigInteger, default=0, nullable=False)
+
+class VectorIndexState(Base):
+    __tablename__ = "vector_index_state"
+    # Per ChromaDB collection, so the GC's rebuild recommendation survives restarts and leader changes
+    chroma_collection_name = Column(String(255), primary_key=True)
+    deleted_since_rebuild = Column(BigInteger, default=0, nullable=False)  # Vectors deleted since the last rebuild
+    rebuilt_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    # Durable queue entry that runs a PDF through the RAG pipeline; the PDF row's status mirrors it
+    id = Column(Integer, primary_key=True, index=True)
+    pdf_id = Column(Integer, ForeignKey("pdf_documents.id", ondelete="CASCADE"), unique=True, nullable=False)
+    status = Column(String(50), default="queued", nullable=False)  # queued, running, succeeded, failed
+    stage = Column(String(50))  # Pipeline step of the current or last attempt
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = Column(DateTime)  # Lease of the running attempt; an expired lease is claimable again
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+    pdf = relationship("PDFDocument")
+    __table_args__ = (
+        Index("ix_ingestion_jobs_status_next_attempt", status, next_attempt_at),
+    )
+
 class QueryHistory(Base):
     __tablename__ = "query_history"
     id = Column(Integer, primary_key=True, index=True)
@@ -39,6 +93,10 @@ class QueryHistory(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     collection = relationship("Collection", back_populates="queries")
     answers = relationship("Answer", back_populates="query")
+    # Serves newest-first history pages of a collection, including keyset cursors on (timestamp, id)
+    __table_args__ = (
+        Index("ix_query_history_collection_timestamp_id", collection_id, timestamp.desc(), id),
+    )
 
 class Answer(Base):
     __tablename__ = "answers"
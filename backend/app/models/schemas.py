@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class CollectionBase(BaseModel):
@@ -35,6 +35,17 @@ class PDFDocument(PDFDocumentBase):
     updated_at: datetime
     model_config = {"from_attributes": True}
 
+class IngestionJobStatus(BaseModel):
+    pdf_id: int
+    status: str  # queued, running, succeeded, failed
+    stage: Optional[str] = None
+    attempts: int
+    last_error: Optional[str] = None
+    next_attempt_at: datetime
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    model_config = {"from_attributes": True}
+
 class QueryBase(BaseModel):
     text: str
 
@@ -80,6 +91,23 @@ class QuestionRequest(BaseModel):
     question: str = Field(..., min_length=3, max_length=1000, description="The question to ask")
     collection_id: int = Field(..., description="ID of the collection to search in")
     top_k: int = Field(default=5, ge=1, le=20, description="Number of relevant chunks to retrieve")
+    answer_mode: Literal["generative", "extractive"] = Field(
+        default="generative",
+        description="'extractive' answers with a retrieved sentence when it matches confidently, skipping generation"
+    )
+
+class BatchQuestionRequest(BaseModel):
+    questions: List[QuestionRequest] = Field(..., min_length=1, description="Questions to answer, possibly across collections")
+
+class MultiCollectionQuestionRequest(BaseModel):
+    question: str = Field(..., min_length=3, max_length=1000, description="The question to ask")
+    collection_ids: Optional[List[int]] = Field(
+        default=None,
+        min_length=1,
+        description="IDs of the collections to search together; omit to search all collections, routed by centroid similarity"
+    )
+    top_k: int = Field(default=5, ge=1, le=20, description="Number of relevant chunks to use across all collections")
+    fan_out: Optional[int] = Field(default=None, ge=1, le=20, description="Collections searched when routing (default from settings)")
 
 class SourceInfo(BaseModel):
     source_pdf: str
@@ -94,6 +122,33 @@ class QuestionResponse(BaseModel):
     collection_name: str
     sources_count: int
     question: str
+    cache_hit: Optional[str] = None  # "exact" or "semantic" when served from the answer cache
+    context_budget: Optional[dict] = None  # Token budget report from the context assembler
+    answer_mode: Optional[str] = None  # "extractive" when answered with a retrieved sentence
+    extractive_score: Optional[float] = None  # Question/sentence similarity of an extractive answer
+    timings: Optional[dict] = None  # Per-stage trace spans, when requested with include_timings=true
+    error: Optional[str] = None
+
+class CollectionRetrieval(BaseModel):
+    collection_id: int
+    collection_name: str
+    chunks_retrieved: int
+    chunks_used: int  # Chunks of this collection that made the global top_k and the context budget
+    best_distance: Optional[float] = None
+    search_ms: float
+    routing_score: Optional[float] = None  # Centroid similarity, when the collection was picked by routing
+
+class MultiCollectionQuestionResponse(BaseModel):
+    success: bool
+    answer: str
+    sources: List[SourceInfo]
+    sources_count: int
+    question: str
+    collections: List[CollectionRetrieval]
+    routed: bool = False  # True when collections were picked by centroid routing
+    cache_hit: Optional[str] = None  # "exact" or "semantic" when served from the answer cache
+    context_budget: Optional[dict] = None
+    timings: Optional[dict] = None  # Per-stage trace spans, when requested with include_timings=true
     error: Optional[str] = None
 
 class CollectionSummaryResponse(BaseModel):
@@ -101,7 +156,10 @@ class CollectionSummaryResponse(BaseModel):
     collection_name: str
     collection_id: int
     pdf_count: int
-    total_chunks_in_chroma: int
+    total_chunks_in_chroma: int  # Chunks of this collection
+    total_text_bytes: int = 0
+    total_tokens: int = 0
+    last_ingested_at: Optional[datetime] = None
     created_at: datetime
     description: Optional[str] = None
     error: Optional[str] = None
@@ -117,6 +175,7 @@ class RecentQueriesResponse(BaseModel):
     collection_id: int
     queries: List[RecentQuery]
     count: int
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next (older) page
 
 class ReindexResponse(BaseModel):
     success: bool
@@ -135,3 +194,36 @@ class SystemStats(BaseModel):
     embedding_model: str
     chroma_db_path: str
     error: Optional[str] = None
+
+class VectorSnapshotRequest(BaseModel):
+    snapshot_dir: Optional[str] = Field(
+        default=None, description="Directory relative to VECTOR_SNAPSHOT_DIR (defaults to a timestamped one)"
+    )
+    collection_names: Optional[List[str]] = None
+
+class VectorRestoreRequest(BaseModel):
+    snapshot_dir: str = Field(..., description="Snapshot directory relative to VECTOR_SNAPSHOT_DIR")
+    collection_names: Optional[List[str]] = None
+    resume: bool = True
+
+class VectorSnapshotResponse(BaseModel):
+    success: bool
+    snapshot_dir: Optional[str] = None
+    collections: Optional[dict] = None
+    total_rows: Optional[int] = None
+    message: Optional[str] = None
+    error: Optional[str] = None
+
+class VectorGCResponse(BaseModel):
+    success: bool
+    dry_run: bool
+    collection_name: Optional[str] = None
+    total_vectors: Optional[int] = None
+    scanned: Optional[int] = None
+    orphans_found: Optional[int] = None
+    orphans_by_pdf: Optional[dict] = None
+    orphans_deleted: Optional[int] = None
+    bytes_reclaimed: Optional[int] = None
+    deleted_fraction: Optional[float] = None
+    rebuild_recommended: Optional[bool] = None
+    error: Optional[str] = None
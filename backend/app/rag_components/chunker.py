@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+import math
 
 class Chunk(BaseModel):
     id: str
@@ -10,6 +11,16 @@ class Chunk(BaseModel):
     chunk_sequence_id: int
     collection_id: str
     pdf_db_id: int
+    token_count: Optional[int] = None  # Cached estimate, see estimate_token_count
+    word_offset: Optional[int] = None  # Index of the chunk's first word in the extracted PDF text
+
+
+def estimate_token_count(text: str) -> int:
+    """
+    Estimate the LLM token count of text.
+    Uses the same approximation as chunking (1 token ≈ 0.75 words for English text).
+    """
+    return math.ceil(len(text.split()) / 0.75)
 
 
 def chunk_text(
@@ -57,7 +68,9 @@ def chunk_text(
             page_numbers=page_numbers,
             chunk_sequence_id=chunk_sequence_id,
             collection_id=collection_id,
-            pdf_db_id=pdf_db_id
+            pdf_db_id=pdf_db_id,
+            token_count=estimate_token_count(chunk_text),
+            word_offset=i
                 )
         chunks.append(chunk)
         i += chunk_size - chunk_overlap
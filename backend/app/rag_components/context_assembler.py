@@ -0,0 +1,180 @@
+"""
+Context Assembler - Token-budgeted selection of retrieved chunks for the RAG prompt.
+Keeps prompt size (and with it the LLM's prompt-eval time) bounded regardless of top_k,
+and merges neighbouring chunks of the same PDF so their shared overlap is sent only once.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .chunker import Chunk, estimate_token_count
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+# Tokens taken by the per-chunk "Context N: ... [Source: ...]" framing in the prompt
+CHUNK_FRAMING_TOKENS = 20
+
+
+def chunk_token_count(chunk: Chunk) -> int:
+    """Token count of a chunk, using the cached value when the chunk carries one."""
+    if chunk.token_count is not None:
+        return chunk.token_count
+    return estimate_token_count(chunk.text)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text at sentence-ending punctuation."""
+    return [sentence for sentence in _SENTENCE_BOUNDARY.split(text) if sentence]
+
+
+def trim_to_sentences(text: str, max_tokens: int) -> Tuple[str, int]:
+    """
+    Keep whole leading sentences of text that fit within max_tokens.
+
+    Returns:
+        Tuple of (trimmed_text, token_count); ("", 0) if not even one sentence fits
+    """
+    kept = []
+    used = 0
+    for sentence in split_sentences(text):
+        tokens = estimate_token_count(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+    return " ".join(kept), used
+
+
+def _overlap_words(previous: List[str], following: List[str]) -> int:
+    """Length of the longest suffix of previous that is also a prefix of following."""
+    for size in range(min(len(previous), len(following)), 0, -1):
+        if previous[-size:] == following[:size]:
+            return size
+    return 0
+
+
+def _merge_pair(span: Chunk, chunk: Chunk) -> Optional[Chunk]:
+    """
+    Merge chunk onto the end of span when the two windows touch or overlap.
+
+    Word offsets stored at ingestion locate the overlap exactly; chunks ingested
+    before offsets were recorded fall back to matching the shared words of
+    consecutive sequence ids.
+
+    Returns:
+        The merged span, or None if the chunks are not contiguous
+    """
+    span_words = span.text.split()
+    chunk_words = chunk.text.split()
+
+    if span.word_offset is not None and chunk.word_offset is not None:
+        span_end = span.word_offset + len(span_words)
+        if chunk.word_offset > span_end:
+            return None
+        skip = span_end - chunk.word_offset
+    elif chunk.chunk_sequence_id == span.chunk_sequence_id + 1:
+        skip = _overlap_words(span_words, chunk_words)
+    else:
+        return None
+
+    text = " ".join(span_words + chunk_words[skip:])
+    return span.model_copy(update={
+        "text": text,
+        "page_numbers": sorted(set(span.page_numbers) | set(chunk.page_numbers)),
+        "chunk_sequence_id": chunk.chunk_sequence_id,
+        "token_count": estimate_token_count(text)
+    })
+
+
+def merge_adjacent_chunks(chunks: List[Chunk]) -> Tuple[List[Chunk], Dict]:
+    """
+    Merge retrieved chunks that are contiguous or overlapping windows of the same PDF
+    into single spans, so overlapping text appears (and is cited) once in the prompt.
+
+    Spans keep the id and starting sequence of their first chunk and are ordered by
+    the rank of their most relevant member.
+
+    Args:
+        chunks: Retrieved chunks, most relevant first
+
+    Returns:
+        Tuple of (spans, merge_report)
+    """
+    rank = {chunk.id: position for position, chunk in enumerate(chunks)}
+    by_pdf: Dict[int, List[Chunk]] = {}
+    for chunk in chunks:
+        by_pdf.setdefault(chunk.pdf_db_id, []).append(chunk)
+
+    spans = []
+    for pdf_chunks in by_pdf.values():
+        pdf_chunks.sort(key=lambda c: c.chunk_sequence_id)
+        span, span_rank = pdf_chunks[0], rank[pdf_chunks[0].id]
+        for chunk in pdf_chunks[1:]:
+            merged = _merge_pair(span, chunk)
+            if merged is None:
+                spans.append((span_rank, span))
+                span, span_rank = chunk, rank[chunk.id]
+            else:
+                span, span_rank = merged, min(span_rank, rank[chunk.id])
+        spans.append((span_rank, span))
+
+    spans.sort(key=lambda item: item[0])
+    merged_spans = [span for _, span in spans]
+
+    tokens_before = sum(chunk_token_count(c) + CHUNK_FRAMING_TOKENS for c in chunks)
+    tokens_after = sum(chunk_token_count(s) + CHUNK_FRAMING_TOKENS for s in merged_spans)
+    report = {
+        "spans": len(merged_spans),
+        "chunks_merged": len(chunks) - len(merged_spans),
+        "overlap_tokens_removed": max(tokens_before - tokens_after, 0)
+    }
+    return merged_spans, report
+
+
+def assemble_context(
+    chunks: List[Chunk],
+    token_budget: int,
+    min_trim_tokens: int = 50
+) -> Tuple[List[Chunk], Dict]:
+    """
+    Select chunks for the prompt greedily in relevance order until the token budget is spent.
+    The first chunk that does not fit is trimmed at sentence boundaries to the remaining
+    budget (when at least min_trim_tokens remain); everything after it is dropped.
+
+    Args:
+        chunks: Retrieved chunks, most relevant first
+        token_budget: Maximum context tokens, including per-chunk framing
+        min_trim_tokens: Smallest remaining budget worth filling with a trimmed chunk
+
+    Returns:
+        Tuple of (selected_chunks, budget_report)
+    """
+    selected = []
+    used = 0
+    truncated = 0
+
+    for chunk in chunks:
+        cost = chunk_token_count(chunk) + CHUNK_FRAMING_TOKENS
+        if used + cost <= token_budget:
+            selected.append(chunk)
+            used += cost
+            continue
+
+        remaining = token_budget - used - CHUNK_FRAMING_TOKENS
+        if remaining >= min_trim_tokens:
+            text, tokens = trim_to_sentences(chunk.text, remaining)
+            if text:
+                selected.append(chunk.model_copy(update={"text": text, "token_count": tokens}))
+                used += tokens + CHUNK_FRAMING_TOKENS
+                truncated = 1
+        break
+
+    report = {
+        "token_budget": token_budget,
+        "tokens_used": used,
+        "chunks_retrieved": len(chunks),
+        "chunks_included": len(selected),
+        "chunks_truncated": truncated,
+        "chunks_dropped": len(chunks) - len(selected)
+    }
+    return selected, report
@@ -1,7 +1,8 @@
 from sentence_transformers import SentenceTransformer
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 from .chunker import Chunk
 from ..core.config import settings
+from ..core.metrics import EMBEDDED_TEXTS, EMBEDDING_BATCH_SIZE, EMBEDDING_DURATION
 
 _model = None
 
@@ -11,18 +12,34 @@ def get_embedding_model():
         _model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
     return _model
 
-def generate_embeddings_for_chunks(chunks: List[Chunk], model=None) -> List[Tuple[Chunk, List[float]]]:
+def generate_embeddings_for_chunks(
+    chunks: List[Chunk],
+    model=None,
+    batch_size: Optional[int] = None,
+    on_batch: Optional[Callable[[], None]] = None
+) -> List[Tuple[Chunk, List[float]]]:
+    """
+    Embed chunks, batch_size texts per model call when given, calling on_batch
+    before each call (e.g. to renew a job lease during a long PDF).
+    """
     if model is None:
         model = get_embedding_model()
     texts = [chunk.text for chunk in chunks]
-    embeddings = model.encode(texts, convert_to_numpy=True)
-    # Convert to list properly
-    if hasattr(embeddings, 'tolist'):
-        embeddings_list = embeddings.tolist()
-    elif isinstance(embeddings, list):
-        embeddings_list = embeddings
-    else:
-        embeddings_list = list(embeddings)
+    batch_size = batch_size or len(texts) or 1
+    embeddings_list = []
+    for start in range(0, len(texts), batch_size):
+        if on_batch is not None:
+            on_batch()
+        batch = texts[start:start + batch_size]
+        EMBEDDING_BATCH_SIZE.labels(source="ingestion").observe(len(batch))
+        EMBEDDED_TEXTS.labels(source="ingestion").inc(len(batch))
+        with EMBEDDING_DURATION.labels(source="ingestion").time():
+            embeddings = model.encode(batch, convert_to_numpy=True)
+        # Convert to list properly
+        if hasattr(embeddings, 'tolist'):
+            embeddings_list.extend(embeddings.tolist())
+        else:
+            embeddings_list.extend(list(embeddings))
     return list(zip(chunks, embeddings_list))
 
 class EmbeddingGenerator:
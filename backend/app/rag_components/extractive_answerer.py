@@ -0,0 +1,77 @@
+"""
+Extractive Answerer - Answer factual lookups with a sentence from the retrieved chunks.
+Scores candidate sentences against the question embedding in one batched embedding
+call and one matrix product, so confident lookups skip LLM generation entirely.
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .chunker import Chunk
+from .context_assembler import split_sentences
+
+logger = logging.getLogger(__name__)
+
+_extractive_stats = {
+    "attempts": 0,
+    "hits": 0
+}
+
+
+def extract_best_sentence(
+    question_embedding: List[float],
+    chunks: List[Chunk],
+    embed_texts: Callable[[List[str]], List[List[float]]],
+    threshold: float,
+    max_chunks: int = 3,
+    min_words: int = 5
+) -> Optional[Dict]:
+    """
+    Find the sentence in the top chunks most similar to the question.
+
+    Args:
+        question_embedding: Embedding of the question
+        chunks: Retrieved chunks, most relevant first
+        embed_texts: Embeds a list of texts in one call (same model as the question)
+        threshold: Minimum cosine similarity for the sentence to be used as the answer
+        max_chunks: Number of top chunks to take sentences from
+        min_words: Sentences shorter than this are ignored as fragments
+
+    Returns:
+        Dictionary with text, score and the source chunk, or None if no sentence clears the threshold
+    """
+    _extractive_stats["attempts"] += 1
+
+    candidates = []
+    for chunk in chunks[:max_chunks]:
+        for sentence in split_sentences(chunk.text):
+            if len(sentence.split()) >= min_words:
+                candidates.append((sentence.strip(), chunk))
+    if not candidates:
+        return None
+
+    vectors = np.asarray(embed_texts([text for text, _ in candidates]), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    query = np.asarray(question_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) + 1e-12
+
+    scores = vectors @ query
+    best = int(np.argmax(scores))
+    score = float(scores[best])
+    if score < threshold:
+        logger.info(f"Extractive answer below threshold ({score:.3f} < {threshold}); using generation")
+        return None
+
+    _extractive_stats["hits"] += 1
+    text, chunk = candidates[best]
+    return {"text": text, "score": round(score, 4), "chunk": chunk}
+
+
+def get_extractive_stats() -> Dict:
+    attempts = _extractive_stats["attempts"]
+    return dict(
+        _extractive_stats,
+        hit_rate=round(_extractive_stats["hits"] / attempts, 4) if attempts else 0.0
+    )
@@ -3,28 +3,249 @@ LLM Handler for communicating with external LLM service.
 Handles HTTP requests to the LLM Docker service.
 """
 
+import asyncio
 import httpx
+import json
 import logging
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, AsyncIterator
 from ..core.config import settings
+from ..core.metrics import LLM_EVAL_SECONDS, LLM_REQUEST_DURATION, LLM_TOKENS
+from ..core.tracing import annotate_span
+from .llm_router import BackendSaturatedError, NoBackendAvailableError, get_llm_router, model_for_route
+from .llm_resilience import AttemptSlot, CircuitOpenError, RetryableLLMError, llm_caller
 
 logger = logging.getLogger(__name__)
 
 # HTTP client for reuse
 _http_client = None
 
+# Static instructions sent as Ollama's system field. Keeping them identical on every
+# request gives each prompt the same prefix, so Ollama can reuse its cached KV state.
+RAG_SYSTEM_PROMPT = """You are a helpful assistant that answers questions based on the provided context.
+
+Instructions:
+- Answer the question based solely on the provided context
+- If the context doesn't contain enough information to answer the question, respond with "I don't have enough information in the provided context to answer this question."
+- Be concise and accurate
+- When possible, mention which source(s) your answer comes from"""
+
+# Timing fields Ollama returns with a finished generation (durations in nanoseconds)
+OLLAMA_TIMING_FIELDS = ("load_duration", "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration")
+
+_timing_totals = {field: 0 for field in OLLAMA_TIMING_FIELDS}
+_timing_totals["generations"] = 0
+_preload_task = None
+
+# Phrases that mark an answer as "don't know"
+DONT_KNOW_PATTERNS = [
+    "i don't have enough information",
+    "i cannot answer",
+    "i don't know",
+    "no information provided",
+    "not enough context",
+    "unable to determine",
+    "insufficient information"
+]
+
+# Answers served per model tier, keyed by collection
+_cascade_stats: Dict[str, Dict[str, Any]] = {}
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Build the pooled HTTP client from the LLM_HTTP_* settings."""
+    http2 = settings.LLM_HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("LLM_HTTP2_ENABLED is set but the h2 package is not installed; using HTTP/1.1")
+        http2 = False
+    
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.LLM_HTTP_CONNECT_TIMEOUT_SECONDS,
+            read=settings.LLM_HTTP_READ_TIMEOUT_SECONDS,
+            write=settings.LLM_HTTP_WRITE_TIMEOUT_SECONDS,
+            pool=settings.LLM_HTTP_POOL_TIMEOUT_SECONDS
+        )
+    )
+
 def get_http_client():
     """Get or create HTTP client for LLM service communication."""
     global _http_client
     if _http_client is None:
-        _http_client = httpx.AsyncClient(timeout=30.0)
+        _http_client = _create_http_client()
     return _http_client
 
+async def open_http_client():
+    """Create the pooled HTTP client at application startup."""
+    client = get_http_client()
+    logger.info(
+        f"LLM HTTP client ready (max_connections={settings.LLM_HTTP_MAX_CONNECTIONS}, "
+        f"keepalive={settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS}, http2={settings.LLM_HTTP2_ENABLED})"
+    )
+    return client
+
+def _pool_usage(pool) -> Optional[Dict[str, int]]:
+    """
+    Open, idle and queued counts read from httpcore's pool internals, or None when
+    this httpcore version doesn't expose them the way it did when this was written.
+    """
+    connections = getattr(pool, "connections", None)
+    requests = getattr(pool, "_requests", None)
+    if connections is None or requests is None:
+        return None
+    try:
+        connections = list(connections)
+        idle = sum(1 for conn in connections if conn.is_idle())
+        queued = sum(1 for request in list(requests) if getattr(request, "connection", None) is None)
+    except (AttributeError, TypeError) as e:
+        logger.debug(f"Cannot read LLM HTTP pool usage: {str(e)}")
+        return None
+    return {"open": len(connections), "idle": idle, "queued": queued}
+
+def get_http_pool_stats() -> Dict[str, Any]:
+    """
+    Connection-pool utilisation of the LLM HTTP client. Usage counts come from httpcore
+    internals; if those change, only the configured limits are reported
+    (pool_usage_available is False).
+    
+    Returns:
+        Dictionary with open, active, idle and queued counts and the utilisation ratio
+    """
+    stats = {
+        "client_open": _http_client is not None and not _http_client.is_closed,
+        "http2_enabled": settings.LLM_HTTP2_ENABLED and _http2_available(),
+        "max_connections": settings.LLM_HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "pool_usage_available": False,
+        "open_connections": 0,
+        "active_connections": 0,
+        "idle_connections": 0,
+        "queued_requests": 0,
+        "utilisation": 0.0
+    }
+    # httpcore keeps the pool on the default transport; mocked transports have none
+    pool = getattr(getattr(_http_client, "_transport", None), "_pool", None)
+    usage = _pool_usage(pool) if pool is not None else None
+    if usage is None:
+        return stats
+    
+    stats["pool_usage_available"] = True
+    stats["open_connections"] = usage["open"]
+    stats["idle_connections"] = usage["idle"]
+    stats["active_connections"] = usage["open"] - usage["idle"]
+    stats["queued_requests"] = usage["queued"]
+    stats["utilisation"] = round(stats["active_connections"] / settings.LLM_HTTP_MAX_CONNECTIONS, 4)
+    return stats
+
+def _build_generate_payload(
+    prompt_text: str,
+    max_tokens: int,
+    temperature: float,
+    stop_sequences: Optional[list],
+    stream: bool,
+    model: str,
+    system: Optional[str] = RAG_SYSTEM_PROMPT
+) -> Dict[str, Any]:
+    """Construct the request payload for the Ollama generate API."""
+    payload = {
+        "model": model,
+        "prompt": prompt_text,
+        "options": {
+            "num_predict": max_tokens,
+            "temperature": temperature,
+            "stop": stop_sequences or ["\n\n", "Human:", "Question:"]
+        },
+        "stream": stream,
+        "keep_alive": settings.LLM_KEEP_ALIVE  # Keep the model resident between bursts
+    }
+    if system:
+        payload["system"] = system
+    return payload
+
+def record_llm_timings(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Accumulate the timing fields of a finished Ollama generation.
+    
+    Returns:
+        The timing fields present in result
+    """
+    timings = {field: result[field] for field in OLLAMA_TIMING_FIELDS if field in result}
+    annotate_span(**timings)
+    if timings:
+        _timing_totals["generations"] += 1
+        for field, value in timings.items():
+            _timing_totals[field] += value
+        model = result.get("model", "unknown")
+        for kind, count_field, duration_field in (
+            ("prompt", "prompt_eval_count", "prompt_eval_duration"),
+            ("generated", "eval_count", "eval_duration")
+        ):
+            LLM_TOKENS.labels(model=model, kind=kind).inc(timings.get(count_field, 0))
+            LLM_EVAL_SECONDS.labels(model=model, kind=kind).inc(timings.get(duration_field, 0) / 1e9)
+    return timings
+
+def get_llm_timing_stats() -> Dict[str, Any]:
+    """
+    Aggregate Ollama timings, to measure prompt-prefix cache and keep-alive gains.
+    
+    Returns:
+        Dictionary with totals and per-generation / per-token averages in milliseconds
+    """
+    generations = _timing_totals["generations"]
+    prompt_tokens = _timing_totals["prompt_eval_count"]
+    eval_tokens = _timing_totals["eval_count"]
+    ns_per_ms = 1_000_000
+    return dict(
+        _timing_totals,
+        avg_load_ms=round(_timing_totals["load_duration"] / generations / ns_per_ms, 2) if generations else 0.0,
+        avg_prompt_eval_ms=round(_timing_totals["prompt_eval_duration"] / generations / ns_per_ms, 2) if generations else 0.0,
+        avg_prompt_tokens=round(prompt_tokens / generations, 1) if generations else 0.0,
+        prompt_eval_ms_per_token=round(_timing_totals["prompt_eval_duration"] / prompt_tokens / ns_per_ms, 3) if prompt_tokens else 0.0,
+        eval_tokens_per_second=round(eval_tokens / (_timing_totals["eval_duration"] / 1e9), 2) if _timing_totals["eval_duration"] else 0.0
+    )
+
+async def _post_generate(client: httpx.AsyncClient, payload: Dict[str, Any], slot: AttemptSlot) -> httpx.Response:
+    """
+    One generate attempt against the least loaded healthy backend. A hedge avoids the
+    primary's backend and gives up instead of queueing when no other slot is free.
+    
+    Raises:
+        RetryableLLMError on transport errors, timeouts and 5xx responses
+        NoBackendAvailableError if no backend slot can be had
+    """
+    async with get_llm_router().acquire(avoid=slot.avoid, wait=not slot.is_hedge) as backend:
+        slot.backend = backend
+        url = f"{backend.url}{settings.LLM_COMPLETION_ENDPOINT}"
+        try:
+            response = await client.post(url, json=payload)
+        except httpx.TransportError as e:
+            backend.record_failure()
+            raise RetryableLLMError(f"{backend.url}: {type(e).__name__}") from e
+        if response.status_code >= 500:
+            backend.record_failure()
+            raise RetryableLLMError(f"{backend.url} returned status {response.status_code}")
+        backend.record_success()
+        return response
+
 async def generate_answer_from_context(
     prompt_text: str,
     max_tokens: int = 500,
     temperature: float = 0.7,
-    stop_sequences: Optional[list] = None
+    stop_sequences: Optional[list] = None,
+    route: str = "qa"
 ) -> Optional[str]:
     """
     Generate an answer from the LLM service using the provided context.
@@ -34,31 +255,58 @@ async def generate_answer_from_context(
         max_tokens: Maximum tokens to generate
         temperature: Sampling temperature (0.0 to 1.0)
         stop_sequences: List of stop sequences to end generation
+        route: Route name used to pick the model (see LLM_ROUTE_MODELS)
         
     Returns:
         Generated text or None if error
     """
+    result = await generate_completion(prompt_text, max_tokens, temperature, stop_sequences, model_for_route(route))
+    return result["text"] if result else None
+
+async def generate_completion(
+    prompt_text: str,
+    max_tokens: int,
+    temperature: float,
+    stop_sequences: Optional[list],
+    model: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Run one generation on a specific model.
+    
+    Returns:
+        Dictionary with text, model and Ollama's done_reason ("stop", or "length" when
+        max_tokens cut the answer off), or None if no usable text was generated
+    """
+    started = time.perf_counter()
+    result = await _request_completion(prompt_text, max_tokens, temperature, stop_sequences, model)
+    LLM_REQUEST_DURATION.labels(model=model, outcome="success" if result else "failure").observe(
+        time.perf_counter() - started
+    )
+    return result
+
+async def _request_completion(
+    prompt_text: str,
+    max_tokens: int,
+    temperature: float,
+    stop_sequences: Optional[list],
+    model: str
+) -> Optional[Dict[str, Any]]:
+    """Send one non-streaming generate request and post-process Ollama's response."""
     try:
         client = get_http_client()
         
         # Construct the request payload for Ollama API
-        payload = {
-            "model": "tinyllama",  # We'll use tinyllama model in Ollama
-            "prompt": prompt_text,
-            "options": {
-                "num_predict": max_tokens,
-                "temperature": temperature,
-                "stop": stop_sequences or ["\n\n", "Human:", "Question:"]
-            },
-            "stream": False
-        }
+        payload = _build_generate_payload(
+            prompt_text, max_tokens, temperature, stop_sequences, stream=False, model=model
+        )
         
-        # Make request to LLM service
-        url = f"{settings.LLM_SERVICE_URL}{settings.LLM_COMPLETION_ENDPOINT}"
-        response = await client.post(url, json=payload)
+        # Make request to the least loaded healthy LLM backend, retried/hedged within the deadline
+        router = get_llm_router()
+        response = await llm_caller.call(lambda slot: _post_generate(client, payload, slot), can_hedge=router.can_hedge)
         
         if response.status_code == 200:
             result = response.json()
+            record_llm_timings(result)
             
             # Extract text from Ollama response format
             if "response" in result:
@@ -75,7 +323,7 @@ async def generate_answer_from_context(
                         return None
                     
                     logger.info(f"Successfully generated response of {len(generated_text)} characters")
-                    return generated_text
+                    return {"text": generated_text, "model": model, "done_reason": result.get("done_reason")}
                 else:
                     logger.warning("Empty response from LLM service")
                     return None
@@ -86,19 +334,165 @@ async def generate_answer_from_context(
             logger.error(f"LLM service returned status {response.status_code}: {response.text}")
             return None
             
-    except httpx.TimeoutException:
-        logger.error("Timeout when communicating with LLM service")
+    except CircuitOpenError:
+        logger.error("LLM service circuit is open; skipping generation")
         return None
-    except httpx.ConnectError:
-        logger.error("Could not connect to LLM service")
+    except asyncio.TimeoutError:
+        logger.error(f"LLM request exceeded its {settings.LLM_REQUEST_DEADLINE_SECONDS}s deadline")
+        return None
+    except RetryableLLMError as e:
+        logger.error(f"LLM service failed after retries: {str(e)}")
         return None
     except Exception as e:
         logger.error(f"Error communicating with LLM service: {str(e)}")
         return None
 
+def _cascade_counts() -> Dict[str, Any]:
+    return {"small": 0, "large": 0, "escalations": 0, "escalation_reasons": {}}
+
+async def generate_answer_with_cascade(
+    prompt_text: str,
+    policy: str = "cascade",
+    stats_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Answer with the small model first and escalate to the large model only when the
+    small model's answer is missing, low-confidence or cut off by its token budget.
+    
+    Args:
+        prompt_text: The complete prompt including context and question
+        policy: "cascade", "small_only" or "large_only"
+        stats_key: Key (e.g. collection id) under which tier usage is counted
+        
+    Returns:
+        Dictionary with text (or None), tier ("small"/"large") and escalation_reason (or None)
+    """
+    small = settings.LLM_CASCADE_SMALL_MODEL
+    large = settings.LLM_CASCADE_LARGE_MODEL
+    counts = _cascade_stats.setdefault(str(stats_key), _cascade_counts())
+    reason = None
+    
+    if policy != "large_only":
+        max_tokens = settings.LLM_CASCADE_SMALL_MAX_TOKENS if policy == "cascade" else 500
+        result = await generate_completion(prompt_text, max_tokens, 0.7, None, small)
+        if result is None:
+            reason = "no_answer"
+        elif is_low_confidence_answer(result["text"]):
+            reason = "low_confidence"
+        elif result["done_reason"] == "length":
+            reason = "truncated"
+        
+        if reason is None or policy == "small_only":
+            counts["small"] += 1
+            return {"text": result["text"] if result else None, "tier": "small", "escalation_reason": None}
+        
+        counts["escalations"] += 1
+        counts["escalation_reasons"][reason] = counts["escalation_reasons"].get(reason, 0) + 1
+        logger.info(f"Escalating to '{large}' ({reason})")
+    
+    result = await generate_completion(prompt_text, 500, 0.7, None, large)
+    counts["large"] += 1
+    return {"text": result["text"] if result else None, "tier": "large", "escalation_reason": reason}
+
+def get_cascade_stats() -> Dict[str, Any]:
+    """
+    Fraction of answers served by each model tier, overall and per stats key.
+    """
+    def with_fractions(counts):
+        served = counts["small"] + counts["large"]
+        return dict(
+            counts,
+            small_fraction=round(counts["small"] / served, 4) if served else 0.0,
+            large_fraction=round(counts["large"] / served, 4) if served else 0.0
+        )
+    
+    totals = _cascade_counts()
+    for counts in _cascade_stats.values():
+        for tier in ("small", "large", "escalations"):
+            totals[tier] += counts[tier]
+        for reason, n in counts["escalation_reasons"].items():
+            totals["escalation_reasons"][reason] = totals["escalation_reasons"].get(reason, 0) + n
+    return {
+        "small_model": settings.LLM_CASCADE_SMALL_MODEL,
+        "large_model": settings.LLM_CASCADE_LARGE_MODEL,
+        "overall": with_fractions(totals),
+        "by_collection": {key: with_fractions(counts) for key, counts in _cascade_stats.items()}
+    }
+
+async def stream_answer_from_context(
+    prompt_text: str,
+    max_tokens: int = 500,
+    temperature: float = 0.7,
+    stop_sequences: Optional[list] = None,
+    route: str = "qa"
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream an answer from the LLM service as it is generated.
+    
+    Args:
+        prompt_text: The complete prompt including context and question
+        max_tokens: Maximum tokens to generate
+        temperature: Sampling temperature (0.0 to 1.0)
+        stop_sequences: List of stop sequences to end generation
+        route: Route name used to pick the model (see LLM_ROUTE_MODELS)
+        
+    Yields:
+        Ollama stream objects: {"response": <token text>, "done": False} per token,
+        then a final {"done": True, ...} object carrying Ollama's timing fields.
+        
+    Raises:
+        httpx.HTTPError if the service cannot be reached or returns an error status
+        NoBackendAvailableError if no LLM backend can take the request
+        CircuitOpenError if the LLM circuit breaker is open
+    """
+    if not llm_caller.breaker.allow():
+        raise CircuitOpenError("LLM circuit breaker is open; failing fast")
+    client = get_http_client()
+    payload = _build_generate_payload(
+        prompt_text, max_tokens, temperature, stop_sequences, stream=True, model=model_for_route(route)
+    )
+    
+    try:
+        async with get_llm_router().acquire() as backend:
+            url = f"{backend.url}{settings.LLM_COMPLETION_ENDPOINT}"
+            try:
+                async with client.stream("POST", url, json=payload) as response:
+                    response.raise_for_status()
+                    backend.record_success()
+                    llm_caller.breaker.record_success()
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        try:
+                            part = json.loads(line)
+                        except json.JSONDecodeError:
+                            logger.warning(f"Skipping malformed stream line from LLM service: {line[:100]}")
+                            continue
+                        if part.get("done"):
+                            record_llm_timings(part)
+                        yield part
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if not isinstance(e, httpx.HTTPStatusError) or e.response.status_code >= 500:
+                    backend.record_failure()
+                    llm_caller.breaker.record_failure()
+                else:
+                    llm_caller.breaker.record_success()  # The LLM service answered; the request was bad
+                raise
+    except BackendSaturatedError:
+        llm_caller.breaker.release_trial()  # Overload does not count against the circuit
+        raise
+    except NoBackendAvailableError:
+        llm_caller.breaker.record_failure()
+        raise
+    except (asyncio.CancelledError, GeneratorExit):
+        llm_caller.breaker.release_trial()
+        raise
+
 def construct_rag_prompt(question: str, context_chunks: list, collection_name: str = "") -> str:
     """
-    Construct a RAG prompt with context and question.
+    Construct the per-request part of a RAG prompt: context and question.
+    The static instructions are sent separately as RAG_SYSTEM_PROMPT so every
+    request shares the same prefix.
     
     Args:
         question: The user's question
@@ -125,28 +519,18 @@ def construct_rag_prompt(question: str, context_chunks: list, collection_name: s
     
     # Construct the prompt
     if context_text:
-        collection_info = f" from the '{collection_name}' collection" if collection_name else ""
-        prompt = f"""You are a helpful assistant that answers questions based on the provided context{collection_info}. 
-
-Context:
+        collection_info = f" (from the '{collection_name}' collection)" if collection_name else ""
+        prompt = f"""Context{collection_info}:
 {context_text}
 
 Question: {question}
 
-Instructions:
-- Answer the question based solely on the provided context
-- If the context doesn't contain enough information to answer the question, respond with "I don't have enough information in the provided context to answer this question."
-- Be concise and accurate
-- When possible, mention which source(s) your answer comes from
-
 Answer:"""
     else:
-        prompt = f"""You are a helpful assistant. The user asked a question but no relevant context was found.
+        prompt = f"""No relevant context was found for this question.
 
 Question: {question}
 
-Please respond with: "I don't have enough information to answer this question."
-
 Answer:"""
     
     return prompt
@@ -168,25 +552,48 @@ def extract_answer_with_fallback(generated_text: str) -> str:
     # Clean up the response
     cleaned_text = generated_text.strip()
     
-    # Check for common "I don't know" patterns
-    dont_know_patterns = [
-        "i don't have enough information",
-        "i cannot answer",
-        "i don't know",
-        "no information provided",
-        "not enough context",
-        "unable to determine",
-        "insufficient information"
-    ]
-    
-    if any(pattern in cleaned_text.lower() for pattern in dont_know_patterns):
+    if is_low_confidence_answer(cleaned_text):
         return "I don't have enough information in the provided context to answer this question."
     
+    return cleaned_text
+
+def is_low_confidence_answer(text: str) -> bool:
+    """True if text is a "don't know" answer or too short to contain an answer."""
+    cleaned_text = text.strip().lower()
+    
+    # Check for common "I don't know" patterns
+    if any(pattern in cleaned_text for pattern in DONT_KNOW_PATTERNS):
+        return True
+    
     # If response is very short and doesn't seem to contain an answer
-    if len(cleaned_text) < 20 and not any(word in cleaned_text.lower() for word in ["yes", "no", "true", "false"]):
-        return "I don't have enough information in the provided context to answer this question."
+    return len(cleaned_text) < 20 and not any(word in cleaned_text for word in ["yes", "no", "true", "false"])
+
+async def ping_llm_service():
+    """
+    Cheap liveness probe: list the models each LLM backend has loaded.
+    Unlike a generation request this costs the backends no inference time.
+    Backends that answer are restored to the routing pool; failing ones count
+    towards ejection.
     
-    return cleaned_text
+    Raises:
+        httpx.HTTPError if no backend is reachable and healthy
+    """
+    client = get_http_client()
+    
+    async def ping(backend):
+        try:
+            response = await client.get(f"{backend.url}{settings.LLM_HEALTH_ENDPOINT}")
+            response.raise_for_status()
+        except httpx.HTTPError:
+            backend.record_failure()
+            raise
+        backend.record_success()
+    
+    backends = get_llm_router().backends
+    results = await asyncio.gather(*(ping(backend) for backend in backends), return_exceptions=True)
+    failures = [result for result in results if isinstance(result, Exception)]
+    if len(failures) == len(backends):
+        raise failures[0]
 
 async def health_check_llm_service() -> bool:
     """
@@ -196,30 +603,46 @@ async def health_check_llm_service() -> bool:
         True if service is healthy, False otherwise
     """
     try:
-        client = get_http_client()
-        
-        # Try a simple generation request for Ollama
-        test_payload = {
-            "model": "tinyllama",
-            "prompt": "Hello",
-            "options": {
-                "num_predict": 5,
-                "temperature": 0.1
-            },
-            "stream": False
-        }
-        
-        url = f"{settings.LLM_SERVICE_URL}{settings.LLM_COMPLETION_ENDPOINT}"
-        response = await client.post(url, json=test_payload)
-        
-        return response.status_code == 200
+        await ping_llm_service()
+        return True
         
     except Exception as e:
         logger.error(f"LLM service health check failed: {str(e)}")
         return False
 
+def _preload_models() -> list:
+    """Distinct model names the routes (and the cascade, when enabled) use."""
+    models = {settings.LLM_MODEL_NAME, *settings.LLM_ROUTE_MODELS.values()}
+    if settings.LLM_CASCADE_ENABLED or settings.LLM_CASCADE_COLLECTION_POLICIES:
+        models |= {settings.LLM_CASCADE_SMALL_MODEL, settings.LLM_CASCADE_LARGE_MODEL}
+    return sorted(models)
+
+async def preload_llm_models():
+    """
+    Load every routed model on every backend, so the first user request does not
+    pay the model load time. An empty prompt makes Ollama load the model and return.
+    """
+    client = get_http_client()
+    for backend in get_llm_router().backends:
+        for model in _preload_models():
+            try:
+                response = await client.post(
+                    f"{backend.url}{settings.LLM_COMPLETION_ENDPOINT}",
+                    json={"model": model, "prompt": "", "stream": False, "keep_alive": settings.LLM_KEEP_ALIVE}
+                )
+                response.raise_for_status()
+                logger.info(f"Preloaded model '{model}' on {backend.url}")
+            except Exception as e:
+                logger.warning(f"Could not preload model '{model}' on {backend.url}: {str(e)}")
+
+def start_llm_preload():
+    """Preload models in the background so startup is not blocked on the LLM service."""
+    global _preload_task
+    if settings.LLM_PRELOAD_ON_STARTUP and _preload_task is None:
+        _preload_task = asyncio.create_task(preload_llm_models())
+
 async def close_http_client():
-    """Close the HTTP client if it exists."""
+    """Close the HTTP client if it exists, draining its pooled connections."""
     global _http_client
     if _http_client:
         await _http_client.aclose()
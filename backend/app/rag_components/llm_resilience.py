@@ -0,0 +1,271 @@
+"""
+LLM Resilience - Deadlines, budgeted retries, hedging and circuit breaking for LLM calls.
+Keeps one slow or failing backend from turning every request into a long wait
+for an apology, and stops timeouts from piling up while the LLM is down.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from ..core.config import settings
+from .llm_router import BackendSaturatedError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RetryableLLMError(Exception):
+    """A failed attempt worth retrying (transport error, timeout or 5xx)."""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failed calls and fails fast for
+    reset_seconds. After that one trial call is let through per window (half-open);
+    its success closes the circuit, its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return False
+        # Let one trial through and restart the window for everyone else
+        self.state = "half_open"
+        self.opened_at = time.monotonic()
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning(f"LLM circuit breaker opened after {self.consecutive_failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """A half-open trial ended without an outcome (cancelled); let the next call try at once."""
+        if self.state == "half_open":
+            self.state = "open"
+            self.opened_at = time.monotonic() - self.reset_seconds
+
+
+class RetryBudget:
+    """Token bucket capping retries to a fraction of request volume."""
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def record_request(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies."""
+
+    def __init__(self, window: int = 500):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class AttemptSlot:
+    """
+    Passed to each attempt: the attempt records the backend serving it in backend;
+    a hedge gets the primary's backend in avoid and must not queue for a slot.
+    """
+
+    def __init__(self, avoid: Any = None):
+        self.avoid = avoid
+        self.backend = None
+
+    @property
+    def is_hedge(self) -> bool:
+        return self.avoid is not None
+
+
+class ResilientCaller:
+    """Runs LLM attempts under a deadline with retries, hedging and a circuit breaker."""
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_SECONDS)
+        self.budget = RetryBudget(settings.LLM_RETRY_BUDGET_RATIO, settings.LLM_RETRY_BUDGET_MAX_TOKENS)
+        self.latencies = LatencyTracker()
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "retries": 0,
+            "retries_denied_by_budget": 0,
+            "deadline_exceeded": 0,
+            "short_circuited": 0,
+            "saturated": 0,
+            "hedges": 0,
+            "hedge_wins": 0
+        }
+
+    def _hedge_delay(self) -> Optional[float]:
+        """p95 latency once enough samples exist; None disables hedging."""
+        if not settings.LLM_HEDGE_ENABLED or len(self.latencies.samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return self.latencies.percentile(95)
+
+    async def _hedged(
+        self, attempt: Callable[[AttemptSlot], Awaitable[T]], can_hedge: Callable[[Any], bool]
+    ) -> T:
+        """
+        Run attempt, duplicating it on another backend once it runs past p95 latency;
+        first success wins. No hedge is sent while the primary is still waiting for a
+        backend slot or when no other backend has a free one.
+        """
+        started = time.monotonic()
+        slot = AttemptSlot()
+        primary = asyncio.ensure_future(attempt(slot))
+        tasks = [primary]
+        try:
+            delay = self._hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and slot.backend is not None and can_hedge(slot.backend):
+                    self.stats["hedges"] += 1
+                    tasks.append(asyncio.ensure_future(attempt(AttemptSlot(avoid=slot.backend))))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        self.latencies.record(time.monotonic() - started)
+                        return task.result()
+                    if task is primary or error is None:
+                        error = task.exception()  # The primary's failure, not a hedge's, is reported
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call(
+        self, attempt: Callable[[AttemptSlot], Awaitable[T]], can_hedge: Callable[[Any], bool] = lambda avoid: False
+    ) -> T:
+        """
+        Run attempt until it succeeds, the retry budget or attempt limit is spent,
+        or the per-request deadline passes. Every outcome is recorded on the circuit
+        breaker, so a half-open trial always closes or re-opens it.
+
+        Args:
+            attempt: Coroutine factory for one LLM call, given an AttemptSlot;
+                raises RetryableLLMError on retryable failure
+            can_hedge: Whether a duplicate attempt can go to a backend other than the given one right now
+
+        Raises:
+            CircuitOpenError if the circuit is open
+            RetryableLLMError from the last attempt if retries are exhausted
+            asyncio.TimeoutError if the deadline passes
+        """
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open; failing fast")
+
+        self.stats["calls"] += 1
+        self.budget.record_request()
+        deadline = time.monotonic() + settings.LLM_REQUEST_DEADLINE_SECONDS
+        attempts = 0
+
+        try:
+            while True:
+                attempts += 1
+                try:
+                    result = await asyncio.wait_for(self._hedged(attempt, can_hedge), timeout=deadline - time.monotonic())
+                    self.breaker.record_success()
+                    return result
+                except asyncio.TimeoutError:
+                    self.stats["deadline_exceeded"] += 1
+                    self._fail()
+                    raise
+                except RetryableLLMError as e:
+                    backoff = random.uniform(0, settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** (attempts - 1)))
+                    if attempts >= settings.LLM_RETRY_MAX_ATTEMPTS or time.monotonic() + backoff >= deadline:
+                        self._fail()
+                        raise
+                    if not self.budget.try_spend():
+                        self.stats["retries_denied_by_budget"] += 1
+                        self._fail()
+                        raise
+                    self.stats["retries"] += 1
+                    logger.warning(f"LLM attempt {attempts} failed ({str(e)}); retrying in {backoff:.2f}s")
+                    await asyncio.sleep(backoff)
+                except BackendSaturatedError:
+                    # Every healthy backend is busy: overload, which must not open the circuit
+                    self.stats["saturated"] += 1
+                    self.breaker.release_trial()
+                    raise
+                except Exception:
+                    # Not retryable (all backends ejected, malformed request, ...) but still a failed call
+                    self._fail()
+                    raise
+        except asyncio.CancelledError:
+            # The caller went away; no outcome to record, but don't leave a trial hanging
+            self.breaker.release_trial()
+            raise
+
+    def _fail(self):
+        self.stats["failures"] += 1
+        self.breaker.record_failure()
+
+    def get_stats(self) -> Dict:
+        p95 = self.latencies.percentile(95)
+        return dict(
+            self.stats,
+            circuit_state=self.breaker.state,
+            circuit_times_opened=self.breaker.times_opened,
+            retry_budget_tokens=round(self.budget.tokens, 2),
+            latency_p95_ms=round(p95 * 1000, 1) if p95 is not None else None,
+            hedge_delay_ms=round(self._hedge_delay() * 1000, 1) if self._hedge_delay() is not None else None
+        )
+
+
+llm_caller = ResilientCaller()
+
+
+def get_llm_resilience_stats() -> Dict:
+    return llm_caller.get_stats()
@@ -0,0 +1,189 @@
+"""
+LLM Router - Load balancing across a pool of LLM service backends.
+Routes each generation to the healthy backend with the fewest outstanding requests,
+caps concurrency per backend and temporarily ejects backends that keep failing.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class NoBackendAvailableError(Exception):
+    """Raised when no LLM backend can take a request."""
+
+
+class BackendSaturatedError(NoBackendAvailableError):
+    """Raised when healthy backends exist but none had a free slot in time (overload, not failure)."""
+
+
+class LLMBackend:
+    """One LLM service endpoint and its load/health bookkeeping."""
+
+    def __init__(self, url: str, max_concurrency: int):
+        self.url = url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def is_ejected(self) -> bool:
+        return time.monotonic() < self.ejected_until
+
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.max_concurrency
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= settings.LLM_BACKEND_EJECT_AFTER_FAILURES:
+            self.ejected_until = time.monotonic() + settings.LLM_BACKEND_EJECT_SECONDS
+            logger.warning(
+                f"Ejecting LLM backend {self.url} for {settings.LLM_BACKEND_EJECT_SECONDS}s "
+                f"after {self.consecutive_failures} consecutive failures"
+            )
+
+    def get_stats(self) -> Dict:
+        return {
+            "url": self.url,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "ejected": self.is_ejected(),
+            "consecutive_failures": self.consecutive_failures,
+            "requests": self.requests,
+            "failures": self.failures
+        }
+
+
+class LLMRouter:
+    """
+    Least-outstanding-requests router over a fixed pool of backends. Requests that find
+    every backend at its cap wait in FIFO order and are woken one at a time as slots free up.
+    """
+
+    def __init__(self, urls: List[str], max_concurrency: int):
+        self.backends = [LLMBackend(url, max_concurrency) for url in urls]
+        self._waiters = deque()
+
+    def _wake_next(self):
+        """Hand a freed slot to the longest-waiting request."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _pick(self, avoid: Optional[LLMBackend] = None) -> Optional[LLMBackend]:
+        candidates = [
+            b for b in self.backends if b is not avoid and not b.is_ejected() and b.has_capacity()
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: b.in_flight)
+
+    def can_hedge(self, avoid: LLMBackend) -> bool:
+        """A duplicate of a request running on avoid can go to another healthy backend with a free slot."""
+        return self._pick(avoid) is not None
+
+    @asynccontextmanager
+    async def acquire(self, avoid: Optional[LLMBackend] = None, wait: bool = True) -> AsyncIterator[LLMBackend]:
+        """
+        Reserve a slot on the least loaded healthy backend for the duration of the block.
+        Waits up to LLM_BACKEND_QUEUE_TIMEOUT_SECONDS while every healthy backend is at
+        its concurrency cap.
+
+        Args:
+            avoid: Backend not to use, e.g. the one a hedged request's primary runs on
+            wait: Whether to wait for a free slot or fail at once
+
+        Raises:
+            NoBackendAvailableError if every backend is ejected
+            BackendSaturatedError if no slot frees up in time
+        """
+        deadline = time.monotonic() + settings.LLM_BACKEND_QUEUE_TIMEOUT_SECONDS
+        # Don't overtake requests already queued for a slot
+        backend = None if wait and self._waiters else self._pick(avoid)
+        queued = False
+        while backend is None:
+            if all(b.is_ejected() for b in self.backends if b is not avoid):
+                raise NoBackendAvailableError("All LLM backends are ejected as unhealthy")
+            remaining = deadline - time.monotonic()
+            if not wait or remaining <= 0:
+                raise BackendSaturatedError("Timed out waiting for a free LLM backend slot")
+            waiter = asyncio.get_running_loop().create_future()
+            # A woken request that still finds no slot keeps its place at the head of the queue
+            if queued:
+                self._waiters.appendleft(waiter)
+            else:
+                self._waiters.append(waiter)
+            queued = True
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                if waiter.done():
+                    self._wake_next()  # Pass on the slot this request was woken for
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            backend = self._pick(avoid)
+            if backend is None and waiter.done() and time.monotonic() >= deadline:
+                self._wake_next()  # Giving up; pass on the slot this request was woken for
+
+        backend.in_flight += 1
+        backend.requests += 1
+        if queued and self._pick() is not None:
+            self._wake_next()  # More than one slot freed up
+        try:
+            yield backend
+        finally:
+            backend.in_flight -= 1
+            self._wake_next()
+
+    def get_stats(self) -> Dict:
+        return {
+            "backends": [b.get_stats() for b in self.backends],
+            "healthy_backends": sum(1 for b in self.backends if not b.is_ejected()),
+            "in_flight": sum(b.in_flight for b in self.backends)
+        }
+
+
+def configured_backend_urls() -> List[str]:
+    """LLM_BACKEND_URLS, or the single LLM_SERVICE_URL when no pool is configured."""
+    return list(settings.LLM_BACKEND_URLS) or [settings.LLM_SERVICE_URL]
+
+
+def model_for_route(route: str) -> str:
+    """Model name for a route, falling back to LLM_MODEL_NAME."""
+    return settings.LLM_ROUTE_MODELS.get(route, settings.LLM_MODEL_NAME)
+
+
+_llm_router: Optional[LLMRouter] = None
+
+
+def get_llm_router() -> LLMRouter:
+    """Get or create the process-wide router from settings."""
+    global _llm_router
+    if _llm_router is None:
+        _llm_router = LLMRouter(configured_backend_urls(), settings.LLM_BACKEND_MAX_CONCURRENCY)
+        logger.info(f"LLM router initialized with backends: {configured_backend_urls()}")
+    return _llm_router
+
+
+def get_llm_router_stats() -> Dict:
+    return get_llm_router().get_stats()
@@ -5,8 +5,9 @@ Handles all vector database operations including storage, retrieval, and deletio
 
 import chromadb
 from typing import List, Tuple, Optional, Dict, Any
-from .chunker import Chunk
+from .chunker import Chunk, estimate_token_count
 from ..core.config import settings
+from ..core.metrics import VECTOR_SEARCH_DURATION
 import logging
 import os
 import json
@@ -16,6 +17,105 @@ logger = logging.getLogger(__name__)
 # Global client instance for reuse
 _chroma_client = None
 
+# Version 1 (legacy): page_numbers as a JSON string, collection_id as a string.
+# Version 2: page span as native integer first_page/last_page, integer filter keys.
+METADATA_SCHEMA_VERSION = 2
+
+def _metadata_id(value):
+    """Store numeric ids as integers so every filter key has a single type."""
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+def encode_chunk_metadata(chunk: Chunk) -> Dict[str, Any]:
+    """Convert a Chunk's metadata into the typed ChromaDB metadata schema."""
+    pages = chunk.page_numbers or []
+    metadata = {
+        "schema_version": METADATA_SCHEMA_VERSION,
+        "article_title": chunk.article_title,
+        "source_pdf": chunk.source_pdf_filename,
+        "first_page": min(pages) if pages else 0,
+        "last_page": max(pages) if pages else 0,
+        "collection_id": _metadata_id(chunk.collection_id),
+        "pdf_db_id": chunk.pdf_db_id,
+        "chunk_sequence_id": chunk.chunk_sequence_id,
+        "token_count": chunk.token_count if chunk.token_count is not None else estimate_token_count(chunk.text)
+    }
+    if chunk.word_offset is not None:
+        metadata["word_offset"] = chunk.word_offset
+    return metadata
+
+def collection_id_filter(collection_id) -> Dict[str, Any]:
+    """
+    Build a where-filter on collection_id.
+    While VECTOR_METADATA_LEGACY_COMPAT is on, rows not yet migrated
+    (collection_id stored as a string) are matched as well.
+    """
+    key = _metadata_id(str(collection_id))
+    if settings.VECTOR_METADATA_LEGACY_COMPAT and isinstance(key, int):
+        return {"$or": [{"collection_id": key}, {"collection_id": str(key)}]}
+    return {"collection_id": key}
+
+def _parse_legacy_page_numbers(page_numbers_str) -> List[int]:
+    """Parse the version 1 page_numbers string (JSON, or Python literal for older rows)."""
+    try:
+        page_numbers = json.loads(page_numbers_str)
+    except (json.JSONDecodeError, ValueError, TypeError):
+        try:
+            import ast
+            page_numbers = ast.literal_eval(page_numbers_str)
+        except (ValueError, SyntaxError):
+            return []
+    return page_numbers if isinstance(page_numbers, list) else []
+
+def _page_span(metadata: Dict[str, Any]) -> List[int]:
+    if metadata.get("schema_version") == METADATA_SCHEMA_VERSION:
+        first_page = metadata.get("first_page", 0)
+        if not first_page:
+            return []
+        return list(range(first_page, metadata.get("last_page", first_page) + 1))
+    return _parse_legacy_page_numbers(metadata.get("page_numbers", "[]"))
+
+def decode_chunk_results(
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[Dict[str, Any]]
+) -> List[Chunk]:
+    """
+    Build Chunk objects column-wise from ChromaDB result lists.
+    Typed (version 2) rows need no string parsing, and values coming from our
+    own schema are trusted, so pydantic validation is skipped.
+    """
+    return [
+        Chunk.model_construct(
+            id=chunk_id,
+            text=document,
+            article_title=metadata.get('article_title', ''),
+            source_pdf_filename=metadata.get('source_pdf', ''),
+            page_numbers=_page_span(metadata),
+            chunk_sequence_id=metadata.get('chunk_sequence_id', 0),
+            collection_id=str(metadata.get('collection_id', '')),
+            pdf_db_id=metadata.get('pdf_db_id', 0),
+            token_count=metadata.get('token_count'),
+            word_offset=metadata.get('word_offset')
+        )
+        for chunk_id, document, metadata in zip(ids, documents, metadatas)
+    ]
+
+def upgrade_chunk_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the fields needed to bring a legacy metadata dict to the current schema.
+    Setting page_numbers to None removes the legacy key on update.
+    """
+    pages = _parse_legacy_page_numbers(metadata.get("page_numbers", "[]"))
+    return {
+        "schema_version": METADATA_SCHEMA_VERSION,
+        "first_page": min(pages) if pages else 0,
+        "last_page": max(pages) if pages else 0,
+        "collection_id": _metadata_id(metadata.get("collection_id", "")),
+        "page_numbers": None
+    }
+
 def initialize_vector_store():
     """
     Initialize and return a ChromaDB HTTP client.
@@ -54,6 +154,17 @@ def get_or_create_collection(collection_name: str):
         logger.error(f"Failed to get/create collection {collection_name}: {str(e)}")
         raise
 
+def get_existing_collection(collection_name: str):
+    """
+    Get a ChromaDB collection that must already exist.
+    Uses pre-computed embeddings (embedding_function=None).
+    
+    Raises:
+        Exception if the collection does not exist
+    """
+    client = initialize_vector_store()
+    return client.get_collection(name=collection_name, embedding_function=None)
+
 def add_chunks_to_vector_store(
     chroma_collection_name: str,
     chunks_with_embeddings: List[Tuple[Chunk, List[float]]]
@@ -81,17 +192,7 @@ def add_chunks_to_vector_store(
             documents.append(chunk.text)
             embeddings.append(embedding)
             
-            # Convert chunk metadata to ChromaDB-compatible format
-            # Use JSON serialization for complex data structures
-            metadata = {
-                "article_title": chunk.article_title,
-                "source_pdf": chunk.source_pdf_filename,
-                "page_numbers": json.dumps(chunk.page_numbers),  # Better serialization
-                "collection_id": chunk.collection_id,
-                "pdf_db_id": chunk.pdf_db_id,
-                "chunk_sequence_id": chunk.chunk_sequence_id
-            }
-            metadatas.append(metadata)
+            metadatas.append(encode_chunk_metadata(chunk))
             ids.append(chunk.id)
         
         # Add to collection with better error handling
@@ -126,62 +227,122 @@ def search_relevant_chunks(
     Returns:
         List of Chunk objects reconstructed from search results
     """
+    return search_relevant_chunks_batch(
+        chroma_collection_name, [query_embedding], top_k, filter_collection_id
+    )[0]
+
+def search_relevant_chunks_batch(
+    chroma_collection_name: str,
+    query_embeddings: List[List[float]],
+    top_k: int = 5,
+    filter_collection_id: Optional[str] = None
+) -> List[List[Chunk]]:
+    """
+    Search for several query embeddings that share a filter in a single ChromaDB query.
+    
+    Args:
+        chroma_collection_name: Name of the ChromaDB collection
+        query_embeddings: Query embedding vectors
+        top_k: Number of results to return per query
+        filter_collection_id: Optional filter by collection_id metadata
+        
+    Returns:
+        One list of Chunk objects per query embedding, in input order
+    """
+    return [
+        [chunk for chunk, _ in scored]
+        for scored in search_scored_chunks_batch(chroma_collection_name, query_embeddings, top_k, filter_collection_id)
+    ]
+
+def search_scored_chunks_batch(
+    chroma_collection_name: str,
+    query_embeddings: List[List[float]],
+    top_k: int = 5,
+    filter_collection_id: Optional[str] = None
+) -> List[List[Tuple[Chunk, float]]]:
+    """
+    Like search_relevant_chunks_batch, but keeps each chunk's distance to its query,
+    so results of separate searches can be merged by relevance.
+    
+    Returns:
+        One list of (Chunk, distance) pairs per query embedding, nearest first
+    """
     try:
         collection = get_or_create_collection(chroma_collection_name)
         
         # Construct filter if provided
         where_filter = None
         if filter_collection_id:
-            where_filter = {"collection_id": filter_collection_id}
+            where_filter = collection_id_filter(filter_collection_id)
         
         # Perform vector search
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
-            where=where_filter
-        )
+        with VECTOR_SEARCH_DURATION.time():
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=top_k,
+                where=where_filter
+            )
         
         # Convert results back to Chunk objects
-        chunks = []
-        if results['documents'] and results['documents'][0]:
-            for i in range(len(results['documents'][0])):
-                metadata = results['metadatas'][0][i]
-                
-                # Convert page_numbers back from JSON string to list (safe parsing)
-                try:
-                    page_numbers_str = metadata.get('page_numbers', '[]')
-                    # Use json.loads for proper JSON parsing
-                    page_numbers = json.loads(page_numbers_str)
-                    if not isinstance(page_numbers, list):
-                        page_numbers = []
-                except (json.JSONDecodeError, ValueError):
-                    # Fallback for old format using ast.literal_eval
-                    try:
-                        import ast
-                        page_numbers = ast.literal_eval(page_numbers_str)
-                        if not isinstance(page_numbers, list):
-                            page_numbers = []
-                    except (ValueError, SyntaxError):
-                        page_numbers = []
-                
-                chunk = Chunk(
-                    id=results['ids'][0][i],
-                    text=results['documents'][0][i],
-                    article_title=metadata.get('article_title', ''),
-                    source_pdf_filename=metadata.get('source_pdf', ''),
-                    page_numbers=page_numbers,
-                    chunk_sequence_id=metadata.get('chunk_sequence_id', 0),
-                    collection_id=metadata.get('collection_id', ''),
-                    pdf_db_id=metadata.get('pdf_db_id', 0)
+        batches = []
+        distances = results.get('distances')
+        for i in range(len(query_embeddings)):
+            scored = []
+            if results['documents'] and results['documents'][i]:
+                chunks = decode_chunk_results(
+                    results['ids'][i],
+                    results['documents'][i],
+                    results['metadatas'][i]
                 )
-                chunks.append(chunk)
+                row_distances = distances[i] if distances else [0.0] * len(chunks)
+                scored = list(zip(chunks, row_distances))
+            batches.append(scored)
         
-        logger.info(f"Found {len(chunks)} relevant chunks in collection '{chroma_collection_name}'")
-        return chunks
+        logger.info(
+            f"Found {sum(len(chunks) for chunks in batches)} relevant chunks for "
+            f"{len(query_embeddings)} queries in collection '{chroma_collection_name}'"
+        )
+        return batches
         
     except Exception as e:
         logger.error(f"Error searching chunks: {str(e)}")
-        return []
+        return [[] for _ in query_embeddings]
+
+def iter_collection_rows(
+    chroma_collection_name: str,
+    filter_collection_id: str,
+    include: List[str],
+    batch_size: int = 500
+):
+    """
+    Page through the stored rows of one collection's chunks.
+    
+    Yields:
+        ChromaDB get() results with ids and the included fields, at most batch_size rows each
+    """
+    collection = get_or_create_collection(chroma_collection_name)
+    where_filter = collection_id_filter(filter_collection_id)
+    offset = 0
+    while True:
+        batch = collection.get(where=where_filter, limit=batch_size, offset=offset, include=include)
+        if not batch["ids"]:
+            return
+        yield batch
+        offset += len(batch["ids"])
+
+def iter_collection_embeddings(
+    chroma_collection_name: str,
+    filter_collection_id: str,
+    batch_size: int = 500
+):
+    """
+    Page through the embeddings of one collection's chunks.
+    
+    Yields:
+        Lists of embedding vectors, at most batch_size per list
+    """
+    for batch in iter_collection_rows(chroma_collection_name, filter_collection_id, ["embeddings"], batch_size):
+        yield batch["embeddings"]
 
 def delete_collection_data_from_vector_store(
     chroma_collection_name: str,
@@ -198,7 +359,7 @@ def delete_collection_data_from_vector_store(
         collection = get_or_create_collection(chroma_collection_name)
         
         # Delete items matching the collection_id metadata
-        collection.delete(where={"collection_id": filter_collection_id})
+        collection.delete(where=collection_id_filter(filter_collection_id))
         
         logger.info(f"Deleted chunks with collection_id '{filter_collection_id}' from collection '{chroma_collection_name}'")
         
@@ -255,3 +416,60 @@ def get_collection_stats(chroma_collection_name: str) -> Dict[str, Any]:
             "total_chunks": 0, 
             "error": str(e)
         }
+
+def migrate_metadata_schema(
+    chroma_collection_name: str,
+    batch_size: int = 500
+) -> Dict[str, Any]:
+    """
+    Rewrite legacy chunk metadata in place to the current typed schema.
+    Pages through the collection in batches; rows already migrated are skipped,
+    so the migration can be re-run safely.
+    
+    Args:
+        chroma_collection_name: Name of the ChromaDB collection
+        batch_size: Rows read and updated per ChromaDB call
+        
+    Returns:
+        Dictionary with migration results
+    """
+    try:
+        collection = get_or_create_collection(chroma_collection_name)
+        total = collection.count()
+        scanned = 0
+        migrated = 0
+        
+        # Updates only touch metadata, so offsets stay stable while paging
+        for offset in range(0, total, batch_size):
+            batch = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+            if not batch["ids"]:
+                break
+            
+            ids = []
+            metadatas = []
+            for chunk_id, metadata in zip(batch["ids"], batch["metadatas"]):
+                if metadata.get("schema_version") != METADATA_SCHEMA_VERSION:
+                    ids.append(chunk_id)
+                    metadatas.append(upgrade_chunk_metadata(metadata))
+            
+            if ids:
+                collection.update(ids=ids, metadatas=metadatas)
+            
+            scanned += len(batch["ids"])
+            migrated += len(ids)
+            logger.info(f"Metadata migration: scanned {scanned}/{total}, migrated {migrated}")
+        
+        return {
+            "success": True,
+            "collection_name": chroma_collection_name,
+            "scanned": scanned,
+            "migrated": migrated
+        }
+        
+    except Exception as e:
+        logger.error(f"Error migrating metadata schema: {str(e)}")
+        return {
+            "success": False,
+            "collection_name": chroma_collection_name,
+            "error": str(e)
+        }
@@ -19,6 +19,12 @@ from ..rag_components.vector_store_interface import (
 from ..rag_components.chunker import chunk_text
 from ..rag_components.embedder import generate_embeddings_for_chunks
 from ..services.pdf_ingestion_service import extract_text_from_pdf
+from ..services.collection_stats_service import record_pdf_indexed
+from ..services.collection_routing_service import (
+    rebuild_collection_centroids,
+    reset_collection_centroid,
+    update_collection_centroid
+)
 from ..core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -71,6 +77,14 @@ async def reindex_collection(db: Session, collection_id: int) -> Dict:
         processed_pdfs = 0
         errors = []
         
+        # The collection's chunks were cleared; PDFs that fail below stay at zero.
+        # Committed now and per PDF below, so uploads and ingestion workers don't wait
+        # on the stats and centroid row locks for the whole reindex.
+        for pdf in pdfs:
+            record_pdf_indexed(db, pdf, [])
+        reset_collection_centroid(db, collection_id)
+        db.commit()
+        
         # Step 4: Re-process each PDF
         for pdf in pdfs:
             try:
@@ -106,12 +120,16 @@ async def reindex_collection(db: Session, collection_id: int) -> Dict:
                     chunks_with_embeddings=chunks_with_embeddings
                 )
                 
+                update_collection_centroid(db, collection_id, [embedding for _, embedding in chunks_with_embeddings])
+                record_pdf_indexed(db, pdf, chunks)
+                db.commit()
                 total_chunks += len(chunks)
                 processed_pdfs += 1
                 
                 logger.info(f"Successfully re-processed {pdf.filename}: {len(chunks)} chunks")
                 
             except Exception as e:
+                db.rollback()
                 error_msg = f"Error processing {pdf.filename}: {str(e)}"
                 logger.error(error_msg)
                 errors.append(error_msg)
@@ -173,6 +191,9 @@ async def reindex_single_pdf(db: Session, pdf_id: int) -> Dict:
             pdf_db_id=pdf_id
         )
         
+        record_pdf_indexed(db, pdf, [])
+        db.commit()
+        
         # Re-process the PDF
         text_content, page_info = extract_text_from_pdf(pdf.file_path)
         
@@ -205,10 +226,17 @@ async def reindex_single_pdf(db: Session, pdf_id: int) -> Dict:
             chunks_with_embeddings=chunks_with_embeddings
         )
         
-        # Update PDF timestamp
+        record_pdf_indexed(db, pdf, chunks)
+        
+        # Update PDF and collection timestamps (the latter invalidates cached answers)
         pdf.updated_at = datetime.utcnow()
+        if pdf.collection is not None:
+            pdf.collection.updated_at = pdf.updated_at
         db.commit()
         
+        # The running mean cannot subtract the PDF's old embeddings; recompute it
+        rebuild_collection_centroids(db, [pdf.collection_id])
+        
         logger.info(f"Successfully re-indexed PDF {pdf.filename}: {len(chunks)} chunks")
         
         return {
@@ -316,6 +344,14 @@ async def reindex_collection_batch(db: Session, collection_id: int, batch_size:
         processed_pdfs = 0
         errors = []
         
+        # The collection's chunks were cleared; PDFs that fail below stay at zero.
+        # Committed now and per PDF below, so uploads and ingestion workers don't wait
+        # on the stats and centroid row locks for the whole reindex.
+        for pdf in pdfs:
+            record_pdf_indexed(db, pdf, [])
+        reset_collection_centroid(db, collection_id)
+        db.commit()
+        
         logger.info(f"Processing {total_pdfs} PDFs in batches of {batch_size}")
         
         # Step 4: Process PDFs in batches
@@ -394,12 +430,16 @@ async def reindex_collection_batch(db: Session, collection_id: int, batch_size:
                         batch_errors.append(error_msg)
                         continue
                     
+                    update_collection_centroid(db, collection_id, [embedding for _, embedding in chunks_with_embeddings])
+                    record_pdf_indexed(db, pdf, chunks)
+                    db.commit()
                     batch_chunks += len(chunks)
                     processed_pdfs += 1
                     
                     logger.info(f"Successfully processed {pdf.filename}: {len(chunks)} chunks")
                     
                 except Exception as e:
+                    db.rollback()
                     error_msg = f"Unexpected error processing {pdf.filename}: {str(e)}"
                     logger.error(error_msg)
                     batch_errors.append(error_msg)
@@ -0,0 +1,187 @@
+"""
+Answer Cache Service - Two-tier cache for generated answers
+The exact tier matches the normalized question text; the semantic tier matches
+paraphrases by cosine similarity between question embeddings. Entries are
+scoped to a collection generation (the collection's updated_at), so any
+content change in the collection invalidates its cached answers.
+"""
+
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.metrics import ANSWER_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question_text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    normalized = re.sub(r"\s+", " ", question_text.strip().lower())
+    return normalized.rstrip("?!. ")
+
+
+class _CollectionCache:
+    """Cached answers for a single collection at a single generation."""
+
+    def __init__(self, generation: str):
+        self.generation = generation
+        self.entries: "OrderedDict[tuple, Dict]" = OrderedDict()  # LRU order
+        self.keys: List[tuple] = []          # Row i of vectors belongs to keys[i]
+        self.vectors: Optional[np.ndarray] = None
+
+
+class AnswerCache:
+    """
+    Process-local two-tier answer cache keyed per collection (or per tuple of
+    collection ids, for answers drawn from several collections).
+    """
+
+    def __init__(self):
+        self._collections: Dict[int, _CollectionCache] = {}
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidations": 0,
+            "llm_seconds_saved": 0.0
+        }
+
+    def _get(self, collection_id: int, generation: str) -> Optional[_CollectionCache]:
+        cache = self._collections.get(collection_id)
+        if cache is not None and cache.generation != generation:
+            # The collection changed since these answers were generated
+            self.invalidate(collection_id)
+            return None
+        return cache
+
+    def _expired(self, entry: Dict) -> bool:
+        return time.time() - entry["stored_at"] > settings.ANSWER_CACHE_TTL_SECONDS
+
+    def _hit(self, cache: _CollectionCache, key: tuple, tier: str) -> Dict:
+        entry = cache.entries[key]
+        cache.entries.move_to_end(key)
+        self.stats[f"{tier}_hits"] += 1
+        ANSWER_CACHE_LOOKUPS.labels(result=tier).inc()
+        self.stats["llm_seconds_saved"] += entry["generation_seconds"]
+        return dict(entry["payload"], cache_hit=tier)
+
+    def _miss(self):
+        self.stats["misses"] += 1
+        ANSWER_CACHE_LOOKUPS.labels(result="miss").inc()
+
+    def lookup_exact(self, collection_id: int, generation: str, question_text: str, top_k: int) -> Optional[Dict]:
+        """Return a cached answer for the same normalized question, or None."""
+        cache = self._get(collection_id, generation)
+        key = (normalize_question(question_text), top_k)
+        if cache is None or key not in cache.entries or self._expired(cache.entries[key]):
+            return None
+        return self._hit(cache, key, "exact")
+
+    def lookup_semantic(self, collection_id: int, generation: str, question_embedding, top_k: int) -> Optional[Dict]:
+        """Return the cached answer of the most similar earlier question above the threshold, or None."""
+        cache = self._get(collection_id, generation)
+        if cache is None or cache.vectors is None or not cache.keys:
+            self._miss()
+            return None
+
+        query = np.asarray(question_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            self._miss()
+            return None
+
+        similarities = cache.vectors @ (query / norm)
+        # Only consider live entries asked with the same top_k, so an expired best match
+        # doesn't hide a slightly less similar one that is still valid
+        candidates = [
+            i for i, key in enumerate(cache.keys)
+            if key[1] == top_k and not self._expired(cache.entries[key])
+        ]
+        if candidates:
+            best = max(candidates, key=lambda i: similarities[i])
+            if similarities[best] >= settings.ANSWER_CACHE_SIMILARITY_THRESHOLD:
+                return self._hit(cache, cache.keys[best], "semantic")
+
+        self._miss()
+        return None
+
+    def store(
+        self,
+        collection_id: int,
+        generation: str,
+        question_text: str,
+        question_embedding,
+        top_k: int,
+        payload: Dict,
+        generation_seconds: float
+    ):
+        """Cache an answer payload (answer, sources, sources_count)."""
+        cache = self._get(collection_id, generation)
+        if cache is None:
+            cache = self._collections[collection_id] = _CollectionCache(generation)
+
+        key = (normalize_question(question_text), top_k)
+        if key in cache.entries:
+            self._remove(cache, key)
+
+        cache.entries[key] = {
+            "payload": payload,
+            "generation_seconds": generation_seconds,
+            "stored_at": time.time()
+        }
+        if question_embedding is not None:
+            vector = np.asarray(question_embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = (vector / norm)[np.newaxis, :]
+                cache.vectors = vector if cache.vectors is None else np.vstack([cache.vectors, vector])
+                cache.keys.append(key)
+
+        while len(cache.entries) > settings.ANSWER_CACHE_MAX_ENTRIES_PER_COLLECTION:
+            self._remove(cache, next(iter(cache.entries)))
+        self.stats["stores"] += 1
+
+    def _remove(self, cache: _CollectionCache, key: tuple):
+        cache.entries.pop(key, None)
+        if key in cache.keys:
+            index = cache.keys.index(key)
+            cache.keys.pop(index)
+            cache.vectors = np.delete(cache.vectors, index, axis=0)
+
+    def invalidate(self, collection_id: int):
+        """Drop every cached answer for a collection."""
+        if self._collections.pop(collection_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        self._collections.clear()
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["exact_hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        return dict(
+            self.stats,
+            llm_seconds_saved=round(self.stats["llm_seconds_saved"], 3),
+            hit_rate=round(hits / lookups, 4) if lookups else 0.0,
+            cached_collections=len(self._collections),
+            cached_entries=sum(len(c.entries) for c in self._collections.values())
+        )
+
+
+answer_cache = AnswerCache()
+
+
+def collection_generation(collection) -> str:
+    """Generation token for a collection; changes whenever its content changes."""
+    return collection.updated_at.isoformat() if collection.updated_at else ""
+
+
+def get_answer_cache_stats() -> Dict:
+    return answer_cache.get_stats()
@@ -0,0 +1,230 @@
+"""
+Collection Cache Service - Process-local cache of collection metadata
+Q&A requests and the PDF routes only need a collection's id, name and updated_at,
+so those are served from memory instead of querying the collections table per call.
+
+Coherence:
+- Any committed insert, update or delete of a Collection row (through
+  collection_service, PDF ingestion touching updated_at, admin jobs, ...) invalidates
+  the entry in the committing process and sends a Postgres NOTIFY on
+  COLLECTION_CACHE_NOTIFY_CHANNEL within the same transaction.
+- Every worker LISTENs on that channel and drops the notified entries.
+- While the listener is not connected, entries expire after
+  COLLECTION_CACHE_UNSYNCED_TTL_SECONDS, so other workers' changes are seen quickly.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import db_models, schemas
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "changed_collection_ids"
+
+
+class CollectionCache:
+    """Collection snapshots keyed by id, with version checks against concurrent invalidation."""
+
+    def __init__(self):
+        self._entries: Dict[int, tuple] = {}   # id -> (snapshot, cached_at)
+        self._versions: Dict[int, int] = {}    # Bumped by every invalidation of an id
+        self._epoch = 0                        # Bumped by clear()
+        self._lock = threading.Lock()
+        self.listening = False
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "notifications": 0}
+
+    def _ttl(self) -> float:
+        if self.listening:
+            return settings.COLLECTION_CACHE_TTL_SECONDS
+        return settings.COLLECTION_CACHE_UNSYNCED_TTL_SECONDS
+
+    def _cached(self, collection_id: int) -> Optional[schemas.Collection]:
+        entry = self._entries.get(collection_id)
+        if entry is None or time.monotonic() - entry[1] > self._ttl():
+            return None
+        return entry[0]
+
+    def get_many(self, db: Session, collection_ids: Iterable[int]) -> Dict[int, schemas.Collection]:
+        """
+        Look up several collections, querying the database once for all cache misses.
+
+        Args:
+            db: SQLAlchemy database session
+            collection_ids: Collection ids to look up
+
+        Returns:
+            Dictionary of id to collection snapshot; unknown ids are absent
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for collection_id in set(collection_ids):
+                snapshot = self._cached(collection_id) if settings.COLLECTION_CACHE_ENABLED else None
+                if snapshot is None:
+                    missing.append(collection_id)
+                else:
+                    found[collection_id] = snapshot
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(missing)
+            versions = {collection_id: self._versions.get(collection_id, 0) for collection_id in missing}
+            epoch = self._epoch
+
+        if missing:
+            rows = db.query(db_models.Collection).filter(db_models.Collection.id.in_(missing)).all()
+            loaded = {row.id: schemas.Collection.model_validate(row) for row in rows}
+            found.update(loaded)
+            with self._lock:
+                now = time.monotonic()
+                for collection_id, snapshot in loaded.items():
+                    # Skip rows invalidated while they were being loaded; they may be stale
+                    if epoch == self._epoch and versions[collection_id] == self._versions.get(collection_id, 0):
+                        self._entries[collection_id] = (snapshot, now)
+        return found
+
+    def get(self, db: Session, collection_id: int) -> Optional[schemas.Collection]:
+        """Look up one collection; None if it does not exist."""
+        return self.get_many(db, [collection_id]).get(collection_id)
+
+    def invalidate(self, collection_id: int):
+        with self._lock:
+            self._entries.pop(collection_id, None)
+            self._versions[collection_id] = self._versions.get(collection_id, 0) + 1
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(
+            self.stats,
+            entries=len(self._entries),
+            listening=self.listening,
+            hit_ratio=round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        )
+
+
+collection_cache = CollectionCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _record_collection_changes(session: Session, flush_context):
+    changed = {
+        obj.id for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, db_models.Collection) and obj.id is not None
+    }
+    if not changed:
+        return
+    session.info.setdefault(_PENDING_KEY, set()).update(changed)
+    if session.get_bind().dialect.name == "postgresql":
+        # Delivered to listeners only if the transaction commits
+        connection = session.connection()
+        for collection_id in changed:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": settings.COLLECTION_CACHE_NOTIFY_CHANNEL, "payload": str(collection_id)}
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_changes(session: Session):
+    for collection_id in session.info.pop(_PENDING_KEY, ()):
+        collection_cache.invalidate(collection_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def handle_collection_notification(payload: str):
+    """Drop the entry named by a NOTIFY payload; unparseable payloads clear the cache."""
+    collection_cache.stats["notifications"] += 1
+    try:
+        collection_cache.invalidate(int(payload))
+    except ValueError:
+        collection_cache.clear()
+
+
+_listener_task = None
+
+
+def _open_listen_connection():
+    from ..db.session import engine
+
+    connection = engine.raw_connection()
+    connection.detach()  # Held for the listener's lifetime, never returned to the pool
+    driver_connection = connection.driver_connection
+    driver_connection.autocommit = True
+    with driver_connection.cursor() as cursor:
+        cursor.execute(f'LISTEN "{settings.COLLECTION_CACHE_NOTIFY_CHANNEL}"')
+    return connection
+
+
+async def _listen_loop():
+    loop = asyncio.get_running_loop()
+    while True:
+        connection = None
+        try:
+            connection = await asyncio.to_thread(_open_listen_connection)
+            driver_connection = connection.driver_connection
+            readable = asyncio.Event()
+            loop.add_reader(driver_connection.fileno(), readable.set)
+            try:
+                # Changes made while no listener was connected were never delivered
+                collection_cache.clear()
+                collection_cache.listening = True
+                logger.info(f"Listening for collection changes on '{settings.COLLECTION_CACHE_NOTIFY_CHANNEL}'")
+                while True:
+                    await readable.wait()
+                    readable.clear()
+                    driver_connection.poll()
+                    while driver_connection.notifies:
+                        handle_collection_notification(driver_connection.notifies.pop(0).payload)
+            finally:
+                loop.remove_reader(driver_connection.fileno())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Collection change listener disconnected: {str(e)}")
+        finally:
+            collection_cache.listening = False
+            if connection is not None:
+                connection.close()
+        await asyncio.sleep(settings.COLLECTION_CACHE_LISTEN_RETRY_SECONDS)
+
+
+def start_collection_cache_listener():
+    """Start the LISTEN task that keeps this worker's cache coherent with other workers."""
+    global _listener_task
+    if not settings.COLLECTION_CACHE_ENABLED or _listener_task is not None:
+        return
+    _listener_task = asyncio.create_task(_listen_loop())
+
+
+async def stop_collection_cache_listener():
+    """Cancel the LISTEN task and close its connection."""
+    global _listener_task
+    if _listener_task is None:
+        return
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
+
+
+def get_collection_cache_stats() -> Dict:
+    """Return collection metadata cache metrics for this process."""
+    return collection_cache.get_stats()
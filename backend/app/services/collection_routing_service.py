@@ -0,0 +1,296 @@
+"""
+Collection Routing Service - Route "all collections" questions by centroid similarity
+Each collection keeps a summary vector: the mean of its chunk embeddings, updated
+incrementally as PDFs are ingested. A question is searched only in the few collections
+whose centroids are most similar to it, so search cost tracks the fan-out rather than
+the number of collections.
+
+Deleting PDFs does not subtract their embeddings; rebuild_collection_centroids()
+recomputes centroids from the vector store. Collections with indexed PDFs but no
+centroid yet (e.g. created before routing existed) are searched on every routed
+question until the startup backfill has computed their centroids.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.db_models import Collection, CollectionCentroid, PDFDocument
+from ..rag_components.vector_store_interface import iter_collection_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def top_collections(
+    centroids: np.ndarray,
+    collection_ids: Sequence[int],
+    query_embedding,
+    fan_out: int
+) -> List[Tuple[int, float]]:
+    """
+    Pick the collections whose centroids are most similar to a query.
+
+    Args:
+        centroids: One L2-normalized centroid per row
+        collection_ids: Collection id of each row
+        query_embedding: Query embedding vector
+        fan_out: Number of collections to return
+
+    Returns:
+        List of (collection_id, cosine_similarity), most similar first
+    """
+    if len(collection_ids) == 0 or fan_out <= 0:
+        return []
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if norm == 0:
+        return []
+    similarities = centroids @ (query / norm)
+    fan_out = min(fan_out, len(collection_ids))
+    best = np.argpartition(-similarities, fan_out - 1)[:fan_out]
+    best = best[np.argsort(-similarities[best])]
+    return [(collection_ids[i], float(similarities[i])) for i in best]
+
+
+def _normalized(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class CentroidIndex:
+    """Normalized centroid matrix of all collections, reloaded from the database when stale."""
+
+    def __init__(self):
+        self._collection_ids: List[int] = []
+        self._unindexed_ids: List[int] = []  # Collections with processed PDFs but no centroid
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.stats = {"routed_queries": 0, "reloads": 0, "centroid_updates": 0, "unindexed_fallbacks": 0}
+
+    def _ensure_loaded(self, db: Session):
+        with self._lock:
+            fresh = (
+                self._loaded_at is not None
+                and time.monotonic() - self._loaded_at < settings.COLLECTION_ROUTING_REFRESH_SECONDS
+            )
+            if fresh:
+                return
+            rows = db.query(CollectionCentroid.collection_id, CollectionCentroid.centroid)\
+                .filter(CollectionCentroid.chunk_count > 0).all()
+            self._collection_ids = [row.collection_id for row in rows]
+            if rows:
+                self._centroids = _normalized(np.array([json.loads(row.centroid) for row in rows]))
+            else:
+                self._centroids = np.zeros((0, 0), dtype=np.float32)
+            indexed = set(self._collection_ids)
+            with_content = db.query(PDFDocument.collection_id)\
+                .filter(PDFDocument.status == "processed").distinct().all()
+            self._unindexed_ids = sorted(
+                row.collection_id for row in with_content
+                if row.collection_id is not None and row.collection_id not in indexed
+            )
+            self._loaded_at = time.monotonic()
+            self.stats["reloads"] += 1
+
+    def route(self, db: Session, question_embedding: List[float], fan_out: int) -> List[Tuple[int, Optional[float]]]:
+        """
+        Collections to search for a question: the fan_out most similar ones, followed by
+        collections that have content but no centroid yet (up to QA_MULTI_MAX_COLLECTIONS).
+
+        Returns:
+            List of (collection_id, centroid_similarity), most similar first; the
+            similarity is None for collections without a centroid
+        """
+        self._ensure_loaded(db)
+        self.stats["routed_queries"] += 1
+        routed = top_collections(self._centroids, self._collection_ids, question_embedding, fan_out)
+        unindexed = self._unindexed_ids[:settings.QA_MULTI_MAX_COLLECTIONS]
+        if unindexed:
+            self.stats["unindexed_fallbacks"] += 1
+        return routed + [(collection_id, None) for collection_id in unindexed]
+
+    def unindexed_collections(self, db: Session) -> List[int]:
+        """Collections with processed PDFs but no centroid."""
+        self._ensure_loaded(db)
+        return list(self._unindexed_ids)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def get_stats(self) -> Dict:
+        return dict(
+            self.stats,
+            collections_indexed=len(self._collection_ids),
+            collections_unindexed=len(self._unindexed_ids)
+        )
+
+
+centroid_index = CentroidIndex()
+
+
+def _add_to_centroid(db: Session, collection_id: int, added: np.ndarray):
+    row = db.query(CollectionCentroid).filter(
+        CollectionCentroid.collection_id == collection_id
+    ).with_for_update().first()
+    if row is None:
+        db.add(CollectionCentroid(
+            collection_id=collection_id,
+            centroid=json.dumps(added.mean(axis=0).tolist()),
+            chunk_count=len(added)
+        ))
+    else:
+        total = np.asarray(json.loads(row.centroid)) * row.chunk_count + added.sum(axis=0)
+        row.chunk_count += len(added)
+        row.centroid = json.dumps((total / row.chunk_count).tolist())
+    db.flush()
+
+
+def reset_collection_centroid(db: Session, collection_id: int):
+    """
+    Drop a collection's centroid before all of its chunks are re-added (full re-index).
+    Joins the caller's transaction; the re-added chunks rebuild it through
+    update_collection_centroid().
+    """
+    db.query(CollectionCentroid).filter(
+        CollectionCentroid.collection_id == collection_id
+    ).delete(synchronize_session="fetch")
+    centroid_index.invalidate()
+
+
+def update_collection_centroid(db: Session, collection_id: int, embeddings: List[List[float]]):
+    """
+    Fold newly ingested chunk embeddings into a collection's running mean.
+    Joins the caller's transaction (committed with the ingestion); failures are
+    logged, never raised, since a rebuild can always recompute the centroid.
+
+    Args:
+        db: SQLAlchemy database session
+        collection_id: Database collection ID
+        embeddings: Embeddings of the chunks just added
+    """
+    if not embeddings:
+        return
+    added = np.asarray(embeddings, dtype=np.float64)
+    try:
+        try:
+            with db.begin_nested():
+                _add_to_centroid(db, collection_id, added)
+        except IntegrityError:
+            # A concurrent ingestion created the row first; it can be locked now
+            with db.begin_nested():
+                _add_to_centroid(db, collection_id, added)
+        centroid_index.stats["centroid_updates"] += 1
+        centroid_index.invalidate()
+    except Exception as e:
+        logger.error(f"Failed to update centroid of collection {collection_id}: {str(e)}")
+
+
+def rebuild_collection_centroids(db: Session, collection_ids: Optional[List[int]] = None) -> Dict:
+    """
+    Recompute centroids from the embeddings stored in the vector store.
+
+    Args:
+        db: SQLAlchemy database session
+        collection_ids: Collections to rebuild (defaults to all)
+
+    Returns:
+        Dictionary with rebuild results
+    """
+    try:
+        if collection_ids is None:
+            collection_ids = [row.id for row in db.query(Collection.id).all()]
+
+        rebuilt = {}
+        for collection_id in collection_ids:
+            total = None
+            count = 0
+            for batch in iter_collection_embeddings(settings.CHROMA_DEFAULT_COLLECTION_NAME, str(collection_id)):
+                vectors = np.asarray(batch, dtype=np.float64)
+                total = vectors.sum(axis=0) if total is None else total + vectors.sum(axis=0)
+                count += len(vectors)
+
+            row = db.query(CollectionCentroid).filter(CollectionCentroid.collection_id == collection_id).first()
+            if count == 0:
+                if row is not None:
+                    db.delete(row)
+            elif row is None:
+                db.add(CollectionCentroid(
+                    collection_id=collection_id, centroid=json.dumps((total / count).tolist()), chunk_count=count
+                ))
+            else:
+                row.centroid = json.dumps((total / count).tolist())
+                row.chunk_count = count
+            db.commit()
+            rebuilt[collection_id] = count
+            logger.info(f"Rebuilt centroid of collection {collection_id} from {count} chunks")
+
+        centroid_index.invalidate()
+        return {
+            "success": True,
+            "collections": rebuilt,
+            "message": f"Rebuilt centroids of {len(rebuilt)} collections"
+        }
+
+    except Exception as e:
+        logger.error(f"Error rebuilding collection centroids: {str(e)}")
+        db.rollback()
+        return {
+            "success": False,
+            "error": f"Centroid rebuild failed: {str(e)}"
+        }
+
+
+_backfill_task = None
+
+
+def _backfill_missing_centroids():
+    from ..db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        centroid_index.invalidate()
+        missing = centroid_index.unindexed_collections(db)
+        if missing:
+            logger.info(f"Computing centroids of {len(missing)} collections that have none")
+            rebuild_collection_centroids(db, missing)
+    except Exception as e:
+        logger.error(f"Centroid backfill failed: {str(e)}")
+    finally:
+        db.close()
+
+
+def start_centroid_backfill():
+    """Compute missing centroids in the background, so existing collections become routable."""
+    global _backfill_task
+    if _backfill_task is not None:
+        return
+    _backfill_task = asyncio.create_task(asyncio.to_thread(_backfill_missing_centroids))
+
+
+async def stop_centroid_backfill():
+    """Stop waiting for the backfill; a rebuild in progress finishes in its thread."""
+    global _backfill_task
+    if _backfill_task is None:
+        return
+    _backfill_task.cancel()
+    try:
+        await _backfill_task
+    except asyncio.CancelledError:
+        pass
+    _backfill_task = None
+
+
+def get_collection_routing_stats() -> Dict:
+    """Return routing metrics for this process."""
+    return centroid_index.get_stats()
@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 from ..models import db_models, schemas
 from typing import List, Optional
+from .collection_cache_service import collection_cache
 
 # Create a new collection
 def create_collection(db: Session, collection: schemas.CollectionCreate) -> db_models.Collection:
@@ -14,9 +15,9 @@ def create_collection(db: Session, collection: schemas.CollectionCreate) -> db_m
     db.refresh(db_collection)
     return db_collection
 
-# Get a collection by ID
-def get_collection(db: Session, collection_id: int) -> Optional[db_models.Collection]:
-    return db.query(db_models.Collection).filter(db_models.Collection.id == collection_id).first()
+# Get a collection by ID (served from the collection metadata cache)
+def get_collection(db: Session, collection_id: int) -> Optional[schemas.Collection]:
+    return collection_cache.get(db, collection_id)
 
 # List collections with pagination
 def get_collections(db: Session, skip: int = 0, limit: int = 100) -> List[db_models.Collection]:
@@ -0,0 +1,239 @@
+"""
+Collection Stats Service - Incrementally maintained per-collection counters
+Keeps PDF count, chunk count, text bytes, token totals and last-ingest time per
+collection in the collection_stats table, so summaries read one row instead of
+counting PDFs or scanning the vector store.
+
+Writers (PDF creation, ingestion, re-indexing, deletion) apply their deltas in the
+caller's transaction, so counters commit or roll back together with the change they
+describe. Each PDF's current contribution is kept in pdf_chunk_stats, which makes
+re-indexing and deleting exact. A write to a collection without a counter row creates
+one at zero, flagged for a recount; the startup backfill recounts those (and collections
+with no row at all) in the background, and rebuild_collection_stats() reconciles the
+counters from the database and the vector store.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.db_models import Collection, CollectionStats, PDFChunkStats, PDFDocument
+from ..rag_components.chunker import Chunk
+from ..rag_components.context_assembler import chunk_token_count
+from ..rag_components.vector_store_interface import iter_collection_rows
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = ("chunk_count", "text_bytes", "token_count")
+
+# Reported for a collection the backfill has not counted yet
+EMPTY_COLLECTION_STATS = {"pdf_count": 0, "chunk_count": 0, "text_bytes": 0, "token_count": 0, "last_ingested_at": None}
+
+
+def _locked_stats(db: Session, collection_id: int) -> CollectionStats:
+    """
+    The collection's counter row, locked for update. A missing row is created at zero
+    and flagged for the backfill to recount, rather than recounted on the write path.
+    """
+    stats = db.query(CollectionStats).filter(
+        CollectionStats.collection_id == collection_id
+    ).with_for_update().first()
+    if stats is not None:
+        return stats
+    try:
+        with db.begin_nested():
+            stats = CollectionStats(
+                collection_id=collection_id, pdf_count=0, chunk_count=0, text_bytes=0, token_count=0,
+                needs_recount=True
+            )
+            db.add(stats)
+            db.flush()
+            return stats
+    except IntegrityError:
+        # A concurrent writer created the row first; it can be locked now
+        return db.query(CollectionStats).filter(
+            CollectionStats.collection_id == collection_id
+        ).with_for_update().one()
+
+
+def record_pdf_added(db: Session, collection_id: int):
+    """Count a new PDF record; call before adding it to the session, then commit both together."""
+    _locked_stats(db, collection_id).pdf_count += 1
+
+
+def record_pdf_indexed(db: Session, pdf: PDFDocument, chunks: List[Chunk]):
+    """
+    Set a PDF's contribution to the chunks now stored for it, applying the difference
+    to its collection. Pass an empty list when the PDF's chunks were removed.
+    Call before the caller's commit.
+
+    Args:
+        db: SQLAlchemy database session
+        pdf: The PDF database record
+        chunks: Chunks stored in the vector store for the PDF
+    """
+    new = {
+        "chunk_count": len(chunks),
+        "text_bytes": sum(len(chunk.text.encode("utf-8")) for chunk in chunks),
+        "token_count": sum(chunk_token_count(chunk) for chunk in chunks)
+    }
+    stats = _locked_stats(db, pdf.collection_id)
+    contribution = db.query(PDFChunkStats).filter(PDFChunkStats.pdf_id == pdf.id).first()
+    if contribution is None:
+        contribution = PDFChunkStats(pdf_id=pdf.id, collection_id=pdf.collection_id, chunk_count=0, text_bytes=0, token_count=0)
+        db.add(contribution)
+
+    for field in STAT_FIELDS:
+        setattr(stats, field, (getattr(stats, field) or 0) + new[field] - (getattr(contribution, field) or 0))
+        setattr(contribution, field, new[field])
+    if chunks:
+        stats.last_ingested_at = datetime.utcnow()
+
+
+def record_pdf_removed(db: Session, pdf: PDFDocument):
+    """Subtract a PDF that is being deleted from its collection's counters; call before committing the delete."""
+    stats = _locked_stats(db, pdf.collection_id)
+    contribution = db.query(PDFChunkStats).filter(PDFChunkStats.pdf_id == pdf.id).first()
+    if contribution is not None:
+        for field in STAT_FIELDS:
+            setattr(stats, field, (getattr(stats, field) or 0) - (getattr(contribution, field) or 0))
+        db.delete(contribution)
+    stats.pdf_count -= 1
+
+
+def get_collection_stats_row(db: Session, collection_id: int) -> Optional[Dict]:
+    """
+    Current counters of a collection.
+
+    Returns:
+        Dictionary of counters, or None if the collection has none yet
+    """
+    stats = db.query(CollectionStats).filter(CollectionStats.collection_id == collection_id).first()
+    if stats is None:
+        return None
+    return {
+        "pdf_count": stats.pdf_count,
+        "chunk_count": stats.chunk_count,
+        "text_bytes": stats.text_bytes,
+        "token_count": stats.token_count,
+        "last_ingested_at": stats.last_ingested_at
+    }
+
+
+def _rebuild_one(db: Session, collection_id: int) -> CollectionStats:
+    """
+    Recount a collection's PDFs and stored chunks into its counters, in the caller's
+    transaction. The counter row is locked before counting, so writers wait for the
+    recount instead of having their deltas overwritten by it.
+    """
+    stats = _locked_stats(db, collection_id)
+    per_pdf: Dict[int, Dict[str, int]] = {}
+    for batch in iter_collection_rows(settings.CHROMA_DEFAULT_COLLECTION_NAME, str(collection_id), ["documents", "metadatas"]):
+        for document, metadata in zip(batch["documents"], batch["metadatas"]):
+            totals = per_pdf.setdefault(int(metadata.get("pdf_db_id", 0)), dict.fromkeys(STAT_FIELDS, 0))
+            chunk = Chunk.model_construct(text=document or "", token_count=metadata.get("token_count"))
+            totals["chunk_count"] += 1
+            totals["text_bytes"] += len(chunk.text.encode("utf-8"))
+            totals["token_count"] += chunk_token_count(chunk)
+
+    pdfs = db.query(PDFDocument.id).filter(PDFDocument.collection_id == collection_id).all()
+    pdf_ids = {row.id for row in pdfs}
+
+    db.query(PDFChunkStats).filter(PDFChunkStats.collection_id == collection_id).delete(synchronize_session="fetch")
+    for pdf_id, totals in per_pdf.items():
+        if pdf_id in pdf_ids:  # Orphaned chunks are the vector GC's concern, not counted here
+            db.add(PDFChunkStats(pdf_id=pdf_id, collection_id=collection_id, **totals))
+
+    stats.pdf_count = len(pdf_ids)
+    for field in STAT_FIELDS:
+        setattr(stats, field, sum(totals[field] for pdf_id, totals in per_pdf.items() if pdf_id in pdf_ids))
+    stats.needs_recount = False
+    db.flush()
+    return stats
+
+
+def rebuild_collection_stats(db: Session, collection_ids: Optional[List[int]] = None) -> Dict:
+    """
+    Recompute collection counters from the PDF table and the chunks in the vector store.
+
+    Args:
+        db: SQLAlchemy database session
+        collection_ids: Collections to rebuild (defaults to all)
+
+    Returns:
+        Dictionary with rebuild results
+    """
+    try:
+        if collection_ids is None:
+            collection_ids = [row.id for row in db.query(Collection.id).all()]
+        rebuilt = {}
+        for collection_id in collection_ids:
+            _rebuild_one(db, collection_id)
+            db.commit()
+            rebuilt[collection_id] = get_collection_stats_row(db, collection_id)
+            logger.info(f"Rebuilt stats of collection {collection_id}: {rebuilt[collection_id]}")
+        return {
+            "success": True,
+            "collections": rebuilt,
+            "message": f"Rebuilt stats of {len(rebuilt)} collections"
+        }
+    except Exception as e:
+        logger.error(f"Error rebuilding collection stats: {str(e)}")
+        db.rollback()
+        return {
+            "success": False,
+            "error": f"Collection stats rebuild failed: {str(e)}"
+        }
+
+
+def collections_needing_recount(db: Session) -> List[int]:
+    """Collections without a counter row, or whose row was created at zero on a write path."""
+    rows = db.query(Collection.id)\
+        .outerjoin(CollectionStats, CollectionStats.collection_id == Collection.id)\
+        .filter((CollectionStats.collection_id.is_(None)) | (CollectionStats.needs_recount.is_(True)))\
+        .all()
+    return [row.id for row in rows]
+
+
+_backfill_task = None
+
+
+def _backfill_collection_stats():
+    from ..db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        pending = collections_needing_recount(db)
+        if pending:
+            logger.info(f"Recounting stats of {len(pending)} collections")
+            rebuild_collection_stats(db, pending)
+    except Exception as e:
+        logger.error(f"Collection stats backfill failed: {str(e)}")
+    finally:
+        db.close()
+
+
+def start_collection_stats_backfill():
+    """Recount missing or provisional collection counters in the background."""
+    global _backfill_task
+    if _backfill_task is not None:
+        return
+    _backfill_task = asyncio.create_task(asyncio.to_thread(_backfill_collection_stats))
+
+
+async def stop_collection_stats_backfill():
+    """Stop waiting for the backfill; a recount in progress finishes in its thread."""
+    global _backfill_task
+    if _backfill_task is None:
+        return
+    _backfill_task.cancel()
+    try:
+        await _backfill_task
+    except asyncio.CancelledError:
+        pass
+    _backfill_task = None
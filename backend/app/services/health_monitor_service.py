@@ -0,0 +1,145 @@
+"""
+Health Monitor Service - Background probing of the services the API depends on
+Probes the LLM service, ChromaDB and PostgreSQL on an interval (backing off while a
+service is failing) and keeps the latest results in memory, so health and readiness
+endpoints answer instantly without putting load on the probed services.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict
+
+from sqlalchemy import text
+
+from ..core.config import settings
+from ..rag_components.llm_handler import ping_llm_service
+from ..rag_components.vector_store_interface import initialize_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+def _new_state() -> Dict:
+    return {
+        "status": "unknown",
+        "last_checked": None,
+        "last_success": None,
+        "latency_ms": None,
+        "consecutive_failures": 0,
+        "last_error": None
+    }
+
+
+async def _probe_llm():
+    await ping_llm_service()
+
+
+async def _probe_chroma():
+    await asyncio.to_thread(lambda: initialize_vector_store().heartbeat())
+
+
+async def _probe_postgres():
+    from ..db.session import engine
+
+    def select_one():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    await asyncio.to_thread(select_one)
+
+
+PROBES: Dict[str, Callable[[], Awaitable]] = {
+    "llm_service": _probe_llm,
+    "vector_store": _probe_chroma,
+    "database": _probe_postgres
+}
+
+_health_state: Dict[str, Dict] = {name: _new_state() for name in PROBES}
+_probe_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def probe_component(name: str) -> Dict:
+    """
+    Run one probe and record its outcome.
+
+    Returns:
+        The component's updated health state
+    """
+    state = _health_state.setdefault(name, _new_state())
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(PROBES[name](), timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+        state["status"] = "healthy"
+        state["last_success"] = datetime.utcnow().isoformat()
+        state["consecutive_failures"] = 0
+        state["last_error"] = None
+    except Exception as e:
+        state["status"] = "unhealthy"
+        state["consecutive_failures"] += 1
+        state["last_error"] = str(e) or type(e).__name__
+        logger.warning(f"Health probe '{name}' failed ({state['consecutive_failures']}x): {state['last_error']}")
+    state["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    state["last_checked"] = datetime.utcnow().isoformat()
+    return state
+
+
+async def run_health_probes() -> Dict:
+    """Probe every component once, concurrently."""
+    await asyncio.gather(*(probe_component(name) for name in PROBES))
+    return get_health_snapshot()
+
+
+def next_probe_delay(consecutive_failures: int) -> float:
+    """Probe interval, doubled per consecutive failure up to the backoff ceiling."""
+    delay = settings.HEALTH_PROBE_INTERVAL_SECONDS * (2 ** min(consecutive_failures, 10))
+    return min(delay, max(settings.HEALTH_PROBE_MAX_BACKOFF_SECONDS, settings.HEALTH_PROBE_INTERVAL_SECONDS))
+
+
+async def _probe_loop(name: str):
+    while True:
+        state = await probe_component(name)
+        await asyncio.sleep(next_probe_delay(state["consecutive_failures"]))
+
+
+def start_health_monitor():
+    """Start one background probe loop per component if enabled."""
+    if not settings.HEALTH_PROBE_ENABLED or _probe_tasks:
+        return
+    for name in PROBES:
+        _probe_tasks[name] = asyncio.create_task(_probe_loop(name))
+    logger.info(f"Started health monitor (every {settings.HEALTH_PROBE_INTERVAL_SECONDS}s)")
+
+
+async def stop_health_monitor():
+    """Cancel the background probe loops."""
+    for task in _probe_tasks.values():
+        task.cancel()
+    for task in _probe_tasks.values():
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _probe_tasks.clear()
+
+
+def get_health_snapshot() -> Dict:
+    """
+    Latest cached health of every component.
+
+    Returns:
+        Dictionary with per-component state, overall_status and ready flag
+    """
+    components = {name: dict(state) for name, state in _health_state.items()}
+    statuses = [state["status"] for state in components.values()]
+    if all(status == "healthy" for status in statuses):
+        overall = "healthy"
+    elif all(status == "unknown" for status in statuses):
+        overall = "unknown"
+    else:
+        overall = "degraded"
+    return {
+        "overall_status": overall,
+        "ready": overall == "healthy",
+        "components": components
+    }
@@ -0,0 +1,175 @@
+"""
+History Writer Service - Write-behind buffer for history rows
+Request handlers enqueue QueryHistory (and other append-only) rows instead of committing
+them on the request path. A background task drains the buffer into multi-row INSERTs
+every HISTORY_FLUSH_INTERVAL_SECONDS, or as soon as a full batch is waiting, and drains
+whatever is left on shutdown.
+
+The buffer is bounded: when it is full, enqueue_history_row() refuses the row and the
+caller writes it synchronously, so a burst slows requests down instead of losing history.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from sqlalchemy import insert
+
+from ..core.config import settings
+from ..core.metrics import (
+    HISTORY_BUFFER_DEPTH,
+    HISTORY_BUFFER_REJECTED,
+    HISTORY_FLUSH_DURATION,
+    HISTORY_ROWS_WRITTEN
+)
+
+logger = logging.getLogger(__name__)
+
+_buffer: Deque[Tuple[type, Dict]] = deque()
+_wakeup = None
+_flush_task = None
+_stopping = False
+
+_writer_stats = {
+    "enqueued": 0,
+    "rejected": 0,
+    "rows_written": 0,
+    "rows_failed": 0,
+    "flushes": 0,
+    "max_depth": 0,
+    "last_flush_ms": None
+}
+
+
+def enqueue_history_row(model, row: Dict) -> bool:
+    """
+    Buffer one row for a later multi-row INSERT.
+
+    Args:
+        model: SQLAlchemy model class the row belongs to
+        row: Column values of the row
+
+    Returns:
+        True if buffered; False if the writer is not running, is stopping or the buffer
+        is full, in which case the caller must write the row itself
+    """
+    if _flush_task is None or _stopping:
+        return False
+    if len(_buffer) >= settings.HISTORY_BUFFER_MAX_ROWS:
+        _writer_stats["rejected"] += 1
+        HISTORY_BUFFER_REJECTED.inc()
+        return False
+
+    _buffer.append((model, row))
+    _writer_stats["enqueued"] += 1
+    _writer_stats["max_depth"] = max(_writer_stats["max_depth"], len(_buffer))
+    HISTORY_BUFFER_DEPTH.set(len(_buffer))
+    if len(_buffer) >= settings.HISTORY_FLUSH_BATCH_SIZE:
+        _wakeup.set()
+    return True
+
+
+def _write_rows(batch: List[Tuple[type, Dict]]):
+    """Insert a batch in one transaction, one executemany INSERT per model."""
+    from ..db.session import SessionLocal
+
+    by_model: Dict[type, List[Dict]] = {}
+    for model, row in batch:
+        by_model.setdefault(model, []).append(row)
+
+    db = SessionLocal()
+    try:
+        for model, rows in by_model.items():
+            db.execute(insert(model), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def flush_history_buffer() -> int:
+    """
+    Write up to HISTORY_FLUSH_BATCH_SIZE buffered rows.
+
+    Returns:
+        Number of rows taken from the buffer
+    """
+    batch = []
+    while _buffer and len(batch) < settings.HISTORY_FLUSH_BATCH_SIZE:
+        batch.append(_buffer.popleft())
+    HISTORY_BUFFER_DEPTH.set(len(_buffer))
+    if not batch:
+        return 0
+
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(_write_rows, batch)
+        _writer_stats["rows_written"] += len(batch)
+        HISTORY_ROWS_WRITTEN.labels(outcome="success").inc(len(batch))
+    except Exception as e:
+        # History is best-effort, as with the synchronous write it replaces
+        logger.error(f"Failed to write {len(batch)} buffered history rows: {str(e)}")
+        _writer_stats["rows_failed"] += len(batch)
+        HISTORY_ROWS_WRITTEN.labels(outcome="failure").inc(len(batch))
+    elapsed = time.perf_counter() - started
+    HISTORY_FLUSH_DURATION.observe(elapsed)
+    _writer_stats["flushes"] += 1
+    _writer_stats["last_flush_ms"] = round(elapsed * 1000, 2)
+    return len(batch)
+
+
+async def _flush_loop():
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.HISTORY_FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        while _buffer:
+            await flush_history_buffer()
+        if _stopping:
+            return
+
+
+def start_history_writer():
+    """Start the background flusher if write-behind is enabled."""
+    global _flush_task, _wakeup
+    if not settings.HISTORY_WRITE_BEHIND_ENABLED or _flush_task is not None:
+        return
+    _wakeup = asyncio.Event()
+    _flush_task = asyncio.create_task(_flush_loop())
+    logger.info(f"Started history write-behind (every {settings.HISTORY_FLUSH_INTERVAL_SECONDS}s)")
+
+
+async def stop_history_writer():
+    """
+    Stop accepting rows (callers write them synchronously from then on), flush every
+    buffered row, then stop the background flusher.
+    """
+    global _flush_task, _stopping
+    if _flush_task is None:
+        return
+    _stopping = True
+    _wakeup.set()
+    try:
+        await _flush_task
+        while _buffer:
+            await flush_history_buffer()
+    finally:
+        _flush_task = None
+        _stopping = False
+    logger.info(f"Stopped history write-behind ({_writer_stats['rows_written']} rows written)")
+
+
+def get_history_writer_stats() -> Dict:
+    """Return write-behind buffer metrics for this process."""
+    return dict(
+        _writer_stats,
+        running=_flush_task is not None,
+        buffer_depth=len(_buffer),
+        buffer_capacity=settings.HISTORY_BUFFER_MAX_ROWS
+    )
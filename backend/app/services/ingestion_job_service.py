@@ -0,0 +1,331 @@
+"""
+Ingestion Job Service - Durable ingestion queue and in-process worker pool
+Adding a pending PDF commits an ingestion_jobs row together with it. Workers in every
+API process claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, run the RAG pipeline
+for them (INGESTION_WORKER_CONCURRENCY at a time per process) and record the step,
+attempts and last error on the job, and the outcome on the PDF row's status.
+
+Failures raised while processing (vector store or database unavailable, ...) are
+retried with exponential backoff up to INGESTION_JOB_MAX_ATTEMPTS; failures caused by
+the PDF itself (no extractable text) are final. A running job holds a lease that is
+renewed at every pipeline step and embedding batch, so the jobs of a process that died
+are claimed again once their lease expires. Every write is fenced by the claimed attempt
+number: a worker whose lease expired and whose job was claimed again stops at its next
+renewal and never records its result over the new attempt.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.metrics import INGESTION_QUEUE_DEPTH
+from ..models.db_models import IngestionJob, PDFDocument
+from ..rag_components.vector_store_interface import delete_pdf_chunks_from_vector_store
+from .collection_stats_service import record_pdf_indexed
+from .pdf_ingestion_service import PipelineAborted, process_pdf_with_rag_pipeline
+
+logger = logging.getLogger(__name__)
+
+_worker_tasks = []
+_wakeup = None
+_loop = None
+
+_worker_stats = {
+    "claimed": 0,
+    "succeeded": 0,
+    "retried": 0,
+    "failed": 0,
+    "lease_expired": 0,
+    "lease_lost": 0,
+    "last_error": None
+}
+
+
+def _lease_end() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.INGESTION_JOB_LEASE_SECONDS)
+
+
+def enqueue_pending_pdfs(db: Session) -> int:
+    """
+    Create jobs for pending PDFs that have none, such as PDFs added before the queue existed.
+
+    Returns:
+        Number of jobs created
+    """
+    missing = db.query(PDFDocument.id)\
+        .outerjoin(IngestionJob, IngestionJob.pdf_id == PDFDocument.id)\
+        .filter(PDFDocument.status == "pending", IngestionJob.id.is_(None))\
+        .all()
+    try:
+        db.add_all([IngestionJob(pdf_id=row.id) for row in missing])
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # Another process enqueued them first
+        return 0
+    return len(missing)
+
+
+def get_ingestion_queue_depth(db: Session) -> int:
+    """Number of jobs waiting to run, including those waiting for a retry."""
+    return db.query(IngestionJob).filter(IngestionJob.status == "queued").count()
+
+
+def claim_next_job(db: Session) -> Optional[int]:
+    """
+    Lease the next due job to this worker; concurrent workers skip locked rows.
+
+    Returns:
+        Id of the claimed job, or None if no job is due
+    """
+    while True:
+        now = datetime.utcnow()
+        job = db.query(IngestionJob).filter(or_(
+            and_(IngestionJob.status == "queued", IngestionJob.next_attempt_at <= now),
+            and_(IngestionJob.status == "running", IngestionJob.locked_until < now)
+        )).order_by(IngestionJob.next_attempt_at).with_for_update(skip_locked=True).first()
+        if job is None:
+            db.commit()
+            return None
+
+        if job.status == "running":
+            # The worker running it stopped without finishing
+            _worker_stats["lease_expired"] += 1
+            if job.attempts >= settings.INGESTION_JOB_MAX_ATTEMPTS:
+                job.status = "failed"
+                job.last_error = job.last_error or "Worker stopped during the last attempt"
+                job.locked_until = None
+                job.finished_at = now
+                job.pdf.status = "failed"
+                db.commit()
+                continue
+
+        job.status = "running"
+        job.stage = None
+        job.attempts += 1
+        job.locked_until = _lease_end()
+        job.pdf.status = "processing"
+        db.commit()
+        _worker_stats["claimed"] += 1
+        return job.id
+
+
+def _owned_job(db: Session, job_id: int, attempt: int):
+    """Filter matching the job only while this attempt still holds it."""
+    return db.query(IngestionJob).filter(
+        IngestionJob.id == job_id, IngestionJob.attempts == attempt, IngestionJob.status == "running"
+    )
+
+
+def _finish_job(db: Session, job_id: int, attempt: int, result: Dict):
+    """Record an attempt's outcome: done, queued for a retry, or failed for good."""
+    job = _owned_job(db, job_id, attempt).with_for_update().first()
+    if job is None:
+        # The PDF was deleted, or the lease expired and the job was claimed again
+        db.rollback()
+        _worker_stats["lease_lost"] += 1
+        logger.warning(f"Ingestion job {job_id} attempt {attempt} no longer holds its job; outcome dropped")
+        return
+    now = datetime.utcnow()
+    job.locked_until = None
+    if result["success"]:
+        job.status = "succeeded"
+        job.last_error = None
+        job.finished_at = now
+        _worker_stats["succeeded"] += 1
+    elif result.get("retryable") and job.attempts < settings.INGESTION_JOB_MAX_ATTEMPTS:
+        backoff = settings.INGESTION_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+        job.status = "queued"
+        job.last_error = result["error"]
+        job.next_attempt_at = now + timedelta(seconds=backoff)
+        job.pdf.status = "pending"
+        _worker_stats["retried"] += 1
+    else:
+        job.status = "failed"
+        job.last_error = result["error"]
+        job.finished_at = now
+        job.pdf.status = "failed"
+        _worker_stats["failed"] += 1
+    if not result["success"]:
+        _worker_stats["last_error"] = result["error"]
+        logger.warning(f"Ingestion job {job_id} attempt {job.attempts} failed: {result['error']}")
+    db.commit()
+
+
+def run_job(db: Session, job_id: int):
+    """
+    Run one claimed job through the RAG pipeline and record its outcome.
+    Blocking (extraction and embedding are CPU-bound); workers call it in a thread.
+
+    Args:
+        db: SQLAlchemy database session
+        job_id: Id returned by claim_next_job
+    """
+    job = db.get(IngestionJob, job_id)
+    if job is None:
+        return
+    pdf = job.pdf
+    attempt = job.attempts
+
+    def on_stage(stage: str):
+        # Renew the lease only while this attempt owns the job; the UPDATE also locks the
+        # row, so the "recording" renewal commits the result atomically with the check
+        renewed = _owned_job(db, job_id, attempt).update(
+            {"stage": stage, "locked_until": _lease_end()}, synchronize_session=False
+        )
+        if not renewed:
+            raise PipelineAborted(f"Ingestion job {job_id} attempt {attempt} lost its lease")
+        db.commit()
+
+    try:
+        if attempt > 1:
+            # Drop whatever an interrupted earlier attempt stored before re-adding the chunks
+            delete_pdf_chunks_from_vector_store(settings.CHROMA_DEFAULT_COLLECTION_NAME, pdf.id)
+            record_pdf_indexed(db, pdf, [])
+            db.commit()
+        if not pdf.file_path or not Path(pdf.file_path).exists():
+            result = {"success": False, "error": f"PDF file not found: {pdf.file_path}"}
+        else:
+            result = asyncio.run(process_pdf_with_rag_pipeline(db, pdf, Path(pdf.file_path), on_stage))
+    except PipelineAborted as e:
+        db.rollback()
+        _worker_stats["lease_lost"] += 1
+        logger.warning(f"{str(e)}; leaving the job to the attempt that claimed it")
+        return
+    except Exception as e:
+        db.rollback()
+        result = {"success": False, "error": f"Ingestion failed: {str(e)}", "retryable": True}
+    _finish_job(db, job_id, attempt, result)
+
+
+def _claim_in_new_session() -> Optional[int]:
+    from ..db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        job_id = claim_next_job(db)
+        INGESTION_QUEUE_DEPTH.set(get_ingestion_queue_depth(db))
+        return job_id
+    finally:
+        db.close()
+
+
+def _run_in_new_session(job_id: int):
+    from ..db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        run_job(db, job_id)
+    except Exception as e:
+        # Recording the outcome failed; the job's lease expires and it is retried
+        logger.error(f"Ingestion job {job_id} could not be completed: {str(e)}")
+    finally:
+        db.close()
+
+
+def _enqueue_pending_in_new_session():
+    from ..db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        created = enqueue_pending_pdfs(db)
+        if created:
+            logger.info(f"Queued {created} pending PDFs for ingestion")
+    finally:
+        db.close()
+
+
+async def _wait_for_work():
+    try:
+        await asyncio.wait_for(_wakeup.wait(), timeout=settings.INGESTION_POLL_INTERVAL_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+    _wakeup.clear()
+
+
+async def _worker_loop():
+    while True:
+        try:
+            job_id = await asyncio.to_thread(_claim_in_new_session)
+        except Exception as e:
+            logger.error(f"Failed to claim ingestion job: {str(e)}")
+            job_id = None
+        if job_id is None:
+            await _wait_for_work()
+            continue
+        await asyncio.to_thread(_run_in_new_session, job_id)
+
+
+async def _start_workers():
+    try:
+        await asyncio.to_thread(_enqueue_pending_in_new_session)
+    except Exception as e:
+        logger.error(f"Failed to queue pending PDFs: {str(e)}")
+    for _ in range(settings.INGESTION_WORKER_CONCURRENCY):
+        _worker_tasks.append(asyncio.create_task(_worker_loop()))
+
+
+def notify_ingestion_workers():
+    """Wake this process's idle workers after enqueueing a job; safe to call from any thread."""
+    if _loop is not None and _wakeup is not None:
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def start_ingestion_workers():
+    """Queue pending PDFs without a job, then start the worker pool if enabled."""
+    global _wakeup, _loop
+    if not settings.INGESTION_WORKERS_ENABLED or _worker_tasks:
+        return
+    _wakeup = asyncio.Event()
+    _loop = asyncio.get_running_loop()
+    _worker_tasks.append(asyncio.create_task(_start_workers()))
+    logger.info(f"Started {settings.INGESTION_WORKER_CONCURRENCY} ingestion workers")
+
+
+async def stop_ingestion_workers():
+    """
+    Cancel the workers. A PDF being processed finishes in its thread; if the process
+    exits first, the job's lease expires and another worker runs it again.
+    """
+    global _wakeup, _loop
+    for task in _worker_tasks:
+        task.cancel()
+    for task in _worker_tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _worker_tasks.clear()
+    _wakeup = None
+    _loop = None
+
+
+def get_ingestion_job(db: Session, pdf_id: int) -> Optional[IngestionJob]:
+    """Ingestion job of a PDF, or None if it was never queued."""
+    return db.query(IngestionJob).filter(IngestionJob.pdf_id == pdf_id).first()
+
+
+def get_ingestion_queue_stats(db: Session) -> Dict:
+    """
+    Queue depth, job counts by status and this process's worker metrics.
+
+    Returns:
+        Dictionary of queue statistics
+    """
+    counts = dict(db.query(IngestionJob.status, func.count(IngestionJob.id)).group_by(IngestionJob.status).all())
+    oldest_queued = db.query(func.min(IngestionJob.created_at)).filter(IngestionJob.status == "queued").scalar()
+    queue_depth = counts.get("queued", 0)
+    INGESTION_QUEUE_DEPTH.set(queue_depth)
+    return {
+        "queue_depth": queue_depth,
+        "jobs_by_status": counts,
+        "oldest_queued_at": oldest_queued,
+        "workers": settings.INGESTION_WORKER_CONCURRENCY if _worker_tasks else 0,
+        "worker_stats": dict(_worker_stats)
+    }
@@ -4,18 +4,25 @@ from fastapi import UploadFile
 import httpx
 from sqlalchemy.orm import Session
 from ..core.config import settings
+from ..core.metrics import INGESTION_IN_PROGRESS
 from ..models import db_models
-from typing import Optional, Dict, Tuple
+from typing import Callable, Optional, Dict, Tuple
 import fitz  # PyMuPDF
 import logging
+from datetime import datetime
 
 # Import RAG components
 from ..rag_components.chunker import chunk_text
 from ..rag_components.embedder import generate_embeddings_for_chunks
 from ..rag_components.vector_store_interface import add_chunks_to_vector_store
+from .collection_routing_service import update_collection_centroid
+from .collection_stats_service import record_pdf_added, record_pdf_indexed
 
 logger = logging.getLogger(__name__)
 
+class PipelineAborted(Exception):
+    """Raised by an on_stage callback to stop processing without recording an outcome."""
+
 def store_uploaded_pdf(collection_id: int, pdf_file: UploadFile) -> Path:
     """Store uploaded PDF file in the designated directory structure."""
     try:
@@ -80,7 +87,12 @@ def add_pdf_record_to_db(db: Session, title: str, filename: str, file_path: str,
         status=status,
         collection_id=collection_id
     )
+    # Before adding the PDF: creating the collection's counters recounts its existing PDFs
+    record_pdf_added(db, collection_id)
     db.add(pdf_doc)
+    if status == "pending":
+        # Committed together with the PDF, so no pending PDF is left without a job
+        db.add(db_models.IngestionJob(pdf=pdf_doc))
     db.commit()
     db.refresh(pdf_doc)
     return pdf_doc
@@ -123,7 +135,8 @@ def filename_to_title(filename: str) -> str:
 async def process_pdf_with_rag_pipeline(
     db: Session,
     pdf_record: db_models.PDFDocument,
-    pdf_path: Path
+    pdf_path: Path,
+    on_stage: Optional[Callable[[str], None]] = None
 ) -> Dict:
     """
     Process a PDF through the complete RAG pipeline.
@@ -133,14 +146,30 @@ async def process_pdf_with_rag_pipeline(
         db: SQLAlchemy database session
         pdf_record: The PDF database record
         pdf_path: Path to the PDF file
+        on_stage: Called with the name of each step before it starts ("extracting",
+            "chunking", "embedding" once per embedding batch, "storing"), and with
+            "recording" just before the result is committed. It may raise
+            PipelineAborted to stop; pending changes are then rolled back and it propagates.
         
     Returns:
-        Dictionary with processing results
+        Dictionary with processing results; failures caused by an exception
+        (rather than by the PDF's content) are marked retryable
     """
+    with INGESTION_IN_PROGRESS.track_inprogress():
+        return await _run_rag_pipeline(db, pdf_record, pdf_path, on_stage or (lambda stage: None))
+
+async def _run_rag_pipeline(
+    db: Session,
+    pdf_record: db_models.PDFDocument,
+    pdf_path: Path,
+    on_stage: Callable[[str], None]
+) -> Dict:
+    """Extract, chunk, embed and store one PDF, recording its final status."""
     try:
         logger.info(f"Starting RAG pipeline processing for: {pdf_record.filename}")
         
         # Step 1: Extract text from PDF
+        on_stage("extracting")
         extraction_result = extract_text_from_pdf(pdf_path)
         if not extraction_result:
             pdf_record.status = "failed"
@@ -163,6 +192,7 @@ async def process_pdf_with_rag_pipeline(
             }
         
         # Step 2: Chunk the text
+        on_stage("chunking")
         chunks = chunk_text(
             text_content=text_content,
             article_title=pdf_record.title or pdf_record.filename,
@@ -184,16 +214,28 @@ async def process_pdf_with_rag_pipeline(
         logger.info(f"Created {len(chunks)} chunks from {pdf_record.filename}")
         
         # Step 3: Generate embeddings
-        chunks_with_embeddings = generate_embeddings_for_chunks(chunks)
+        chunks_with_embeddings = generate_embeddings_for_chunks(
+            chunks,
+            batch_size=settings.INGESTION_EMBEDDING_BATCH_SIZE,
+            on_batch=lambda: on_stage("embedding")
+        )
         
         # Step 4: Store in ChromaDB
+        on_stage("storing")
         add_chunks_to_vector_store(
             chroma_collection_name=settings.CHROMA_DEFAULT_COLLECTION_NAME,
             chunks_with_embeddings=chunks_with_embeddings
         )
+        update_collection_centroid(
+            db, pdf_record.collection_id, [embedding for _, embedding in chunks_with_embeddings]
+        )
+        record_pdf_indexed(db, pdf_record, chunks)
         
-        # Step 5: Update PDF status
+        # Step 5: Update PDF status; touching the collection invalidates cached answers
         pdf_record.status = "processed"
+        if pdf_record.collection is not None:
+            pdf_record.collection.updated_at = datetime.utcnow()
+        on_stage("recording")
         db.commit()
         
         logger.info(f"Successfully processed {pdf_record.filename} through RAG pipeline")
@@ -207,6 +249,9 @@ async def process_pdf_with_rag_pipeline(
             "message": f"Successfully processed {pdf_record.filename}"
         }
         
+    except PipelineAborted:
+        db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Error in RAG pipeline processing for {pdf_record.filename}: {str(e)}")
         pdf_record.status = "failed"
@@ -215,5 +260,6 @@ async def process_pdf_with_rag_pipeline(
         return {
             "success": False,
             "error": f"RAG pipeline processing failed: {str(e)}",
-            "pdf_id": pdf_record.id
+            "pdf_id": pdf_record.id,
+            "retryable": True
         }
@@ -3,41 +3,354 @@ RAG Service - Core Q&A Logic
 Orchestrates the RAG pipeline: retrieval, context preparation, and answer generation.
 """
 
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import base64
+import heapq
 import logging
+import time
 from datetime import datetime
 
 from ..models.db_models import Collection, QueryHistory
+from ..models.schemas import Collection as CollectionSchema
 from ..rag_components.embedder import get_embedding_model, generate_embeddings_for_chunks
-from ..rag_components.vector_store_interface import search_relevant_chunks
-from ..rag_components.llm_handler import generate_answer_from_context, construct_rag_prompt, extract_answer_with_fallback
+from ..rag_components.vector_store_interface import (
+    search_relevant_chunks,
+    search_relevant_chunks_batch,
+    search_scored_chunks_batch
+)
+from ..rag_components.llm_handler import (
+    generate_answer_from_context,
+    generate_answer_with_cascade,
+    stream_answer_from_context,
+    construct_rag_prompt,
+    extract_answer_with_fallback,
+    OLLAMA_TIMING_FIELDS
+)
 from ..rag_components.chunker import Chunk
+from ..rag_components.extractive_answerer import extract_best_sentence
+from ..rag_components.context_assembler import assemble_context, merge_adjacent_chunks
+from .answer_cache_service import answer_cache, collection_generation, normalize_question
+from .request_coalescing_service import qa_single_flight
+from .history_writer_service import enqueue_history_row
+from .collection_cache_service import collection_cache
+from .collection_routing_service import centroid_index
+from .collection_stats_service import EMPTY_COLLECTION_STATS, get_collection_stats_row
 from ..core.config import settings
+from ..core.metrics import EMBEDDED_TEXTS, EMBEDDING_BATCH_SIZE, EMBEDDING_DURATION
+from ..core.tracing import annotate_span, trace_span
 
 logger = logging.getLogger(__name__)
 
+UNAVAILABLE_ANSWER = "I'm sorry, I'm unable to generate an answer at this time. Please try again later."
+
+def _get_collection(db: Session, collection_id: int) -> Optional[CollectionSchema]:
+    """Get collection info from the collection metadata cache."""
+    return collection_cache.get(db, collection_id)
+
+def _embed_question(question_text: str) -> List[float]:
+    """Generate the question embedding."""
+    with trace_span("query_embedding"):
+        return _embed_questions([question_text])[0]
+
+def _embed_texts(texts: List[str], source: str) -> List[List[float]]:
+    """Embed texts in one model call, recording the call under the given metrics source."""
+    embedding_model = get_embedding_model()
+    EMBEDDING_BATCH_SIZE.labels(source=source).observe(len(texts))
+    EMBEDDED_TEXTS.labels(source=source).inc(len(texts))
+    with EMBEDDING_DURATION.labels(source=source).time():
+        embeddings = embedding_model.encode(texts, convert_to_numpy=True)
+    return [embedding.tolist() for embedding in embeddings]
+
+def _embed_questions(question_texts: List[str]) -> List[List[float]]:
+    """Generate embeddings for several questions in one model call."""
+    return _embed_texts(question_texts, source="query")
+
+def _embed_sentences(sentences: List[str]) -> List[List[float]]:
+    """Embed candidate answer sentences for extractive mode, kept apart from question metrics."""
+    return _embed_texts(sentences, source="extractive")
+
+def _search_chunks(collection: Collection, question_embedding: List[float], top_k: int) -> List[Chunk]:
+    """Retrieve relevant chunks from ChromaDB, filtered to the collection."""
+    relevant_chunks = search_relevant_chunks(
+        chroma_collection_name=settings.CHROMA_DEFAULT_COLLECTION_NAME,
+        query_embedding=question_embedding,
+        top_k=top_k,
+        filter_collection_id=str(collection.id)  # Use as filter for ChromaDB
+    )
+    logger.info(f"Retrieved {len(relevant_chunks)} relevant chunks")
+    return relevant_chunks
+
+def _search_chunks_batch(collection: Collection, question_embeddings: List[List[float]], top_k: int) -> List[List[Chunk]]:
+    """Retrieve relevant chunks for several questions on one collection in a single ChromaDB query."""
+    return search_relevant_chunks_batch(
+        chroma_collection_name=settings.CHROMA_DEFAULT_COLLECTION_NAME,
+        query_embeddings=question_embeddings,
+        top_k=top_k,
+        filter_collection_id=str(collection.id)
+    )
+
+def _search_collection_scored(
+    collection: CollectionSchema,
+    question_embedding: List[float],
+    top_k: int
+) -> Tuple[List[Tuple[Chunk, float]], float]:
+    """
+    Retrieve a collection's nearest chunks with their distances.
+    
+    Returns:
+        Tuple of ((chunk, distance) pairs, search time in milliseconds)
+    """
+    started = time.perf_counter()
+    scored = search_scored_chunks_batch(
+        chroma_collection_name=settings.CHROMA_DEFAULT_COLLECTION_NAME,
+        query_embeddings=[question_embedding],
+        top_k=top_k,
+        filter_collection_id=str(collection.id)
+    )[0]
+    return scored, round((time.perf_counter() - started) * 1000, 2)
+
+def _assemble_prompt(question_text: str, collection_name: str, relevant_chunks: List[Chunk]):
+    """
+    Merge overlapping chunks into spans, fit them into the context token budget
+    and build the prompt.
+    
+    Returns:
+        Tuple of (prompt, context_chunks, context_budget_report)
+    """
+    spans, merge_report = merge_adjacent_chunks(relevant_chunks)
+    context_chunks, context_budget = assemble_context(
+        spans,
+        token_budget=settings.LLM_CONTEXT_TOKEN_BUDGET,
+        min_trim_tokens=settings.LLM_CONTEXT_MIN_TRIM_TOKENS
+    )
+    context_budget.update(merge_report)
+    context_budget["chunks_retrieved"] = len(relevant_chunks)
+    prompt = construct_rag_prompt(
+        question=question_text,
+        context_chunks=context_chunks,
+        collection_name=collection_name
+    )
+    return prompt, context_chunks, context_budget
+
+def _cascade_policy(collection: Collection) -> Optional[str]:
+    """Model cascade policy for a collection, or None to use the default single model."""
+    policies = settings.LLM_CASCADE_COLLECTION_POLICIES
+    policy = policies.get(str(collection.id)) or policies.get(collection.name)
+    if policy is None and settings.LLM_CASCADE_ENABLED:
+        policy = "cascade"
+    return policy
+
+async def _generate_raw_answer(collection: Collection, prompt: str) -> Optional[str]:
+    """Generate with the collection's cascade policy, or the default model if it has none."""
+    policy = _cascade_policy(collection)
+    if policy is None:
+        return await generate_answer_from_context(prompt)
+    result = await generate_answer_with_cascade(prompt, policy=policy, stats_key=str(collection.id))
+    return result["text"]
+
+def _lookup_cached_answer(collection: Collection, question_text: str, top_k: int):
+    """
+    Check the answer cache, exact tier first, then the semantic tier.
+    
+    Returns:
+        Tuple of (cached_payload or None, question_embedding or None)
+    """
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None, None
+    generation = collection_generation(collection)
+    cached = answer_cache.lookup_exact(collection.id, generation, question_text, top_k)
+    if cached:
+        return cached, None
+    question_embedding = _embed_question(question_text)
+    cached = answer_cache.lookup_semantic(collection.id, generation, question_embedding, top_k)
+    return cached, question_embedding
+
+def _cache_scope(collections: List[Collection]) -> Tuple[Any, str]:
+    """
+    Answer cache key and generation for a search over collections. A single collection
+    shares the single-collection path's entries; a set of collections gets its own,
+    invalidated when any of them changes.
+    """
+    if len(collections) == 1:
+        return collections[0].id, collection_generation(collections[0])
+    ordered = sorted(collections, key=lambda c: c.id)
+    return tuple(c.id for c in ordered), "|".join(collection_generation(c) for c in ordered)
+
+def _build_sources(relevant_chunks: List[Chunk]) -> List[Dict]:
+    """Prepare the sources information returned alongside an answer."""
+    sources = []
+    for chunk in relevant_chunks:
+        source_info = {
+            "source_pdf": chunk.source_pdf_filename,
+            "article_title": chunk.article_title,
+            "page_numbers": chunk.page_numbers,
+            "chunk_preview": chunk.text[:200] + "..." if len(chunk.text) > 200 else chunk.text
+        }
+        sources.append(source_info)
+    return sources
+
+def _save_query_history(db: Session, collection_id: int, question_text: str, answer_text: str, sources_count: int):
+    """
+    Store a query in the history table; failures are logged, never raised.
+    The row goes to the write-behind buffer when it is running and has room,
+    otherwise it is committed here.
+    """
+    row = {
+        "collection_id": collection_id,
+        "question_text": question_text,
+        "answer_text": answer_text,
+        "sources_count": sources_count,
+        "timestamp": datetime.utcnow()
+    }
+    if enqueue_history_row(QueryHistory, row):
+        return
+    try:
+        db.add(QueryHistory(**row))
+        db.commit()
+        logger.info("Query history saved to database")
+    except Exception as e:
+        logger.error(f"Failed to save query history: {str(e)}")
+        db.rollback()
+
+def _extractive_answer(question_embedding: List[float], relevant_chunks: List[Chunk]) -> Optional[Dict]:
+    """
+    Answer with the retrieved sentence that best matches the question.
+    
+    Returns:
+        Payload with answer, sources, sources_count and extractive_score, or None if no
+        sentence matches confidently enough
+    """
+    extracted = extract_best_sentence(
+        question_embedding,
+        relevant_chunks,
+        embed_texts=_embed_sentences,
+        threshold=settings.EXTRACTIVE_ANSWER_THRESHOLD,
+        max_chunks=settings.EXTRACTIVE_MAX_CHUNKS,
+        min_words=settings.EXTRACTIVE_MIN_SENTENCE_WORDS
+    )
+    if not extracted:
+        return None
+    return {
+        "answer": extracted["text"],
+        "sources": _build_sources([extracted["chunk"]]),
+        "sources_count": 1,
+        "answer_mode": "extractive",
+        "extractive_score": extracted["score"]
+    }
+
+async def _run_answer_pipeline(
+    collection: Collection,
+    question_text: str,
+    top_k: int,
+    answer_mode: str = "generative"
+) -> Dict:
+    """
+    Cache lookup, retrieval, prompt assembly and generation for one question.
+    Touches no database session, so concurrent identical requests can share it.
+    In extractive mode a confidently matching sentence is returned without generation.
+    
+    Returns:
+        Payload with answer, sources and sources_count, plus cache_hit, extractive_score
+        or context_budget
+    """
+    # Answer from cache when this (or a paraphrased) question was answered before
+    with trace_span("cache_lookup"):
+        cached, question_embedding = _lookup_cached_answer(collection, question_text, top_k)
+        annotate_span(hit=cached["cache_hit"] if cached else "miss")
+    if cached:
+        return cached
+    
+    # Generate question embedding and retrieve relevant chunks
+    if question_embedding is None:
+        question_embedding = _embed_question(question_text)
+    with trace_span("vector_search", top_k=top_k):
+        relevant_chunks = _search_chunks(collection, question_embedding, top_k)
+        annotate_span(chunks=len(relevant_chunks))
+    
+    if answer_mode == "extractive":
+        with trace_span("extractive_match"):
+            extracted = _extractive_answer(question_embedding, relevant_chunks)
+        if extracted:
+            return extracted
+    
+    return await _generate_answer(collection, question_text, question_embedding, top_k, relevant_chunks)
+
+async def _generate_answer(
+    collection: Collection,
+    question_text: str,
+    question_embedding: List[float],
+    top_k: int,
+    relevant_chunks: List[Chunk]
+) -> Dict:
+    """
+    Prompt assembly, generation and answer caching for already retrieved chunks.
+    
+    Returns:
+        Payload with answer, sources, sources_count and context_budget
+    """
+    # Construct prompt with as much context as the token budget allows
+    with trace_span("prompt_construction"):
+        prompt, context_chunks, context_budget = _assemble_prompt(question_text, collection.name, relevant_chunks)
+        annotate_span(context_tokens=context_budget["tokens_used"])
+    
+    # Generate answer using LLM (Ollama's own timings are attached to this span)
+    generation_started = time.perf_counter()
+    with trace_span("llm_generation"):
+        raw_answer = await _generate_raw_answer(collection, prompt)
+    generation_seconds = time.perf_counter() - generation_started
+    
+    # Process and clean the answer
+    with trace_span("post_processing"):
+        if raw_answer:
+            processed_answer = extract_answer_with_fallback(raw_answer)
+        else:
+            processed_answer = UNAVAILABLE_ANSWER
+        
+        # Prepare sources information for the context actually used
+        payload = {
+            "answer": processed_answer,
+            "sources": _build_sources(context_chunks),
+            "sources_count": len(context_chunks)
+        }
+    
+    if raw_answer and settings.ANSWER_CACHE_ENABLED:
+        answer_cache.store(
+            collection.id, collection_generation(collection), question_text, question_embedding, top_k,
+            payload, generation_seconds
+        )
+    
+    return dict(payload, context_budget=context_budget)
+
 async def answer_question_from_collection(
     db: Session,
     collection_id: int,
     question_text: str,
-    top_k: int = 5
+    top_k: int = 5,
+    answer_mode: str = "generative"
 ) -> Dict:
     """
     Answer a question using RAG pipeline with ChromaDB filtering by collection.
+    Concurrent requests for the same normalized question, collection, top_k and
+    answer mode share one pipeline execution; each still records its own query history.
     
     Args:
         db: SQLAlchemy database session
         collection_id: Database collection ID
         question_text: The user's question
         top_k: Number of relevant chunks to retrieve
+        answer_mode: "generative", or "extractive" to try answering with a retrieved
+            sentence before falling back to generation
         
     Returns:
         Dictionary with answer, sources, and metadata
     """
     try:
         # Step 1: Get collection info from database
-        collection = db.query(Collection).filter(Collection.id == collection_id).first()
+        with trace_span("collection_lookup"):
+            collection = _get_collection(db, collection_id)
         if not collection:
             return {
                 "success": False,
@@ -48,85 +361,474 @@ async def answer_question_from_collection(
             }
         
         collection_name = collection.name
-        collection_id_string = str(collection.id)  # Use as filter for ChromaDB
         
         logger.info(f"Processing question for collection '{collection_name}' (ID: {collection_id})")
         
-        # Step 2: Generate question embedding
-        embedding_model = get_embedding_model()
-        question_embeddings = embedding_model.encode([question_text], convert_to_numpy=True)
-        question_embedding = question_embeddings[0].tolist()
-        
-        # Step 3: Retrieve relevant chunks from ChromaDB
-        relevant_chunks = search_relevant_chunks(
-            chroma_collection_name=settings.CHROMA_DEFAULT_COLLECTION_NAME,
-            query_embedding=question_embedding,
-            top_k=top_k,
-            filter_collection_id=collection_id_string
-        )
+        # Step 2: Run (or join an identical in-flight run of) the RAG pipeline
+        if settings.QA_REQUEST_COALESCING_ENABLED:
+            key = (collection_id, normalize_question(question_text), top_k, answer_mode)
+            result, shared = await qa_single_flight.do(
+                key, lambda: _run_answer_pipeline(collection, question_text, top_k, answer_mode)
+            )
+            if shared:
+                logger.info(f"Joined in-flight answer for question in collection {collection_id}")
+        else:
+            result = await _run_answer_pipeline(collection, question_text, top_k, answer_mode)
         
-        logger.info(f"Retrieved {len(relevant_chunks)} relevant chunks")
+        # Step 3: Store query history in database
+        with trace_span("history_write"):
+            _save_query_history(db, collection_id, question_text, result["answer"], result["sources_count"])
         
-        # Step 4: Construct prompt with context
-        prompt = construct_rag_prompt(
-            question=question_text,
-            context_chunks=relevant_chunks,
-            collection_name=collection_name
-        )
+        return dict(result, success=True, collection_name=collection_name, question=question_text)
         
-        # Step 5: Generate answer using LLM
-        raw_answer = await generate_answer_from_context(prompt)
+    except Exception as e:
+        logger.error(f"Error in RAG pipeline: {str(e)}")
+        return {
+            "success": False,
+            "error": f"RAG pipeline error: {str(e)}",
+            "answer": "I'm sorry, an error occurred while processing your question.",
+            "sources": [],
+            "collection_name": None
+        }
+
+async def stream_answer_from_collection(
+    db: Session,
+    collection_id: int,
+    question_text: str,
+    top_k: int = 5
+) -> AsyncIterator[Dict]:
+    """
+    Answer a question using the RAG pipeline, yielding events as they become available.
+    
+    Yields, in order:
+        {"event": "sources", "data": {...}}   once retrieval finishes
+        {"event": "token", "data": {"text": ...}}   for each generated token
+        {"event": "done", "data": {...}}      with the cleaned answer and timings
+    or a single {"event": "error", "data": {"error": ...}} if the pipeline fails.
+    Query history is stored after generation completes.
+    """
+    started = time.perf_counter()
+    try:
+        collection = _get_collection(db, collection_id)
+        if not collection:
+            yield {"event": "error", "data": {"error": f"Collection with ID {collection_id} not found"}}
+            return
         
-        # Step 6: Process and clean the answer
-        if raw_answer:
+        cached, question_embedding = _lookup_cached_answer(collection, question_text, top_k)
+        if cached:
+            yield {
+                "event": "sources",
+                "data": {
+                    "collection_name": collection.name,
+                    "question": question_text,
+                    "sources": cached["sources"],
+                    "sources_count": cached["sources_count"]
+                }
+            }
+            yield {"event": "token", "data": {"text": cached["answer"]}}
+            _save_query_history(db, collection_id, question_text, cached["answer"], cached["sources_count"])
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            yield {
+                "event": "done",
+                "data": {
+                    "success": True,
+                    "answer": cached["answer"],
+                    "sources_count": cached["sources_count"],
+                    "cache_hit": cached["cache_hit"],
+                    "timings": {"time_to_first_token_ms": elapsed_ms, "total_ms": elapsed_ms},
+                    "llm_stats": {}
+                }
+            }
+            return
+        
+        if question_embedding is None:
+            question_embedding = _embed_question(question_text)
+        relevant_chunks = _search_chunks(collection, question_embedding, top_k)
+        prompt, context_chunks, context_budget = _assemble_prompt(question_text, collection.name, relevant_chunks)
+        retrieval_done = time.perf_counter()
+        sources = _build_sources(context_chunks)
+        
+        yield {
+            "event": "sources",
+            "data": {
+                "collection_name": collection.name,
+                "question": question_text,
+                "sources": sources,
+                "sources_count": len(context_chunks),
+                "context_budget": context_budget
+            }
+        }
+        
+        tokens = []
+        first_token_at = None
+        llm_stats = {}
+        try:
+            async for part in stream_answer_from_context(prompt):
+                text = part.get("response", "")
+                if text:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    tokens.append(text)
+                    yield {"event": "token", "data": {"text": text}}
+                if part.get("done"):
+                    llm_stats = {
+                        key: part[key]
+                        for key in OLLAMA_TIMING_FIELDS
+                        if key in part
+                    }
+        except Exception as e:
+            # Keep whatever was generated; an empty answer falls back below
+            logger.error(f"Error streaming from LLM service: {str(e)}")
+        
+        # Mirror generate_answer_from_context: very short output counts as no answer
+        raw_answer = "".join(tokens).strip()
+        if len(raw_answer) >= 10:
             processed_answer = extract_answer_with_fallback(raw_answer)
+            if settings.ANSWER_CACHE_ENABLED:
+                answer_cache.store(
+                    collection.id, collection_generation(collection), question_text, question_embedding, top_k,
+                    {"answer": processed_answer, "sources": sources, "sources_count": len(context_chunks)},
+                    time.perf_counter() - retrieval_done
+                )
         else:
-            processed_answer = "I'm sorry, I'm unable to generate an answer at this time. Please try again later."
-        
-        # Step 7: Prepare sources information
-        sources = []
-        for chunk in relevant_chunks:
-            source_info = {
-                "source_pdf": chunk.source_pdf_filename,
-                "article_title": chunk.article_title,
-                "page_numbers": chunk.page_numbers,
-                "chunk_preview": chunk.text[:200] + "..." if len(chunk.text) > 200 else chunk.text
+            processed_answer = UNAVAILABLE_ANSWER
+        finished = time.perf_counter()
+        
+        _save_query_history(db, collection_id, question_text, processed_answer, len(context_chunks))
+        
+        yield {
+            "event": "done",
+            "data": {
+                "success": True,
+                "answer": processed_answer,
+                "sources_count": len(context_chunks),
+                "timings": {
+                    "retrieval_ms": round((retrieval_done - started) * 1000, 1),
+                    "time_to_first_token_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+                    "generation_ms": round((finished - retrieval_done) * 1000, 1),
+                    "total_ms": round((finished - started) * 1000, 1)
+                },
+                "llm_stats": llm_stats
             }
-            sources.append(source_info)
+        }
         
-        # Step 8: Store query history in database
-        try:
-            query_history = QueryHistory(
-                collection_id=collection_id,
-                question_text=question_text,
-                answer_text=processed_answer,
-                sources_count=len(relevant_chunks),
-                timestamp=datetime.utcnow()
+    except Exception as e:
+        logger.error(f"Error in streaming RAG pipeline: {str(e)}")
+        yield {"event": "error", "data": {"error": f"RAG pipeline error: {str(e)}"}}
+
+def _save_query_history_bulk(db: Session, rows: List[Dict]):
+    """Store many queries in one transaction (or the write-behind buffer); failures are logged, never raised."""
+    timestamp = datetime.utcnow()
+    rows = [row for row in rows if not enqueue_history_row(QueryHistory, dict(row, timestamp=timestamp))]
+    if not rows:
+        return
+    try:
+        db.add_all([QueryHistory(timestamp=timestamp, **row) for row in rows])
+        db.commit()
+        logger.info(f"Saved {len(rows)} query history rows to database")
+    except Exception as e:
+        logger.error(f"Failed to save query history batch: {str(e)}")
+        db.rollback()
+
+def _batch_result(index: int, item: Dict, collection: Collection, payload: Dict) -> Dict:
+    return {
+        "index": index,
+        "success": True,
+        "question": item["question"],
+        "collection_id": collection.id,
+        "collection_name": collection.name,
+        "answer": payload["answer"],
+        "sources": payload["sources"],
+        "sources_count": payload["sources_count"],
+        "cache_hit": payload.get("cache_hit"),
+        "answer_mode": payload.get("answer_mode"),
+        "extractive_score": payload.get("extractive_score")
+    }
+
+def _batch_error(index: int, item: Dict, error: str) -> Dict:
+    return {
+        "index": index,
+        "success": False,
+        "question": item.get("question"),
+        "collection_id": item.get("collection_id"),
+        "error": error
+    }
+
+async def answer_questions_batch(db: Session, questions: List[Dict]) -> AsyncIterator[Dict]:
+    """
+    Answer many questions, possibly across collections, yielding results in completion order.
+    
+    Embeddings for all uncached questions are computed in one model call, searches that
+    share a collection and top_k go to ChromaDB as one query, and LLM generations run
+    concurrently up to QA_BATCH_MAX_CONCURRENCY. Questions in extractive answer_mode
+    try a retrieved sentence first, as in answer_question_from_collection. Query history
+    rows are written in one transaction when the batch finishes (or the client goes away).
+    
+    Args:
+        db: SQLAlchemy database session
+        questions: Dicts with question, collection_id, top_k and optionally answer_mode
+        
+    Yields:
+        One result per question, tagged with its index in questions, then a final
+        {"done": True, ...} summary
+    """
+    started = time.perf_counter()
+    results = []          # Results known before any generation (errors, cache hits)
+    pending = []          # (index, item, collection, embedding) still needing retrieval
+    history = []
+    tasks = []
+    succeeded = 0
+    
+    def finished(result: Dict) -> Dict:
+        nonlocal succeeded
+        if result["success"]:
+            succeeded += 1
+            history.append({
+                "collection_id": result["collection_id"],
+                "question_text": result["question"],
+                "answer_text": result["answer"],
+                "sources_count": result["sources_count"]
+            })
+        return result
+    
+    try:
+        collection_ids = {item.get("collection_id") for item in questions}
+        collections = collection_cache.get_many(db, collection_ids)
+        
+        # Step 1: Validate and answer exact repeats from cache
+        for index, item in enumerate(questions):
+            validation = validate_question(item.get("question", ""))
+            collection = collections.get(item.get("collection_id"))
+            if not validation["valid"]:
+                results.append(_batch_error(index, item, validation["error"]))
+                continue
+            if collection is None:
+                results.append(_batch_error(index, item, f"Collection with ID {item.get('collection_id')} not found"))
+                continue
+            item = dict(item, question=validation["cleaned_question"])
+            cached = None
+            if settings.ANSWER_CACHE_ENABLED:
+                cached = answer_cache.lookup_exact(
+                    collection.id, collection_generation(collection), item["question"], item["top_k"]
+                )
+            if cached:
+                results.append(_batch_result(index, item, collection, cached))
+            else:
+                pending.append((index, item, collection))
+        
+        for result in results:
+            yield finished(result)
+        
+        # Step 2: Embed all remaining questions at once, then try the semantic cache
+        embeddings = []
+        if pending:
+            embeddings = await asyncio.to_thread(_embed_questions, [item["question"] for _, item, _ in pending])
+        
+        groups: Dict[tuple, List] = {}
+        for (index, item, collection), embedding in zip(pending, embeddings):
+            cached = None
+            if settings.ANSWER_CACHE_ENABLED:
+                cached = answer_cache.lookup_semantic(
+                    collection.id, collection_generation(collection), embedding, item["top_k"]
+                )
+            if cached:
+                yield finished(_batch_result(index, item, collection, cached))
+            else:
+                groups.setdefault((collection.id, item["top_k"]), []).append((index, item, collection, embedding))
+        
+        # Step 3: One vector search per (collection, top_k) group, generations under a concurrency cap
+        semaphore = asyncio.Semaphore(settings.QA_BATCH_MAX_CONCURRENCY)
+        
+        async def answer(index, item, collection, embedding, relevant_chunks):
+            if item.get("answer_mode") == "extractive":
+                try:
+                    extracted = await asyncio.to_thread(_extractive_answer, embedding, relevant_chunks)
+                except Exception as e:
+                    logger.error(f"Error answering batch question {index}: {str(e)}")
+                    return _batch_error(index, item, f"RAG pipeline error: {str(e)}")
+                if extracted:
+                    return _batch_result(index, item, collection, extracted)
+            async with semaphore:
+                try:
+                    payload = await _generate_answer(
+                        collection, item["question"], embedding, item["top_k"], relevant_chunks
+                    )
+                    return _batch_result(index, item, collection, payload)
+                except Exception as e:
+                    logger.error(f"Error answering batch question {index}: {str(e)}")
+                    return _batch_error(index, item, f"RAG pipeline error: {str(e)}")
+        
+        for (_, top_k), members in groups.items():
+            collection = members[0][2]
+            chunk_lists = await asyncio.to_thread(
+                _search_chunks_batch, collection, [member[3] for member in members], top_k
             )
-            db.add(query_history)
-            db.commit()
-            logger.info("Query history saved to database")
-        except Exception as e:
-            logger.error(f"Failed to save query history: {str(e)}")
-            db.rollback()
+            for (index, item, collection, embedding), relevant_chunks in zip(members, chunk_lists):
+                tasks.append(asyncio.ensure_future(answer(index, item, collection, embedding, relevant_chunks)))
+        
+        for next_done in asyncio.as_completed(tasks):
+            yield finished(await next_done)
+        
+        yield {
+            "done": True,
+            "total": len(questions),
+            "succeeded": succeeded,
+            "failed": len(questions) - succeeded,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    finally:
+        for task in tasks:
+            task.cancel()
+        _save_query_history_bulk(db, history)
+
+async def answer_question_across_collections(
+    db: Session,
+    collection_ids: Optional[List[int]],
+    question_text: str,
+    top_k: int = 5,
+    fan_out: Optional[int] = None
+) -> Dict:
+    """
+    Answer one question from several collections. The question is embedded once,
+    each collection is searched concurrently for its own top_k, and the results are
+    merged by distance into a single global top_k for one generation. Generation uses
+    the cascade policy of the collection with the closest chunk, answers are cached per
+    set of collections, and one history row is written against that collection.
+    
+    Args:
+        db: SQLAlchemy database session
+        collection_ids: Database collection IDs to search, or None to search all
+            collections by routing to the fan_out ones with the most similar centroids
+        question_text: The user's question
+        top_k: Number of relevant chunks to use across all collections
+        fan_out: Collections searched in routed mode (defaults to COLLECTION_ROUTING_FAN_OUT)
+        
+    Returns:
+        Dictionary with answer, sources and a per-collection retrieval breakdown
+    """
+    try:
+        question_embedding = None
+        routing_scores = {}
+        if collection_ids is None:
+            question_embedding = _embed_question(question_text)
+            with trace_span("collection_routing"):
+                routed = centroid_index.route(db, question_embedding, fan_out or settings.COLLECTION_ROUTING_FAN_OUT)
+                annotate_span(collections=len(routed))
+            if not routed:
+                return {
+                    "success": False,
+                    "error": "No collections have indexed content to route the question to",
+                    "answer": None,
+                    "sources": [],
+                    "collections": []
+                }
+            routing_scores = {
+                collection_id: round(score, 4) if score is not None else None
+                for collection_id, score in routed
+            }
+            collection_ids = list(routing_scores)
+        
+        with trace_span("collection_lookup"):
+            found = collection_cache.get_many(db, collection_ids)
+        missing = [collection_id for collection_id in collection_ids if collection_id not in found]
+        if missing:
+            return {
+                "success": False,
+                "error": f"Collections not found: {missing}",
+                "answer": None,
+                "sources": [],
+                "collections": []
+            }
+        collections = [found[collection_id] for collection_id in dict.fromkeys(collection_ids)]
+        
+        logger.info(f"Processing question across {len(collections)} collections")
+        
+        if question_embedding is None:
+            question_embedding = _embed_question(question_text)
+        with trace_span("vector_search", top_k=top_k, collections=len(collections)):
+            searches = await asyncio.gather(*(
+                asyncio.to_thread(_search_collection_scored, collection, question_embedding, top_k)
+                for collection in collections
+            ))
+            # Distances share one embedding space, so they rank chunks across collections
+            ranked = heapq.nsmallest(
+                top_k, (pair for scored, _ in searches for pair in scored), key=lambda pair: pair[1]
+            )
+            relevant_chunks = [chunk for chunk, _ in ranked]
+            annotate_span(chunks=len(relevant_chunks))
+        
+        # The collection holding the closest chunk owns the query: its cascade policy
+        # generates the answer and its history gets the (single) row
+        searched = [(scored[0][1], collection) for collection, (scored, _) in zip(collections, searches) if scored]
+        primary = min(searched, key=lambda pair: pair[0])[1] if searched else collections[0]
+        
+        with trace_span("prompt_construction"):
+            prompt, context_chunks, context_budget = _assemble_prompt(
+                question_text, ", ".join(c.name for c in collections), relevant_chunks
+            )
+        
+        scope, generation = _cache_scope(collections)
+        cached = None
+        if settings.ANSWER_CACHE_ENABLED:
+            with trace_span("cache_lookup"):
+                cached = answer_cache.lookup_exact(scope, generation, question_text, top_k) or \
+                    answer_cache.lookup_semantic(scope, generation, question_embedding, top_k)
+                annotate_span(hit=cached["cache_hit"] if cached else "miss")
+        
+        if cached:
+            answer, sources, sources_count = cached["answer"], cached["sources"], cached["sources_count"]
+        else:
+            generation_started = time.perf_counter()
+            with trace_span("llm_generation"):
+                raw_answer = await _generate_raw_answer(primary, prompt)
+            answer = extract_answer_with_fallback(raw_answer) if raw_answer else UNAVAILABLE_ANSWER
+            sources, sources_count = _build_sources(context_chunks), len(context_chunks)
+            if raw_answer and settings.ANSWER_CACHE_ENABLED:
+                answer_cache.store(
+                    scope, generation, question_text, question_embedding, top_k,
+                    {"answer": answer, "sources": sources, "sources_count": sources_count},
+                    time.perf_counter() - generation_started
+                )
+        
+        used = {}
+        for chunk in context_chunks:
+            used[chunk.collection_id] = used.get(chunk.collection_id, 0) + 1
+        breakdown = [
+            {
+                "collection_id": collection.id,
+                "collection_name": collection.name,
+                "chunks_retrieved": len(scored),
+                "chunks_used": used.get(str(collection.id), 0),
+                "best_distance": round(scored[0][1], 4) if scored else None,
+                "search_ms": search_ms,
+                "routing_score": routing_scores.get(collection.id)
+            }
+            for collection, (scored, search_ms) in zip(collections, searches)
+        ]
+        
+        with trace_span("history_write"):
+            _save_query_history(db, primary.id, question_text, answer, sources_count)
         
         return {
             "success": True,
-            "answer": processed_answer,
+            "answer": answer,
             "sources": sources,
-            "collection_name": collection_name,
-            "sources_count": len(relevant_chunks),
-            "question": question_text
+            "sources_count": sources_count,
+            "question": question_text,
+            "collections": breakdown,
+            "routed": bool(routing_scores),
+            "cache_hit": cached["cache_hit"] if cached else None,
+            "context_budget": None if cached else context_budget
         }
         
     except Exception as e:
-        logger.error(f"Error in RAG pipeline: {str(e)}")
+        logger.error(f"Error in multi-collection RAG pipeline: {str(e)}")
         return {
             "success": False,
             "error": f"RAG pipeline error: {str(e)}",
             "answer": "I'm sorry, an error occurred while processing your question.",
             "sources": [],
-            "collection_name": None
+            "collections": []
         }
 
 async def get_collection_summary(db: Session, collection_id: int) -> Dict:
@@ -142,26 +844,26 @@ async def get_collection_summary(db: Session, collection_id: int) -> Dict:
     """
     try:
         # Get collection from database
-        collection = db.query(Collection).filter(Collection.id == collection_id).first()
+        collection = _get_collection(db, collection_id)
         if not collection:
             return {
                 "success": False,
                 "error": f"Collection with ID {collection_id} not found"
             }
         
-        # Get PDF count from database
-        pdf_count = len(collection.pdfs) if collection.pdfs else 0
-        
-        # Get chunk count from ChromaDB (if possible)
-        from ..rag_components.vector_store_interface import get_collection_stats
-        chroma_stats = get_collection_stats(settings.CHROMA_DEFAULT_COLLECTION_NAME)
+        # Read the incrementally maintained counters; until the startup backfill has
+        # counted a collection that has none, report zeros rather than recount here
+        stats = get_collection_stats_row(db, collection_id) or EMPTY_COLLECTION_STATS
         
         return {
             "success": True,
             "collection_name": collection.name,
             "collection_id": collection_id,
-            "pdf_count": pdf_count,
-            "total_chunks_in_chroma": chroma_stats.get("total_chunks", 0),
+            "pdf_count": stats["pdf_count"],
+            "total_chunks_in_chroma": stats["chunk_count"],
+            "total_text_bytes": stats["text_bytes"],
+            "total_tokens": stats["token_count"],
+            "last_ingested_at": stats["last_ingested_at"],
             "created_at": collection.created_at,
             "description": collection.description
         }
@@ -173,40 +875,114 @@ async def get_collection_summary(db: Session, collection_id: int) -> Dict:
             "error": f"Error getting collection summary: {str(e)}"
         }
 
-async def get_recent_queries(db: Session, collection_id: int, limit: int = 10) -> List[Dict]:
+def _encode_history_cursor(timestamp: datetime, query_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{query_id}".encode()).decode()
+
+
+def _decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    timestamp, query_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(timestamp), int(query_id)
+
+
+def _history_row_dict(query) -> Dict:
+    return {
+        "id": query.id,
+        "question": query.question_text,
+        "answer": query.answer_text,
+        "sources_count": query.sources_count,
+        "timestamp": query.timestamp
+    }
+
+
+async def get_recent_queries(db: Session, collection_id: int, limit: int = 10, cursor: Optional[str] = None) -> Dict:
     """
-    Get recent queries for a collection.
+    Get a page of a collection's queries, newest first.
+    Pages by keyset on (timestamp, id) rather than offset, so every page is one
+    range scan of the (collection_id, timestamp DESC, id) index however deep it is.
     
     Args:
         db: SQLAlchemy database session
         collection_id: Database collection ID
-        limit: Number of recent queries to return
+        limit: Number of queries to return
+        cursor: next_cursor of the previous page; None for the newest page
         
     Returns:
-        List of recent query dictionaries
+        Dictionary with the page of queries and the cursor of the next page
+        (None on the last page)
     """
     try:
-        queries = db.query(QueryHistory)\
-            .filter(QueryHistory.collection_id == collection_id)\
-            .order_by(QueryHistory.timestamp.desc())\
-            .limit(limit)\
+        limit = max(1, min(limit, settings.QUERY_HISTORY_MAX_PAGE_SIZE))
+        query = db.query(QueryHistory).filter(QueryHistory.collection_id == collection_id)
+        if cursor:
+            try:
+                after_timestamp, after_id = _decode_history_cursor(cursor)
+            except (ValueError, UnicodeDecodeError):
+                return {"success": False, "error": "Invalid cursor"}
+            # Index order within one timestamp is id ascending; the <= bound keeps the scan on the index
+            query = query.filter(
+                QueryHistory.timestamp <= after_timestamp,
+                or_(QueryHistory.timestamp < after_timestamp, QueryHistory.id > after_id)
+            )
+        rows = query.order_by(QueryHistory.timestamp.desc(), QueryHistory.id)\
+            .limit(limit + 1)\
             .all()
         
-        result = []
-        for query in queries:
-            result.append({
-                "id": query.id,
-                "question": query.question_text,
-                "answer": query.answer_text,
-                "sources_count": query.sources_count,
-                "timestamp": query.timestamp
-            })
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = _encode_history_cursor(page[-1].timestamp, page[-1].id)
         
-        return result
+        return {
+            "success": True,
+            "queries": [_history_row_dict(row) for row in page],
+            "next_cursor": next_cursor
+        }
         
     except Exception as e:
         logger.error(f"Error getting recent queries: {str(e)}")
-        return []
+        return {"success": False, "error": f"Failed to get recent queries: {str(e)}"}
+
+
+def iter_query_history(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    collection_id: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    Stream query history in a time range, oldest first.
+    Rows come from a server-side cursor, QUERY_HISTORY_EXPORT_BATCH_SIZE at a time,
+    and only plain column tuples are loaded, so memory stays flat for any range.
+    
+    Args:
+        db: SQLAlchemy database session, used only by this iterator until it is exhausted
+        start: Inclusive lower bound on the query timestamp
+        end: Exclusive upper bound on the query timestamp
+        collection_id: Restrict to one collection
+        
+    Yields:
+        One dictionary per query
+    """
+    statement = select(
+        QueryHistory.id,
+        QueryHistory.collection_id,
+        QueryHistory.question_text,
+        QueryHistory.answer_text,
+        QueryHistory.sources_count,
+        QueryHistory.timestamp
+    )
+    if start is not None:
+        statement = statement.where(QueryHistory.timestamp >= start)
+    if end is not None:
+        statement = statement.where(QueryHistory.timestamp < end)
+    if collection_id is not None:
+        statement = statement.where(QueryHistory.collection_id == collection_id)
+    statement = statement.order_by(QueryHistory.timestamp, QueryHistory.id)\
+        .execution_options(yield_per=settings.QUERY_HISTORY_EXPORT_BATCH_SIZE)
+    
+    for row in db.execute(statement):
+        yield dict(_history_row_dict(row), collection_id=row.collection_id)
+
 
 def validate_question(question_text: str) -> Dict:
     """
@@ -0,0 +1,64 @@
+"""
+Request Coalescing Service - Single-flight execution of identical in-flight work
+Concurrent callers asking for the same key share one execution and all receive
+its result, so a burst of identical questions costs one embed/search/generate.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Process-local registry of in-flight executions keyed by request identity."""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {
+            "executions": 0,
+            "coalesced": 0
+        }
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        The execution runs as its own task, so a caller that disconnects does not
+        cancel the work the other callers are waiting on.
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller joined
+            an execution started by another caller
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.stats["executions"] += 1
+        return await asyncio.shield(task), shared
+
+    def get_stats(self) -> Dict:
+        requests = self.stats["executions"] + self.stats["coalesced"]
+        return dict(
+            self.stats,
+            executions_saved=self.stats["coalesced"],
+            coalescing_rate=round(self.stats["coalesced"] / requests, 4) if requests else 0.0,
+            in_flight=len(self._in_flight)
+        )
+
+
+qa_single_flight = SingleFlight()
+
+
+def get_request_coalescing_stats() -> Dict:
+    return qa_single_flight.get_stats()
@@ -0,0 +1,344 @@
+"""
+Vector GC Service - Garbage collection for orphaned vectors
+Reconciles ChromaDB chunk metadata against PostgreSQL and deletes vectors whose
+PDF or collection no longer exists. Only one process runs a pass at a time
+(a Postgres advisory lock elects the leader among API workers).
+
+Once enough of the collection has been deleted that the index is mostly
+tombstones, the report recommends a rebuild. Deletions since the last rebuild are
+counted in the vector_index_state table, so the ratio survives restarts. rebuild_vector_collection() swaps
+collections and must run with the API stopped (`db_manager.py rebuild-vector-collection`).
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.db_models import Collection, PDF, VectorIndexState
+from ..rag_components.vector_store_interface import get_or_create_collection, initialize_vector_store
+
+logger = logging.getLogger(__name__)
+
+# Process-local GC metrics, reported through get_vector_gc_stats()
+_gc_stats = {
+    "runs": 0,
+    "dry_runs": 0,
+    "orphans_found_total": 0,
+    "orphans_deleted_total": 0,
+    "bytes_reclaimed_total": 0,
+    "last_run_at": None,
+    "last_report": None
+}
+
+_gc_task = None
+
+# pg_try_advisory_xact_lock key shared by every process running the GC
+_GC_LOCK_KEY = 7_246_411_301
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _try_gc_leader_lock(db: Session) -> bool:
+    """Take the GC lock for the session's transaction; False if another process holds it."""
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _GC_LOCK_KEY}).scalar())
+
+
+def _record_deletions(db: Session, chroma_collection_name: str, deleted: int) -> int:
+    """Add a pass's deletions to the collection's durable counter and return the new total."""
+    state = db.get(VectorIndexState, chroma_collection_name)
+    if state is None:
+        state = VectorIndexState(chroma_collection_name=chroma_collection_name, deleted_since_rebuild=0)
+        db.add(state)
+    state.deleted_since_rebuild += deleted
+    total = state.deleted_since_rebuild
+    db.commit()
+    return total
+
+
+def record_vector_rebuild(db: Session, chroma_collection_name: str):
+    """Reset the deletion counter after rebuild_vector_collection() compacted the collection."""
+    state = db.get(VectorIndexState, chroma_collection_name)
+    if state is None:
+        state = VectorIndexState(chroma_collection_name=chroma_collection_name)
+        db.add(state)
+    state.deleted_since_rebuild = 0
+    state.rebuilt_at = datetime.utcnow()
+    db.commit()
+
+
+def _still_orphaned(db: Session, candidates: List[Tuple[str, Optional[int], Optional[int]]]) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    Re-read the owners of candidate chunks and keep those still missing. PDFs and
+    collections created after the scan's snapshot was taken are not orphans.
+    """
+    pdf_ids = {pdf_db_id for _, pdf_db_id, _ in candidates if pdf_db_id is not None}
+    collection_ids = {collection_id for _, _, collection_id in candidates if collection_id is not None}
+    existing_pdfs = {row[0] for row in db.query(PDF.id).filter(PDF.id.in_(pdf_ids)).all()} if pdf_ids else set()
+    existing_collections = (
+        {row[0] for row in db.query(Collection.id).filter(Collection.id.in_(collection_ids)).all()}
+        if collection_ids else set()
+    )
+    return [
+        (chunk_id, pdf_db_id, collection_id)
+        for chunk_id, pdf_db_id, collection_id in candidates
+        if (pdf_db_id is not None and pdf_db_id not in existing_pdfs)
+        or (collection_id is not None and collection_id not in existing_collections)
+    ]
+
+
+def find_orphaned_vectors(db: Session, chroma_collection_name: str, batch_size: int) -> Dict:
+    """
+    Scan ChromaDB metadata and return ids of chunks whose PDF or collection is gone.
+    Rows without a numeric pdf_db_id/collection_id are left alone, and candidates
+    are re-checked against the database after the scan.
+
+    Returns:
+        Dictionary with scanned count, orphan ids, and orphan counts per pdf_db_id
+    """
+    valid_pdf_ids: Set[int] = {row[0] for row in db.query(PDF.id).all()}
+    valid_collection_ids: Set[int] = {row[0] for row in db.query(Collection.id).all()}
+
+    collection = get_or_create_collection(chroma_collection_name)
+    total = collection.count()
+    scanned = 0
+    candidates: List[Tuple[str, Optional[int], Optional[int]]] = []
+
+    for offset in range(0, total, batch_size):
+        batch = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+        if not batch["ids"]:
+            break
+        for chunk_id, metadata in zip(batch["ids"], batch["metadatas"]):
+            pdf_db_id = _as_int(metadata.get("pdf_db_id"))
+            collection_id = _as_int(metadata.get("collection_id"))
+            pdf_missing = pdf_db_id is not None and pdf_db_id not in valid_pdf_ids
+            collection_missing = collection_id is not None and collection_id not in valid_collection_ids
+            if pdf_missing or collection_missing:
+                candidates.append((chunk_id, pdf_db_id, collection_id))
+        scanned += len(batch["ids"])
+
+    orphan_ids: List[str] = []
+    orphans_by_pdf: Dict[int, int] = {}
+    for chunk_id, pdf_db_id, _ in _still_orphaned(db, candidates):
+        orphan_ids.append(chunk_id)
+        orphans_by_pdf[pdf_db_id] = orphans_by_pdf.get(pdf_db_id, 0) + 1
+
+    return {
+        "total_vectors": total,
+        "scanned": scanned,
+        "orphan_ids": orphan_ids,
+        "orphans_by_pdf": orphans_by_pdf
+    }
+
+
+def _delete_orphans(collection, orphan_ids: List[str], batch_size: int) -> int:
+    """Delete orphans in bulk batches and return the estimated bytes reclaimed."""
+    bytes_reclaimed = 0
+    for start in range(0, len(orphan_ids), batch_size):
+        batch_ids = orphan_ids[start:start + batch_size]
+        rows = collection.get(ids=batch_ids, include=["embeddings", "documents"])
+        for embedding, document in zip(rows["embeddings"], rows["documents"]):
+            # float32 vector plus the stored document text
+            bytes_reclaimed += len(embedding) * 4 + len((document or "").encode("utf-8"))
+        collection.delete(ids=batch_ids)
+        logger.info(f"Vector GC deleted {start + len(batch_ids)}/{len(orphan_ids)} orphaned chunks")
+    return bytes_reclaimed
+
+
+def rebuild_vector_collection(chroma_collection_name: str, batch_size: int) -> Dict:
+    """
+    Rebuild a ChromaDB collection by copying its live rows into a fresh collection
+    and swapping it in under the original name. This drops the deleted entries
+    that ChromaDB otherwise keeps in its HNSW index.
+
+    Offline operation: writes made during the copy would be lost, and a lookup of the
+    name between the delete and the rename would recreate it empty. Run it with the
+    API stopped. A rebuild interrupted after the delete is completed by the next run.
+    """
+    client = initialize_vector_store()
+    rebuild_name = f"{chroma_collection_name}_rebuild"
+    existing = {getattr(collection, "name", collection) for collection in client.list_collections()}
+
+    if rebuild_name in existing and chroma_collection_name not in existing:
+        # Interrupted between the delete and the rename: the copy holds all the data
+        target = client.get_collection(rebuild_name)
+        target.modify(name=chroma_collection_name)
+        logger.info(f"Completed interrupted rebuild of ChromaDB collection '{chroma_collection_name}'")
+        return {"rows": target.count(), "recovered": True}
+
+    source = get_or_create_collection(chroma_collection_name)
+    if rebuild_name in existing:
+        client.delete_collection(rebuild_name)  # Partial copy from an interrupted rebuild
+    target = get_or_create_collection(rebuild_name)
+
+    total = source.count()
+    for offset in range(0, total, batch_size):
+        batch = source.get(
+            limit=batch_size,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        if not batch["ids"]:
+            break
+        target.add(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"]
+        )
+
+    copied = target.count()
+    if copied != total:
+        client.delete_collection(rebuild_name)
+        raise RuntimeError(f"Rebuild copied {copied} of {total} rows; original collection kept")
+
+    client.delete_collection(chroma_collection_name)
+    target.modify(name=chroma_collection_name)
+    logger.info(f"Rebuilt ChromaDB collection '{chroma_collection_name}' with {copied} rows")
+
+    return {"rows": copied, "recovered": False}
+
+
+def collect_vector_garbage(
+    db: Session,
+    dry_run: bool = False,
+    chroma_collection_name: str = None,
+    batch_size: int = None
+) -> Dict:
+    """
+    Run one garbage collection pass over the vector store.
+
+    Args:
+        db: SQLAlchemy database session
+        dry_run: Only report what would be deleted
+        chroma_collection_name: ChromaDB collection to reconcile
+        batch_size: Rows scanned/deleted per ChromaDB call
+
+    Returns:
+        Dictionary with the GC report
+    """
+    chroma_collection_name = chroma_collection_name or settings.CHROMA_DEFAULT_COLLECTION_NAME
+    batch_size = batch_size or settings.VECTOR_GC_BATCH_SIZE
+
+    try:
+        if not _try_gc_leader_lock(db):
+            return {
+                "success": False,
+                "dry_run": dry_run,
+                "collection_name": chroma_collection_name,
+                "error": "Another vector GC pass is running"
+            }
+        scan = find_orphaned_vectors(db, chroma_collection_name, batch_size)
+        orphan_ids = scan["orphan_ids"]
+
+        report = {
+            "success": True,
+            "dry_run": dry_run,
+            "collection_name": chroma_collection_name,
+            "total_vectors": scan["total_vectors"],
+            "scanned": scan["scanned"],
+            "orphans_found": len(orphan_ids),
+            "orphans_by_pdf": scan["orphans_by_pdf"],
+            "orphans_deleted": 0,
+            "bytes_reclaimed": 0,
+            "rebuild_recommended": False
+        }
+
+        _gc_stats["orphans_found_total"] += len(orphan_ids)
+        _gc_stats["last_run_at"] = datetime.utcnow().isoformat()
+
+        if dry_run:
+            _gc_stats["dry_runs"] += 1
+            _gc_stats["last_report"] = report
+            return report
+
+        collection = get_or_create_collection(chroma_collection_name)
+        if orphan_ids:
+            report["bytes_reclaimed"] = _delete_orphans(collection, orphan_ids, batch_size)
+            report["orphans_deleted"] = len(orphan_ids)
+
+        _gc_stats["runs"] += 1
+        _gc_stats["orphans_deleted_total"] += report["orphans_deleted"]
+        _gc_stats["bytes_reclaimed_total"] += report["bytes_reclaimed"]
+
+        # Fraction of index entries deleted since the last rebuild
+        live = scan["total_vectors"] - report["orphans_deleted"]
+        deleted = _record_deletions(db, chroma_collection_name, report["orphans_deleted"])
+        deleted_fraction = deleted / (live + deleted) if (live + deleted) else 0.0
+        report["deleted_fraction"] = round(deleted_fraction, 4)
+
+        if deleted and deleted_fraction >= settings.VECTOR_GC_REBUILD_THRESHOLD:
+            report["rebuild_recommended"] = True
+            logger.warning(
+                f"{deleted_fraction:.0%} of '{chroma_collection_name}' is deleted entries; "
+                f"run `db_manager.py rebuild-vector-collection` with the API stopped"
+            )
+
+        _gc_stats["last_report"] = report
+        logger.info(
+            f"Vector GC: {report['orphans_deleted']} orphans deleted, "
+            f"{report['bytes_reclaimed']} bytes reclaimed"
+        )
+        return report
+
+    except Exception as e:
+        logger.error(f"Error during vector garbage collection: {str(e)}")
+        return {
+            "success": False,
+            "dry_run": dry_run,
+            "collection_name": chroma_collection_name,
+            "error": f"Vector GC failed: {str(e)}"
+        }
+
+
+def get_vector_gc_stats() -> Dict:
+    """Return cumulative GC metrics for this process."""
+    return dict(_gc_stats)
+
+
+async def _vector_gc_loop(interval_seconds: float):
+    from ..db.session import SessionLocal
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        db = SessionLocal()
+        try:
+            # Every worker wakes up; the advisory lock lets one of them run the pass
+            await asyncio.to_thread(collect_vector_garbage, db)
+        except Exception as e:
+            logger.error(f"Background vector GC failed: {str(e)}")
+        finally:
+            db.close()
+
+
+def start_vector_gc_task():
+    """Start the periodic background reconciler if enabled."""
+    global _gc_task
+    if not settings.VECTOR_GC_ENABLED or _gc_task is not None:
+        return
+    _gc_task = asyncio.create_task(_vector_gc_loop(settings.VECTOR_GC_INTERVAL_SECONDS))
+    logger.info(f"Started background vector GC (every {settings.VECTOR_GC_INTERVAL_SECONDS}s)")
+
+
+async def stop_vector_gc_task():
+    """Cancel the background reconciler."""
+    global _gc_task
+    if _gc_task is None:
+        return
+    _gc_task.cancel()
+    try:
+        await _gc_task
+    except asyncio.CancelledError:
+        pass
+    _gc_task = None
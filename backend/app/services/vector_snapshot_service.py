@@ -0,0 +1,356 @@
+"""
+Vector Snapshot Service - Export and restore of ChromaDB data
+Streams chunk ids, embeddings, documents and metadata into a snapshot directory
+so the vector store can be rebuilt without re-running extraction and embedding.
+
+Snapshot layout:
+    <snapshot_dir>/manifest.json
+    <snapshot_dir>/<chroma_collection>/ids.jsonl
+    <snapshot_dir>/<chroma_collection>/embeddings.npy      (float32, memory-mapped)
+    <snapshot_dir>/<chroma_collection>/documents.jsonl
+    <snapshot_dir>/<chroma_collection>/metadatas.jsonl
+    <snapshot_dir>/<chroma_collection>/restore_progress.json (present only while a restore is incomplete)
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..core.config import settings
+from ..rag_components.vector_store_interface import get_existing_collection, get_or_create_collection
+from .answer_cache_service import answer_cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+PROGRESS_FILENAME = "restore_progress.json"
+SNAPSHOT_FILES = ["ids.jsonl", "embeddings.npy", "documents.jsonl", "metadatas.jsonl"]
+
+
+def _file_checksum(path: Path, block_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 checksum of a file without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_jsonl(path: Path):
+    """Yield one decoded JSON value per line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def resolve_snapshot_dir(snapshot_dir: str) -> str:
+    """
+    Resolve a snapshot directory given over the API relative to VECTOR_SNAPSHOT_DIR.
+
+    Raises:
+        ValueError if the path resolves outside VECTOR_SNAPSHOT_DIR
+    """
+    base = Path(settings.VECTOR_SNAPSHOT_DIR).resolve()
+    resolved = (base / snapshot_dir).resolve()
+    if resolved != base and base not in resolved.parents:
+        raise ValueError(f"Snapshot directory must be inside {settings.VECTOR_SNAPSHOT_DIR}")
+    return str(resolved)
+
+
+def _export_collection(collection_name: str, target_dir: Path, batch_size: int) -> Dict:
+    """
+    Stream a single ChromaDB collection into target_dir.
+
+    Returns:
+        Manifest entry for the collection (row count, dimension, file checksums)
+    """
+    collection = get_existing_collection(collection_name)  # Never create an empty one just to export it
+    total = collection.count()
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    embeddings_path = target_dir / "embeddings.npy"
+    embeddings_out = None
+    dimension = 0
+    written = 0
+
+    with open(target_dir / "ids.jsonl", "w", encoding="utf-8") as ids_f, \
+         open(target_dir / "documents.jsonl", "w", encoding="utf-8") as docs_f, \
+         open(target_dir / "metadatas.jsonl", "w", encoding="utf-8") as meta_f:
+
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            ids = batch["ids"]
+            if not ids:
+                break
+
+            vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+            if embeddings_out is None:
+                # Size the memmap once the embedding dimension is known
+                dimension = vectors.shape[1]
+                embeddings_out = np.lib.format.open_memmap(
+                    embeddings_path, mode="w+", dtype=np.float32, shape=(total, dimension)
+                )
+
+            # Rows may be added concurrently; never write past the sized memmap
+            rows = min(len(ids), total - written)
+            embeddings_out[written:written + rows] = vectors[:rows]
+
+            documents = batch["documents"] or [None] * len(ids)
+            metadatas = batch["metadatas"] or [None] * len(ids)
+            for i in range(rows):
+                ids_f.write(json.dumps(ids[i]) + "\n")
+                docs_f.write(json.dumps(documents[i]) + "\n")
+                meta_f.write(json.dumps(metadatas[i]) + "\n")
+
+            written += rows
+            logger.info(f"Exported {written}/{total} rows from '{collection_name}'")
+            if written >= total:
+                break
+
+    if embeddings_out is None:
+        # Empty collection: still write a valid (0, 0) array so restore is uniform
+        embeddings_out = np.lib.format.open_memmap(
+            embeddings_path, mode="w+", dtype=np.float32, shape=(0, 0)
+        )
+    embeddings_out.flush()
+    del embeddings_out
+
+    return {
+        "count": written,
+        "dimension": dimension,
+        "checksums": {name: _file_checksum(target_dir / name) for name in SNAPSHOT_FILES}
+    }
+
+
+def export_vector_snapshot(
+    snapshot_dir: Optional[str] = None,
+    collection_names: Optional[List[str]] = None,
+    batch_size: Optional[int] = None
+) -> Dict:
+    """
+    Export ChromaDB collections into a snapshot directory.
+
+    Args:
+        snapshot_dir: Target directory (defaults to a timestamped folder under VECTOR_SNAPSHOT_DIR)
+        collection_names: ChromaDB collections to export (defaults to the shared RAG collection)
+        batch_size: Rows fetched per ChromaDB call
+
+    Returns:
+        Dictionary with export results
+    """
+    try:
+        if snapshot_dir is None:
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+            snapshot_dir = str(Path(settings.VECTOR_SNAPSHOT_DIR) / f"snapshot_{stamp}")
+        collection_names = collection_names or [settings.CHROMA_DEFAULT_COLLECTION_NAME]
+        batch_size = batch_size or settings.VECTOR_SNAPSHOT_BATCH_SIZE
+
+        root = Path(snapshot_dir)
+        root.mkdir(parents=True, exist_ok=True)
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": datetime.utcnow().isoformat(),
+            "embedding_model": settings.EMBEDDING_MODEL_NAME,
+            "collections": {}
+        }
+
+        for name in collection_names:
+            logger.info(f"Exporting ChromaDB collection '{name}' to {root}")
+            manifest["collections"][name] = _export_collection(name, root / name, batch_size)
+
+        # Write the manifest last so a partial export is never mistaken for a complete one
+        with open(root / MANIFEST_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        total_rows = sum(entry["count"] for entry in manifest["collections"].values())
+        logger.info(f"Vector snapshot written to {root}: {total_rows} rows")
+
+        return {
+            "success": True,
+            "snapshot_dir": str(root),
+            "collections": {name: entry["count"] for name, entry in manifest["collections"].items()},
+            "total_rows": total_rows,
+            "message": f"Exported {total_rows} rows to {root}"
+        }
+
+    except Exception as e:
+        logger.error(f"Error exporting vector snapshot: {str(e)}")
+        return {
+            "success": False,
+            "error": f"Vector snapshot export failed: {str(e)}"
+        }
+
+
+def _load_progress(path: Path) -> int:
+    if not path.exists():
+        return 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("rows_restored", 0))
+    except (ValueError, OSError):
+        return 0
+
+
+def _save_progress(path: Path, rows_restored: int):
+    # Write-then-rename so an interrupted restore never leaves a corrupt progress file
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"rows_restored": rows_restored, "updated_at": datetime.utcnow().isoformat()}, f)
+    tmp_path.replace(path)
+
+
+def _restore_collection(
+    collection_name: str,
+    source_dir: Path,
+    entry: Dict,
+    batch_size: int,
+    resume: bool
+) -> Dict:
+    """
+    Bulk-load one collection from source_dir, resuming from the last committed batch.
+    The progress file is removed once the last batch is written, so a later restore of
+    the same snapshot (e.g. into an emptied vector store) loads every row again.
+    """
+    progress_path = source_dir / PROGRESS_FILENAME
+    start = _load_progress(progress_path) if resume else 0
+    total = entry["count"]
+
+    if start >= total:
+        # Left by a restore that finished before its file could be removed; not a partial run
+        start = 0
+
+    collection = get_or_create_collection(collection_name)
+    embeddings = np.load(source_dir / "embeddings.npy", mmap_mode="r")
+
+    ids_iter = _read_jsonl(source_dir / "ids.jsonl")
+    docs_iter = _read_jsonl(source_dir / "documents.jsonl")
+    meta_iter = _read_jsonl(source_dir / "metadatas.jsonl")
+
+    # Skip rows committed by a previous run
+    for _ in range(start):
+        next(ids_iter), next(docs_iter), next(meta_iter)
+
+    restored = 0
+    position = start
+    while position < total:
+        end = min(position + batch_size, total)
+        count = end - position
+        ids = [next(ids_iter) for _ in range(count)]
+        documents = [next(docs_iter) for _ in range(count)]
+        metadatas = [next(meta_iter) for _ in range(count)]
+
+        # Upsert keeps a re-run of a partially committed batch idempotent
+        collection.upsert(
+            ids=ids,
+            embeddings=np.asarray(embeddings[position:end]),
+            documents=documents,
+            metadatas=metadatas
+        )
+
+        position = end
+        restored += count
+        _save_progress(progress_path, position)
+        logger.info(f"Restored {position}/{total} rows into '{collection_name}'")
+
+    progress_path.unlink(missing_ok=True)
+    return {"rows_restored": restored, "rows_skipped": start}
+
+
+def restore_vector_snapshot(
+    snapshot_dir: str,
+    collection_names: Optional[List[str]] = None,
+    batch_size: Optional[int] = None,
+    resume: bool = True,
+    verify_checksums: bool = True
+) -> Dict:
+    """
+    Restore a snapshot produced by export_vector_snapshot into the configured vector store.
+
+    Args:
+        snapshot_dir: Snapshot directory containing manifest.json
+        collection_names: Subset of collections to restore (defaults to all in the manifest)
+        batch_size: Rows written per ChromaDB call
+        resume: Continue from the last completed batch of an interrupted restore
+        verify_checksums: Verify file checksums before loading
+
+    Returns:
+        Dictionary with restore results
+    """
+    try:
+        root = Path(snapshot_dir)
+        manifest_path = root / MANIFEST_FILENAME
+        if not manifest_path.exists():
+            return {
+                "success": False,
+                "error": f"No snapshot manifest found in {root}"
+            }
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            return {
+                "success": False,
+                "error": f"Unsupported snapshot format version: {manifest.get('format_version')}"
+            }
+
+        if manifest.get("embedding_model") != settings.EMBEDDING_MODEL_NAME:
+            logger.warning(
+                f"Snapshot embeddings were produced by '{manifest.get('embedding_model')}', "
+                f"but the configured model is '{settings.EMBEDDING_MODEL_NAME}'"
+            )
+
+        available = manifest["collections"]
+        collection_names = collection_names or list(available.keys())
+        missing = [name for name in collection_names if name not in available]
+        if missing:
+            return {
+                "success": False,
+                "error": f"Collections not found in snapshot: {missing}"
+            }
+
+        if verify_checksums:
+            for name in collection_names:
+                for filename, expected in available[name]["checksums"].items():
+                    if _file_checksum(root / name / filename) != expected:
+                        return {
+                            "success": False,
+                            "error": f"Checksum mismatch for {name}/{filename}"
+                        }
+
+        batch_size = batch_size or settings.VECTOR_SNAPSHOT_BATCH_SIZE
+        results = {}
+        for name in collection_names:
+            logger.info(f"Restoring ChromaDB collection '{name}' from {root}")
+            results[name] = _restore_collection(name, root / name, available[name], batch_size, resume)
+
+        total_restored = sum(r["rows_restored"] for r in results.values())
+        if total_restored:
+            # Cached answers were generated against the pre-restore vectors
+            answer_cache.clear()
+
+        return {
+            "success": True,
+            "snapshot_dir": str(root),
+            "collections": results,
+            "total_rows": total_restored,
+            "message": f"Restored {total_restored} rows from {root}"
+        }
+
+    except Exception as e:
+        logger.error(f"Error restoring vector snapshot: {str(e)}")
+        return {
+            "success": False,
+            "error": f"Vector snapshot restore failed: {str(e)}"
+        }
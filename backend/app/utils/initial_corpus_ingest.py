@@ -4,6 +4,8 @@ from pathlib import Path
 from sqlalchemy.orm import Session
 from ..core.config import settings
 from ..services import collection_service
+from ..services.ingestion_job_service import notify_ingestion_workers
+from ..services.pdf_ingestion_service import add_pdf_record_to_db
 from ..models import schemas, db_models
 import logging
 
@@ -12,7 +14,8 @@ logger = logging.getLogger(__name__)
 def ingest_initial_corpus(db: Session) -> dict:
     """
     Ingest PDFs from the initial corpus directory into the default collection.
-    This copies files to the proper storage location and creates database records.
+    This copies files to the proper storage location and creates database records,
+    each with an ingestion job, as for uploaded PDFs.
     
     Returns:
         dict: Summary of ingestion results
@@ -78,18 +81,10 @@ def ingest_initial_corpus(db: Session) -> dict:
                 
                 # Create database record
                 title = pdf_file.stem.replace('_', ' ').replace('-', ' ').title()
-                pdf_doc = db_models.PDFDocument(
-                    title=title,
-                    filename=pdf_file.name,
-                    file_path=str(destination),
-                    status="pending",
-                    collection_id=default_collection.id
+                pdf_doc = add_pdf_record_to_db(
+                    db, title, pdf_file.name, str(destination), default_collection.id
                 )
                 
-                db.add(pdf_doc)
-                db.commit()
-                db.refresh(pdf_doc)
-                
                 logger.info(f"Successfully ingested: {pdf_file.name}")
                 results["processed"] += 1
                 results["files"].append({
@@ -99,6 +94,7 @@ def ingest_initial_corpus(db: Session) -> dict:
                 })
                 
             except Exception as e:
+                db.rollback()
                 logger.error(f"Error processing {pdf_file.name}: {str(e)}")
                 results["errors"] += 1
                 results["files"].append({
@@ -109,6 +105,9 @@ def ingest_initial_corpus(db: Session) -> dict:
                 # Continue processing other files
                 continue
         
+        if results["processed"]:
+            notify_ingestion_workers()
+        
         logger.info(
             f"Initial corpus ingestion complete. "
             f"Processed: {results['processed']}, "
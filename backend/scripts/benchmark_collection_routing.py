@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Recall vs. fan-out benchmark for centroid-based collection routing.
+
+Builds synthetic collections of clustered embeddings (each collection mixes a few
+topics, and topics are shared between collections), then compares, for every query:
+- the exact global top-k over all chunks of all collections, and
+- the top-k found when searching only the fan-out collections picked by
+  app.services.collection_routing_service.top_collections.
+
+Reports recall@k and search time per fan-out, for several collection counts.
+Runs in-process with numpy only; no database, vector store or model is needed.
+
+Usage: python scripts/benchmark_collection_routing.py [--collections 10 100 500] [--fan-outs 1 2 3 5 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services.collection_routing_service import top_collections
+
+
+def normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def build_corpus(rng, n_collections, chunks_per_collection, dim, topics_per_collection, noise):
+    """Chunks of each collection are drawn around a few topics from a shared topic pool."""
+    topic_pool = normalize(rng.standard_normal((max(n_collections * topics_per_collection // 2, 1), dim)))
+    chunks, owners = [], []
+    for collection_id in range(n_collections):
+        topics = topic_pool[rng.choice(len(topic_pool), topics_per_collection, replace=False)]
+        picks = topics[rng.integers(0, topics_per_collection, chunks_per_collection)]
+        chunks.append(normalize(picks + noise * rng.standard_normal((chunks_per_collection, dim))))
+        owners.append(np.full(chunks_per_collection, collection_id))
+    return np.vstack(chunks).astype(np.float32), np.concatenate(owners)
+
+
+def run(n_collections, fan_outs, args, rng):
+    chunks, owners = build_corpus(
+        rng, n_collections, args.chunks_per_collection, args.dim, args.topics_per_collection, args.noise
+    )
+    collection_ids = list(range(n_collections))
+    centroids = normalize(np.vstack([chunks[owners == cid].mean(axis=0) for cid in collection_ids])).astype(np.float32)
+
+    # Queries are paraphrase-like perturbations of random chunks
+    sources = rng.integers(0, len(chunks), args.queries)
+    queries = normalize(chunks[sources] + args.query_noise * rng.standard_normal((args.queries, args.dim))).astype(np.float32)
+
+    started = time.perf_counter()
+    truth = [set(np.argsort(-(chunks @ q))[:args.top_k]) for q in queries]
+    full_ms = (time.perf_counter() - started) * 1000 / args.queries
+
+    rows = []
+    for fan_out in fan_outs:
+        if fan_out > n_collections:
+            continue
+        hits = 0
+        started = time.perf_counter()
+        for query, expected in zip(queries, truth):
+            routed = [cid for cid, _ in top_collections(centroids, collection_ids, query, fan_out)]
+            candidates = np.flatnonzero(np.isin(owners, routed))
+            found = candidates[np.argsort(-(chunks[candidates] @ query))[:args.top_k]]
+            hits += len(expected.intersection(found.tolist()))
+        routed_ms = (time.perf_counter() - started) * 1000 / args.queries
+        rows.append((fan_out, hits / (args.top_k * args.queries), routed_ms))
+    return full_ms, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Centroid routing recall vs. fan-out benchmark")
+    parser.add_argument("--collections", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--fan-outs", type=int, nargs="+", default=[1, 2, 3, 5, 10, 20])
+    parser.add_argument("--chunks-per-collection", type=int, default=200)
+    parser.add_argument("--topics-per-collection", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--noise", type=float, default=0.06, help="Per-dimension spread of chunks around their topic")
+    parser.add_argument("--query-noise", type=float, default=0.05)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"top_k={args.top_k}, {args.chunks_per_collection} chunks/collection, {args.queries} queries, dim={args.dim}")
+    for n_collections in args.collections:
+        full_ms, rows = run(n_collections, args.fan_outs, args, rng)
+        print(f"\n{n_collections} collections - exhaustive search: {full_ms:.3f} ms/query")
+        print(f"{'fan-out':>8} {'recall@k':>9} {'ms/query':>9}")
+        for fan_out, recall, routed_ms in rows:
+            print(f"{fan_out:>8} {recall:>9.3f} {routed_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
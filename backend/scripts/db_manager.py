@@ -17,7 +17,7 @@ sys.path.append('/app')
 
 from app.core.config import settings
 from app.models.db_models import Base
-from app.db.session import engine
+from app.db.session import create_missing_indexes, engine
 
 def wait_for_postgres(max_retries=30, delay=2):
     """Wait for PostgreSQL to be ready"""
@@ -93,6 +93,8 @@ def init_schema():
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        
+        create_missing_indexes()
         print("Database schema created successfully!")
         
         return True
@@ -219,11 +221,94 @@ def show_status():
         print(f"❌ Database connection failed: {e}")
         return False
 
+def export_vector_snapshot(snapshot_dir=None):
+    """Export the vector store to a snapshot directory"""
+    from app.services.vector_snapshot_service import export_vector_snapshot as export_snapshot
+    
+    result = export_snapshot(snapshot_dir=snapshot_dir)
+    if result["success"]:
+        print(f"✅ {result['message']}")
+        for name, count in result["collections"].items():
+            print(f"  {name}: {count} rows")
+        return True
+    print(f"❌ {result['error']}")
+    return False
+
+def restore_vector_snapshot(snapshot_dir, resume=True):
+    """Restore the vector store from a snapshot directory"""
+    from app.services.vector_snapshot_service import restore_vector_snapshot as restore_snapshot
+    
+    if not snapshot_dir:
+        print("❌ --path is required for snapshot-restore")
+        return False
+    
+    result = restore_snapshot(snapshot_dir=snapshot_dir, resume=resume)
+    if result["success"]:
+        print(f"✅ {result['message']}")
+        for name, stats in result["collections"].items():
+            print(f"  {name}: {stats['rows_restored']} restored, {stats['rows_skipped']} already present")
+        return True
+    print(f"❌ {result['error']}")
+    return False
+
+def migrate_vector_metadata(batch_size=500):
+    """Rewrite vector store metadata to the current typed schema"""
+    from app.rag_components.vector_store_interface import migrate_metadata_schema
+    
+    result = migrate_metadata_schema(settings.CHROMA_DEFAULT_COLLECTION_NAME, batch_size=batch_size)
+    if result["success"]:
+        print(f"✅ Scanned {result['scanned']} chunks, migrated {result['migrated']}")
+        return True
+    print(f"❌ Metadata migration failed: {result['error']}")
+    return False
+
+def rebuild_vector_collection(batch_size=500):
+    """Compact the vector store collection; run with the API stopped"""
+    from app.db.session import SessionLocal
+    from app.services.vector_gc_service import rebuild_vector_collection as rebuild, record_vector_rebuild
+    
+    try:
+        result = rebuild(settings.CHROMA_DEFAULT_COLLECTION_NAME, batch_size)
+    except Exception as e:
+        print(f"❌ Vector collection rebuild failed: {e}")
+        return False
+    db = SessionLocal()
+    try:
+        record_vector_rebuild(db, settings.CHROMA_DEFAULT_COLLECTION_NAME)
+    finally:
+        db.close()
+    action = "Completed interrupted rebuild" if result["recovered"] else "Rebuilt collection"
+    print(f"✅ {action}: {result['rows']} rows")
+    return True
+
+def rebuild_collection_stats():
+    """Reconcile per-collection counters with the PDF table and the vector store"""
+    from app.db.session import SessionLocal
+    from app.services.collection_stats_service import rebuild_collection_stats as rebuild
+    
+    db = SessionLocal()
+    try:
+        result = rebuild(db)
+    finally:
+        db.close()
+    if result["success"]:
+        print(f"✅ {result['message']}")
+        for collection_id, stats in result["collections"].items():
+            print(f"  {collection_id}: {stats['pdf_count']} PDFs, {stats['chunk_count']} chunks, {stats['token_count']} tokens")
+        return True
+    print(f"❌ {result['error']}")
+    return False
+
 def main():
     parser = argparse.ArgumentParser(description="Database management utility")
     parser.add_argument("command", choices=[
-        "init", "reset", "status", "create-db", "drop-db", "wait"
+        "init", "reset", "status", "create-db", "drop-db", "wait",
+        "snapshot-export", "snapshot-restore", "migrate-vector-metadata", "rebuild-collection-stats",
+        "rebuild-vector-collection"
     ], help="Command to execute")
+    parser.add_argument("--path", help="Snapshot directory for snapshot-export/snapshot-restore")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Restart snapshot-restore from the beginning instead of resuming")
     
     args = parser.parse_args()
     
@@ -242,6 +327,16 @@ def main():
         success = wait_for_postgres() and drop_database()
     elif args.command == "status":
         success = show_status()
+    elif args.command == "snapshot-export":
+        success = export_vector_snapshot(args.path)
+    elif args.command == "snapshot-restore":
+        success = restore_vector_snapshot(args.path, resume=not args.no_resume)
+    elif args.command == "migrate-vector-metadata":
+        success = migrate_vector_metadata()
+    elif args.command == "rebuild-collection-stats":
+        success = rebuild_collection_stats()
+    elif args.command == "rebuild-vector-collection":
+        success = rebuild_vector_collection()
     else:
         print(f"Unknown command: {args.command}")
         success = False
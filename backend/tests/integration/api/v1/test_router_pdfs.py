@@ -43,3 +43,18 @@ def test_add_pdf_by_url_api_collection_not_found(mock_get):
     mock_get.return_value = False
     response = client.post("/collections/999/pdfs/url?url=http://example.com/test.pdf&filename=test.pdf")
     assert response.status_code == 404
+
+@patch("app.apis.v1.router_pdfs.delete_pdf_chunks_from_vector_store")
+def test_delete_pdf_api_removes_vectors(mock_delete_chunks):
+    from app.db.session import get_db
+    db = MagicMock()
+    db.query().filter_by().first.return_value = MagicMock(id=5)
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        response = client.delete("/collections/pdfs/5")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 204
+    mock_delete_chunks.assert_called_once()
+    assert mock_delete_chunks.call_args.args[1] == 5
+    db.commit.assert_called()
@@ -0,0 +1,72 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+from app.main import app
+from app.db.session import get_db
+from app.services import rag_service
+from app.rag_components.chunker import Chunk
+from app.rag_components.llm_handler import record_llm_timings
+
+client = TestClient(app)
+
+def make_chunk():
+    return Chunk(
+        id="doc.pdf_chunk_0",
+        text="Paris is the capital of France.",
+        article_title="Doc",
+        source_pdf_filename="doc.pdf",
+        page_numbers=[1],
+        chunk_sequence_id=0,
+        collection_id="1",
+        pdf_db_id=1
+    )
+
+def test_ask_returns_server_timing_and_optional_body_timings():
+    collection = MagicMock(id=1, updated_at=datetime(2025, 1, 1))
+    collection.name = "Docs"
+
+    async def fake_generate(prompt):
+        record_llm_timings({"prompt_eval_count": 120, "eval_count": 12, "eval_duration": 1000})
+        return "Paris is the capital of France."
+
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    try:
+        with patch.object(rag_service, "_get_collection", return_value=collection), \
+             patch.object(rag_service, "_embed_questions", return_value=[[1.0, 0.0]]), \
+             patch.object(rag_service, "_search_chunks", return_value=[make_chunk()]), \
+             patch.object(rag_service, "generate_answer_from_context", fake_generate), \
+             patch.object(rag_service.settings, "ANSWER_CACHE_ENABLED", False):
+            plain = client.post("/qa/ask", json={"question": "What is the capital of France?", "collection_id": 1})
+            timed = client.post(
+                "/qa/ask?include_timings=true",
+                json={"question": "Which city is the capital of France?", "collection_id": 1}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert plain.status_code == 200
+    assert plain.json()["timings"] is None
+    header = plain.headers["Server-Timing"]
+    for stage in ["collection_lookup", "cache_lookup", "query_embedding", "vector_search",
+                  "prompt_construction", "llm_generation", "post_processing", "history_write"]:
+        assert f"{stage};dur=" in header
+
+    spans = {span["name"]: span for span in timed.json()["timings"]["spans"]}
+    assert spans["llm_generation"]["attributes"]["prompt_eval_count"] == 120
+    assert spans["vector_search"]["attributes"] == {"top_k": 5, "chunks": 1}
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.count.return_value = 3
+    with patch("app.main.SessionLocal", return_value=db):
+        client.get("/qa/admin/llm-timings/stats")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/qa/admin/llm-timings/stats",status="200"}' in body
+    assert "rag_ingestion_queue_depth 3.0" in body
+    for name in ("http_requests_in_flight", "rag_embedding_batch_size", "rag_vector_search_duration_seconds",
+                 "rag_llm_request_duration_seconds", "rag_answer_cache_lookups_total", "db_pool_connections_checked_out"):
+        assert name in body
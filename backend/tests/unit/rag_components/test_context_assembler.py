@@ -0,0 +1,90 @@
+import pytest
+from app.rag_components.chunker import Chunk, estimate_token_count
+from app.rag_components.context_assembler import (
+    assemble_context,
+    merge_adjacent_chunks,
+    trim_to_sentences,
+    CHUNK_FRAMING_TOKENS
+)
+
+def make_chunk(i, text, token_count=None):
+    return Chunk(
+        id=f"doc.pdf_chunk_{i}",
+        text=text,
+        article_title="Doc",
+        source_pdf_filename="doc.pdf",
+        page_numbers=[1],
+        chunk_sequence_id=i,
+        collection_id="1",
+        pdf_db_id=1,
+        token_count=token_count
+    )
+
+def test_all_chunks_fit_within_budget():
+    chunks = [make_chunk(i, "word " * 30) for i in range(3)]
+    selected, report = assemble_context(chunks, token_budget=1000)
+    assert selected == chunks
+    assert report["chunks_included"] == 3
+    assert report["chunks_dropped"] == 0
+    assert report["tokens_used"] == 3 * (estimate_token_count("word " * 30) + CHUNK_FRAMING_TOKENS)
+
+def test_uses_cached_token_counts():
+    chunks = [make_chunk(0, "short text", token_count=500), make_chunk(1, "short text", token_count=500)]
+    selected, report = assemble_context(chunks, token_budget=600, min_trim_tokens=1000)
+    assert [c.id for c in selected] == ["doc.pdf_chunk_0"]
+    assert report["chunks_dropped"] == 1
+
+def test_last_chunk_trimmed_at_sentence_boundary():
+    long_text = " ".join(f"Sentence number {i} has some words." for i in range(40))
+    chunks = [make_chunk(0, "alpha " * 60), make_chunk(1, long_text), make_chunk(2, "tail " * 10)]
+    selected, report = assemble_context(chunks, token_budget=200, min_trim_tokens=20)
+    assert len(selected) == 2
+    trimmed = selected[1]
+    assert trimmed.text.endswith(".")
+    assert long_text.startswith(trimmed.text)
+    assert report["chunks_truncated"] == 1
+    assert report["chunks_dropped"] == 1
+    assert report["tokens_used"] <= 200
+
+def test_trim_to_sentences_none_fit():
+    assert trim_to_sentences("One very long sentence without any end", max_tokens=2) == ("", 0)
+
+def make_window(i, words, stride=5, pdf_db_id=1, with_offset=True):
+    """Chunk i of a PDF whose text is words, cut into 8-word windows every `stride` words."""
+    start = i * stride
+    return Chunk(
+        id=f"doc{pdf_db_id}.pdf_chunk_{i}",
+        text=" ".join(words[start:start + 8]),
+        article_title="Doc",
+        source_pdf_filename=f"doc{pdf_db_id}.pdf",
+        page_numbers=[i + 1],
+        chunk_sequence_id=i,
+        collection_id="1",
+        pdf_db_id=pdf_db_id,
+        word_offset=start if with_offset else None
+    )
+
+WORDS = [f"w{n}" for n in range(40)]
+
+@pytest.mark.parametrize("with_offset", [True, False])
+def test_overlapping_neighbours_merge_into_one_span(with_offset):
+    chunks = [make_window(1, WORDS, with_offset=with_offset), make_window(0, WORDS, with_offset=with_offset)]
+    spans, report = merge_adjacent_chunks(chunks)
+    assert len(spans) == 1
+    assert spans[0].text == " ".join(WORDS[0:13])
+    assert spans[0].id == "doc1.pdf_chunk_0"
+    assert spans[0].page_numbers == [1, 2]
+    assert report["chunks_merged"] == 1
+    assert report["overlap_tokens_removed"] > 0
+
+def test_distant_windows_and_other_pdfs_stay_separate():
+    other_pdf = make_window(0, WORDS, pdf_db_id=2)
+    chunks = [make_window(4, WORDS), other_pdf, make_window(0, WORDS)]
+    spans, report = merge_adjacent_chunks(chunks)
+    assert [s.id for s in spans] == ["doc1.pdf_chunk_4", "doc2.pdf_chunk_0", "doc1.pdf_chunk_0"]
+    assert report["chunks_merged"] == 0
+
+def test_contiguous_windows_without_overlap_merge():
+    chunks = [make_window(0, WORDS, stride=8), make_window(1, WORDS, stride=8)]
+    spans, _ = merge_adjacent_chunks(chunks)
+    assert [s.text for s in spans] == [" ".join(WORDS[0:16])]
@@ -26,3 +26,18 @@ def test_generate_embeddings_for_chunks():
     for i, (chunk, emb) in enumerate(results):
         assert chunk.id == f"test_{i}"
         assert emb == [float(i)]*3
+
+def test_generate_embeddings_in_batches_calls_on_batch():
+    chunks = [
+        Chunk(
+            id=f"test_{i}", text=f"This is chunk {i}", article_title="Test Article", source_pdf_filename="test.pdf",
+            page_numbers=[1], chunk_sequence_id=i, collection_id="col1", pdf_db_id=1
+        ) for i in range(5)
+    ]
+    batches = []
+    results = embedder.generate_embeddings_for_chunks(
+        chunks, model=DummyModel(), batch_size=2, on_batch=lambda: batches.append(1)
+    )
+    assert len(batches) == 3
+    assert [chunk.id for chunk, _ in results] == [f"test_{i}" for i in range(5)]
+    assert [emb[0] for _, emb in results] == [0.0, 1.0, 0.0, 1.0, 0.0]
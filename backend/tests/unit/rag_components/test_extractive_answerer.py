@@ -0,0 +1,46 @@
+from app.rag_components.chunker import Chunk
+from app.rag_components.extractive_answerer import extract_best_sentence, get_extractive_stats
+
+def make_chunk(i, text):
+    return Chunk(
+        id=f"doc.pdf_chunk_{i}",
+        text=text,
+        article_title="Doc",
+        source_pdf_filename="doc.pdf",
+        page_numbers=[i + 1],
+        chunk_sequence_id=i,
+        collection_id="1",
+        pdf_db_id=1
+    )
+
+# Toy embedding: one dimension per keyword
+KEYWORDS = ["paris", "berlin", "rome"]
+
+def embed_texts(texts):
+    return [[float(word in text.lower()) for word in KEYWORDS] + [0.1] for text in texts]
+
+CHUNKS = [
+    make_chunk(0, "France is in Europe. The capital of France is Paris. Short one."),
+    make_chunk(1, "Germany borders France. Its capital city is Berlin, on the Spree."),
+]
+
+def test_returns_best_matching_sentence_with_its_chunk():
+    before = get_extractive_stats()
+    result = extract_best_sentence([0.0, 1.0, 0.0, 0.1], CHUNKS, embed_texts, threshold=0.9)
+    assert result["text"] == "Its capital city is Berlin, on the Spree."
+    assert result["chunk"].id == "doc.pdf_chunk_1"
+    assert result["score"] > 0.9
+    assert get_extractive_stats()["hits"] == before["hits"] + 1
+
+def test_below_threshold_falls_through():
+    assert extract_best_sentence([0.0, 0.0, 1.0, 0.1], CHUNKS, embed_texts, threshold=0.9) is None
+
+def test_short_fragments_and_lower_chunks_are_ignored():
+    calls = []
+
+    def recording_embed(texts):
+        calls.append(texts)
+        return embed_texts(texts)
+
+    extract_best_sentence([1.0, 0.0, 0.0, 0.1], CHUNKS, recording_embed, threshold=0.5, max_chunks=1, min_words=4)
+    assert calls == [["France is in Europe.", "The capital of France is Paris."]]
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import httpx
+import pytest
+from unittest.mock import patch
+from app.rag_components import llm_handler
+from app.rag_components.llm_router import LLMRouter
+from app.rag_components.llm_resilience import ResilientCaller
+
+def make_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+async def collect(async_iter):
+    return [item async for item in async_iter]
+
+@pytest.fixture(autouse=True)
+def fresh_resilience_state():
+    with patch.object(llm_handler, "llm_caller", ResilientCaller()), \
+         patch.object(llm_handler.settings, "LLM_RETRY_BASE_DELAY_SECONDS", 0.0):
+        yield
+
+def test_stream_answer_from_context_yields_ollama_parts():
+    def handler(request):
+        payload = json.loads(request.content)
+        assert payload["stream"] is True
+        lines = [
+            {"response": "Hello", "done": False},
+            {"response": " world", "done": False},
+            {"response": "", "done": True, "eval_count": 2},
+        ]
+        return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines) + "\n")
+
+    with patch.object(llm_handler, "_http_client", make_client(handler)):
+        parts = asyncio.run(collect(llm_handler.stream_answer_from_context("prompt")))
+
+    assert "".join(p["response"] for p in parts) == "Hello world"
+    assert parts[-1]["done"] is True
+
+def test_stream_answer_from_context_raises_on_error_status():
+    with patch.object(llm_handler, "_http_client", make_client(lambda request: httpx.Response(500))):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(collect(llm_handler.stream_answer_from_context("prompt")))
+
+def test_generate_answer_from_context_returns_text():
+    def handler(request):
+        assert json.loads(request.content)["stream"] is False
+        return httpx.Response(200, json={"response": "  A sufficiently long answer.  "})
+
+    with patch.object(llm_handler, "_http_client", make_client(handler)):
+        answer = asyncio.run(llm_handler.generate_answer_from_context("prompt"))
+    assert answer == "A sufficiently long answer."
+
+def test_http_client_uses_configured_pool_and_timeouts():
+    async def lifecycle():
+        with patch.object(llm_handler.settings, "LLM_HTTP_MAX_CONNECTIONS", 4), \
+             patch.object(llm_handler.settings, "LLM_HTTP_CONNECT_TIMEOUT_SECONDS", 1.5), \
+             patch.object(llm_handler.settings, "LLM_HTTP2_ENABLED", True), \
+             patch.object(llm_handler, "_http2_available", return_value=False):
+            client = await llm_handler.open_http_client()
+            stats = llm_handler.get_http_pool_stats()
+        await llm_handler.close_http_client()
+        return client, stats
+
+    with patch.object(llm_handler, "_http_client", None):
+        client, stats = asyncio.run(lifecycle())
+        assert llm_handler._http_client is None
+
+    assert client.is_closed
+    assert client.timeout.connect == 1.5
+    assert client._transport._pool._max_connections == 4
+    assert stats["client_open"] is True
+    assert stats["max_connections"] == 4
+    assert stats["http2_enabled"] is False
+    assert stats["open_connections"] == 0
+
+def test_http_pool_stats_fall_back_to_limits_when_pool_internals_change():
+    class Pool:
+        connections = [object()]
+
+    client = httpx.AsyncClient()
+    with patch.object(client._transport, "_pool", Pool(), create=True), \
+         patch.object(llm_handler, "_http_client", client):
+        stats = llm_handler.get_http_pool_stats()
+    asyncio.run(client.aclose())
+
+    assert stats["pool_usage_available"] is False
+    assert stats["max_connections"] == llm_handler.settings.LLM_HTTP_MAX_CONNECTIONS
+    assert stats["open_connections"] == 0
+
+def test_generate_uses_route_model_and_retries_on_another_backend():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.host, json.loads(request.content)["model"]))
+        if request.url.host == "down":
+            return httpx.Response(503)
+        return httpx.Response(200, json={"response": "A sufficiently long answer."})
+
+    router = LLMRouter(["http://down:11434", "http://up:11434"], max_concurrency=4)
+    with patch.object(llm_handler, "_http_client", make_client(handler)), \
+         patch.object(llm_handler, "get_llm_router", return_value=router), \
+         patch.object(llm_handler.settings, "LLM_ROUTE_MODELS", {"qa": "phi3"}), \
+         patch.object(llm_handler.settings, "LLM_BACKEND_EJECT_AFTER_FAILURES", 1):
+        first = asyncio.run(llm_handler.generate_answer_from_context("prompt"))
+        second = asyncio.run(llm_handler.generate_answer_from_context("prompt"))
+
+    # The 503 ejects the first backend and the retry lands on the second
+    assert first == second == "A sufficiently long answer."
+    assert seen == [("down", "phi3"), ("up", "phi3"), ("up", "phi3")]
+    assert router.backends[0].is_ejected()
+
+def test_generate_sends_stable_system_prefix_and_records_timings():
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "response": "A sufficiently long answer.",
+            "prompt_eval_count": 200,
+            "prompt_eval_duration": 40_000_000,
+            "eval_count": 20,
+            "eval_duration": 500_000_000
+        })
+
+    before = llm_handler.get_llm_timing_stats()
+    prompts = [
+        llm_handler.construct_rag_prompt("What is it?", [], "Docs"),
+        llm_handler.construct_rag_prompt("Something else?", [], "Docs"),
+    ]
+    with patch.object(llm_handler, "_http_client", make_client(handler)):
+        for prompt in prompts:
+            asyncio.run(llm_handler.generate_answer_from_context(prompt))
+
+    assert all(p["system"] == llm_handler.RAG_SYSTEM_PROMPT for p in payloads)
+    assert all(p["keep_alive"] == llm_handler.settings.LLM_KEEP_ALIVE for p in payloads)
+    assert "Instructions" not in payloads[0]["prompt"]
+    after = llm_handler.get_llm_timing_stats()
+    assert after["generations"] == before["generations"] + 2
+    assert after["prompt_eval_count"] == before["prompt_eval_count"] + 400
+    assert after["eval_tokens_per_second"] > 0
+
+def test_cascade_serves_confident_answers_from_small_model_and_escalates_the_rest():
+    answers = {
+        "small-model": {"What is A?": ("A is the first letter of the alphabet.", "stop"),
+                        "What is B?": ("I don't know.", "stop"),
+                        "What is C?": ("C is a letter that comes after B and", "length")},
+        "large-model": {"What is B?": ("B is the second letter of the alphabet.", "stop"),
+                        "What is C?": ("C is the third letter of the alphabet.", "stop")},
+    }
+
+    def handler(request):
+        payload = json.loads(request.content)
+        text, reason = answers[payload["model"]][payload["prompt"]]
+        return httpx.Response(200, json={"response": text, "done_reason": reason})
+
+    with patch.object(llm_handler, "_http_client", make_client(handler)), \
+         patch.object(llm_handler, "_cascade_stats", {}), \
+         patch.object(llm_handler.settings, "LLM_CASCADE_SMALL_MODEL", "small-model"), \
+         patch.object(llm_handler.settings, "LLM_CASCADE_LARGE_MODEL", "large-model"):
+        results = [
+            asyncio.run(llm_handler.generate_answer_with_cascade(q, stats_key="7"))
+            for q in ["What is A?", "What is B?", "What is C?"]
+        ]
+        stats = llm_handler.get_cascade_stats()
+
+    assert [(r["tier"], r["escalation_reason"]) for r in results] == [
+        ("small", None), ("large", "low_confidence"), ("large", "truncated")
+    ]
+    assert results[2]["text"] == "C is the third letter of the alphabet."
+    assert stats["by_collection"]["7"]["escalation_reasons"] == {"low_confidence": 1, "truncated": 1}
+    assert stats["overall"]["small_fraction"] == round(1 / 3, 4)
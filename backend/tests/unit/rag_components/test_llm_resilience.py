@@ -0,0 +1,169 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.rag_components import llm_resilience
+from app.rag_components.llm_router import BackendSaturatedError
+from app.rag_components.llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+    RetryableLLMError
+)
+
+@pytest.fixture(autouse=True)
+def fast_retries():
+    with patch.object(llm_resilience.settings, "LLM_RETRY_BASE_DELAY_SECONDS", 0.0):
+        yield
+
+def flaky(failures, result="ok"):
+    calls = []
+
+    async def attempt(slot):
+        calls.append(1)
+        if len(calls) <= failures:
+            raise RetryableLLMError("503")
+        return result
+
+    return attempt, calls
+
+def test_retries_until_success():
+    caller = ResilientCaller()
+    attempt, calls = flaky(failures=2)
+    assert asyncio.run(caller.call(attempt)) == "ok"
+    assert len(calls) == 3
+    assert caller.get_stats()["retries"] == 2
+
+def test_retry_budget_limits_retries():
+    caller = ResilientCaller()
+    caller.budget.tokens = 0
+    attempt, calls = flaky(failures=1)
+    with pytest.raises(RetryableLLMError):
+        asyncio.run(caller.call(attempt))
+    assert len(calls) == 1
+    assert caller.get_stats()["retries_denied_by_budget"] == 1
+
+def test_deadline_cuts_off_slow_attempt():
+    async def slow(slot):
+        await asyncio.sleep(1)
+
+    caller = ResilientCaller()
+    with patch.object(llm_resilience.settings, "LLM_REQUEST_DEADLINE_SECONDS", 0.05):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(caller.call(slow))
+    assert caller.get_stats()["deadline_exceeded"] == 1
+
+def test_circuit_opens_and_fails_fast_then_half_opens():
+    caller = ResilientCaller()
+    caller.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    caller.budget.tokens = 0
+    for _ in range(2):
+        attempt, _ = flaky(failures=10)
+        with pytest.raises(RetryableLLMError):
+            asyncio.run(caller.call(attempt))
+
+    attempt, calls = flaky(failures=0)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(caller.call(attempt))
+    assert calls == []
+    assert caller.get_stats()["circuit_state"] == "open"
+
+    caller.breaker.opened_at -= 60
+    assert asyncio.run(caller.call(attempt)) == "ok"
+    assert caller.breaker.state == "closed"
+
+def hedging_enabled():
+    return patch.multiple(llm_resilience.settings, LLM_HEDGE_ENABLED=True, LLM_HEDGE_MIN_SAMPLES=5)
+
+def warmed_up_caller():
+    caller = ResilientCaller()
+    for _ in range(5):
+        caller.latencies.record(0.01)
+    return caller
+
+def test_hedged_request_wins_when_primary_is_slow():
+    slots = []
+
+    async def attempt(slot):
+        slots.append(slot)
+        if not slot.is_hedge:
+            slot.backend = "a"
+            await asyncio.sleep(1)
+            return "slow"
+        slot.backend = "b"
+        return "fast"
+
+    checked = []
+
+    def can_hedge(avoid):
+        checked.append(avoid)
+        return True
+
+    caller = warmed_up_caller()
+    with hedging_enabled():
+        result = asyncio.run(caller.call(attempt, can_hedge=can_hedge))
+    assert result == "fast"
+    assert checked == ["a"]
+    assert slots[1].avoid == "a"
+    assert caller.get_stats()["hedges"] == 1
+    assert caller.get_stats()["hedge_wins"] == 1
+
+def test_no_hedge_without_another_free_backend():
+    async def attempt(slot):
+        slot.backend = "a"
+        await asyncio.sleep(0.05)
+        return "slow"
+
+    caller = warmed_up_caller()
+    with hedging_enabled():
+        assert asyncio.run(caller.call(attempt, can_hedge=lambda avoid: False)) == "slow"
+    assert caller.get_stats()["hedges"] == 0
+
+def test_half_open_trial_with_non_retryable_error_reopens_circuit():
+    async def attempt(slot):
+        raise ValueError("bad request")
+
+    caller = ResilientCaller()
+    caller.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    caller.breaker.state = "open"
+    caller.breaker.opened_at -= 60
+    with pytest.raises(ValueError):
+        asyncio.run(caller.call(attempt))
+    assert caller.breaker.state == "open"
+    assert not caller.breaker.allow()
+
+def test_cancelled_half_open_trial_lets_next_call_try():
+    async def attempt(slot):
+        await asyncio.sleep(1)
+
+    async def cancel_call(caller):
+        task = asyncio.ensure_future(caller.call(attempt))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    caller = ResilientCaller()
+    caller.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    caller.breaker.state = "open"
+    caller.breaker.opened_at -= 60
+    asyncio.run(cancel_call(caller))
+    assert caller.breaker.allow()
+
+def test_backend_saturation_does_not_count_against_the_circuit():
+    async def attempt(slot):
+        raise BackendSaturatedError("Timed out waiting for a free LLM backend slot")
+
+    caller = ResilientCaller()
+    caller.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    for _ in range(3):
+        with pytest.raises(BackendSaturatedError):
+            asyncio.run(caller.call(attempt))
+    assert caller.breaker.state == "closed"
+    assert caller.get_stats()["saturated"] == 3
+
+    # A half-open trial that hits saturation is released, not failed
+    caller.breaker.state = "open"
+    caller.breaker.opened_at -= 60
+    with pytest.raises(BackendSaturatedError):
+        asyncio.run(caller.call(attempt))
+    assert caller.breaker.allow()
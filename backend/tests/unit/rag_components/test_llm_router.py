@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.rag_components import llm_router
+from app.rag_components.llm_router import BackendSaturatedError, LLMRouter, NoBackendAvailableError, model_for_route
+
+def test_routes_to_least_outstanding_backend():
+    router = LLMRouter(["http://a:11434", "http://b:11434/"], max_concurrency=2)
+
+    async def scenario():
+        async with router.acquire() as first:
+            async with router.acquire() as second:
+                async with router.acquire() as third:
+                    return first.url, second.url, third.url, router.get_stats()["in_flight"]
+
+    first, second, third, in_flight = asyncio.run(scenario())
+    assert {first, second} == {"http://a:11434", "http://b:11434"}
+    assert third == first
+    assert in_flight == 3
+    assert router.get_stats()["in_flight"] == 0
+
+def test_waits_for_slot_then_times_out_at_concurrency_cap():
+    router = LLMRouter(["http://a:11434"], max_concurrency=1)
+
+    async def scenario():
+        async with router.acquire():
+            with pytest.raises(BackendSaturatedError):
+                async with router.acquire():
+                    pass
+
+    with patch.object(llm_router.settings, "LLM_BACKEND_QUEUE_TIMEOUT_SECONDS", 0.05):
+        asyncio.run(scenario())
+
+def test_waiting_requests_get_freed_slots_in_arrival_order():
+    router = LLMRouter(["http://a:11434"], max_concurrency=1)
+    order = []
+
+    async def request(name, hold):
+        async with router.acquire():
+            order.append(name)
+            await hold.wait()
+
+    async def scenario():
+        holds = {name: asyncio.Event() for name in "abc"}
+        tasks = []
+        for name in "abc":
+            tasks.append(asyncio.ensure_future(request(name, holds[name])))
+            await asyncio.sleep(0)
+        assert order == ["a"]
+        assert len(router._waiters) == 2
+        for name in "abc":
+            holds[name].set()
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["a", "b", "c"]
+    assert router.get_stats()["in_flight"] == 0
+
+def test_failing_backend_is_ejected_and_skipped():
+    router = LLMRouter(["http://a:11434", "http://b:11434"], max_concurrency=4)
+    bad = router.backends[0]
+    with patch.object(llm_router.settings, "LLM_BACKEND_EJECT_AFTER_FAILURES", 2):
+        bad.record_failure()
+        assert not bad.is_ejected()
+        bad.record_failure()
+    assert bad.is_ejected()
+
+    async def pick():
+        async with router.acquire() as backend:
+            return backend.url
+
+    assert asyncio.run(pick()) == "http://b:11434"
+    bad.record_success()
+    assert not bad.is_ejected()
+
+def test_all_backends_ejected_raises_immediately():
+    router = LLMRouter(["http://a:11434"], max_concurrency=4)
+    with patch.object(llm_router.settings, "LLM_BACKEND_EJECT_AFTER_FAILURES", 1):
+        router.backends[0].record_failure()
+
+    async def scenario():
+        async with router.acquire():
+            pass
+
+    with pytest.raises(NoBackendAvailableError, match="ejected"):
+        asyncio.run(scenario())
+
+def test_hedge_avoids_primary_backend_and_does_not_queue():
+    router = LLMRouter(["http://a:11434", "http://b:11434"], max_concurrency=1)
+
+    async def scenario():
+        async with router.acquire() as primary:
+            assert router.can_hedge(primary)
+            async with router.acquire(avoid=primary, wait=False) as hedge:
+                assert hedge is not primary
+                assert not router.can_hedge(primary)
+                with pytest.raises(NoBackendAvailableError):
+                    async with router.acquire(avoid=hedge, wait=False):
+                        pass
+
+    asyncio.run(scenario())
+
+def test_model_for_route_uses_override_or_default():
+    with patch.object(llm_router.settings, "LLM_ROUTE_MODELS", {"summary": "llama3"}):
+        assert model_for_route("summary") == "llama3"
+        assert model_for_route("qa") == llm_router.settings.LLM_MODEL_NAME
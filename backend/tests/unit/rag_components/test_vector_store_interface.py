@@ -15,7 +15,12 @@ from app.rag_components.vector_store_interface import (
     search_relevant_chunks,
     delete_collection_data_from_vector_store,
     delete_pdf_chunks_from_vector_store,
-    get_collection_stats
+    get_collection_stats,
+    encode_chunk_metadata,
+    decode_chunk_results,
+    upgrade_chunk_metadata,
+    collection_id_filter,
+    migrate_metadata_schema
 )
 from app.rag_components.chunker import Chunk
 
@@ -186,3 +191,66 @@ class TestVectorStoreInterface:
         
         collection = get_or_create_collection("test_collection")
         assert collection.count() == 0
+
+
+class TestMetadataSchema:
+    """Test suite for the typed chunk metadata schema."""
+    
+    @pytest.fixture
+    def chunk(self):
+        return Chunk(
+            id="doc.pdf_chunk_3",
+            text="Some text",
+            article_title="Doc",
+            source_pdf_filename="doc.pdf",
+            page_numbers=[4, 5],
+            chunk_sequence_id=3,
+            collection_id="7",
+            pdf_db_id=12,
+            token_count=3,
+            word_offset=1500
+        )
+    
+    def test_encode_uses_native_types(self, chunk):
+        metadata = encode_chunk_metadata(chunk)
+        assert metadata["collection_id"] == 7
+        assert metadata["first_page"] == 4
+        assert metadata["last_page"] == 5
+        assert "page_numbers" not in metadata
+    
+    def test_decode_round_trip(self, chunk):
+        decoded = decode_chunk_results([chunk.id], [chunk.text], [encode_chunk_metadata(chunk)])
+        assert decoded[0].model_dump() == chunk.model_dump()
+    
+    def test_decode_legacy_metadata(self):
+        legacy = {"page_numbers": "[2]", "collection_id": "1", "pdf_db_id": 3, "chunk_sequence_id": 0}
+        old_format = dict(legacy, page_numbers="[1, 2,]")  # Not valid JSON, needs literal_eval
+        decoded = decode_chunk_results(["a", "b"], ["x", "y"], [legacy, old_format])
+        assert decoded[0].page_numbers == [2]
+        assert decoded[1].page_numbers == [1, 2]
+        assert decoded[0].collection_id == "1"
+    
+    def test_upgrade_legacy_metadata(self):
+        upgrade = upgrade_chunk_metadata({"page_numbers": "[3]", "collection_id": "2"})
+        assert upgrade["collection_id"] == 2
+        assert upgrade["first_page"] == upgrade["last_page"] == 3
+        assert upgrade["page_numbers"] is None
+    
+    def test_collection_id_filter(self):
+        with patch('app.core.config.settings.VECTOR_METADATA_LEGACY_COMPAT', False):
+            assert collection_id_filter("5") == {"collection_id": 5}
+        with patch('app.core.config.settings.VECTOR_METADATA_LEGACY_COMPAT', True):
+            assert collection_id_filter("5") == {"$or": [{"collection_id": 5}, {"collection_id": "5"}]}
+    
+    def test_migrate_metadata_schema_skips_current_rows(self, chunk):
+        collection = MagicMock()
+        collection.count.return_value = 2
+        collection.get.return_value = {
+            "ids": ["old", "new"],
+            "metadatas": [{"page_numbers": "[1]", "collection_id": "7"}, encode_chunk_metadata(chunk)]
+        }
+        with patch('app.rag_components.vector_store_interface.get_or_create_collection', return_value=collection):
+            result = migrate_metadata_schema("rag_documents", batch_size=10)
+        assert result == {"success": True, "collection_name": "rag_documents", "scanned": 2, "migrated": 1}
+        ids = collection.update.call_args.kwargs["ids"]
+        assert ids == ["old"]
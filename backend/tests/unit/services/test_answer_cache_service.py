@@ -0,0 +1,24 @@
+from unittest.mock import patch
+from app.services import answer_cache_service
+from app.services.answer_cache_service import AnswerCache
+
+def test_semantic_lookup_skips_expired_best_match():
+    cache = AnswerCache()
+    with patch.object(answer_cache_service.time, "time", return_value=1000.0):
+        cache.store(1, "g1", "What is entropy?", [1.0, 0.0], 5, {"answer": "old"}, 1.0)
+    with patch.object(answer_cache_service.time, "time", return_value=2000.0):
+        cache.store(1, "g1", "Define entropy", [0.9, 0.1], 5, {"answer": "fresh"}, 1.0)
+
+    with patch.object(answer_cache_service.settings, "ANSWER_CACHE_TTL_SECONDS", 500), \
+         patch.object(answer_cache_service.settings, "ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.9), \
+         patch.object(answer_cache_service.time, "time", return_value=2100.0):
+        hit = cache.lookup_semantic(1, "g1", [1.0, 0.0], 5)
+
+    assert hit["answer"] == "fresh"
+    assert hit["cache_hit"] == "semantic"
+
+def test_semantic_lookup_misses_when_collection_generation_changed():
+    cache = AnswerCache()
+    cache.store(1, "g1", "What is entropy?", [1.0, 0.0], 5, {"answer": "stale"}, 1.0)
+    assert cache.lookup_semantic(1, "g2", [1.0, 0.0], 5) is None
+    assert cache.get_stats()["invalidations"] == 1
@@ -0,0 +1,64 @@
+import json
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.db_models import Base, Collection, CollectionCentroid, PDFDocument
+from app.services.collection_routing_service import (
+    centroid_index,
+    reset_collection_centroid,
+    top_collections,
+    update_collection_centroid
+)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Collection(id=1, name="Physics"), Collection(id=2, name="Cooking")])
+    session.commit()
+    centroid_index.invalidate()
+    yield session
+    session.close()
+    centroid_index.invalidate()
+
+def test_top_collections_orders_by_cosine_similarity():
+    centroids = np.array([[1.0, 0.0], [0.0, 1.0], [0.7071, 0.7071]], dtype=np.float32)
+    assert [cid for cid, _ in top_collections(centroids, [10, 20, 30], [0.9, 0.1], fan_out=2)] == [10, 30]
+    assert top_collections(centroids, [10, 20, 30], [0.0, 0.0], fan_out=2) == []
+
+def test_centroid_is_running_mean_of_ingested_embeddings(db):
+    update_collection_centroid(db, 1, [[1.0, 0.0], [0.0, 1.0]])
+    update_collection_centroid(db, 1, [[1.0, 1.0]])
+    db.commit()
+    row = db.query(CollectionCentroid).filter_by(collection_id=1).one()
+    assert row.chunk_count == 3
+    assert json.loads(row.centroid) == pytest.approx([2 / 3, 2 / 3])
+
+def test_questions_route_to_most_similar_collections(db):
+    update_collection_centroid(db, 1, [[1.0, 0.1, 0.0]])
+    update_collection_centroid(db, 2, [[0.0, 0.1, 1.0]])
+    db.commit()
+    routed = centroid_index.route(db, [0.1, 0.0, 0.9], fan_out=1)
+    assert [cid for cid, _ in routed] == [2]
+    assert len(centroid_index.route(db, [0.1, 0.0, 0.9], fan_out=5)) == 2
+
+def test_collections_without_centroid_are_still_searched(db):
+    update_collection_centroid(db, 1, [[1.0, 0.0]])
+    db.add(PDFDocument(filename="old.pdf", status="processed", collection_id=2))
+    db.commit()
+    routed = centroid_index.route(db, [0.0, 1.0], fan_out=1)
+    assert routed[0][0] == 1
+    assert routed[1] == (2, None)
+    assert centroid_index.unindexed_collections(db) == [2]
+
+def test_reset_centroid_before_full_reindex(db):
+    update_collection_centroid(db, 1, [[1.0, 0.0]])
+    db.commit()
+    reset_collection_centroid(db, 1)
+    update_collection_centroid(db, 1, [[0.0, 1.0]])
+    db.commit()
+    row = db.query(CollectionCentroid).filter_by(collection_id=1).one()
+    assert row.chunk_count == 1
+    assert json.loads(row.centroid) == pytest.approx([0.0, 1.0])
@@ -1,8 +1,21 @@
 import pytest
+from datetime import datetime
 from unittest.mock import MagicMock
 from app.services import collection_service
+from app.services.collection_cache_service import collection_cache, handle_collection_notification
 from app.models import schemas, db_models
 
+@pytest.fixture(autouse=True)
+def clear_collection_cache():
+    collection_cache.clear()
+    yield
+    collection_cache.clear()
+
+def make_db_collection(name="Docs"):
+    return db_models.Collection(
+        id=1, name=name, description=None, created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 1)
+    )
+
 def test_create_collection():
     db = MagicMock()
     collection_in = schemas.CollectionCreate(name="Test Collection")
@@ -16,18 +29,30 @@ def test_create_collection():
     db.refresh.assert_called()
     assert result is not None
 
-def test_get_collection_found():
+def test_get_collection_found_and_cached():
     db = MagicMock()
-    db.query().filter().first.return_value = "collection_obj"
-    result = collection_service.get_collection(db, 1)
-    assert result == "collection_obj"
+    db.query().filter().all.return_value = [make_db_collection()]
+    db.query.reset_mock()
+    first = collection_service.get_collection(db, 1)
+    second = collection_service.get_collection(db, 1)
+    assert first.name == "Docs"
+    assert second == first
+    db.query.assert_called_once()
 
 def test_get_collection_not_found():
     db = MagicMock()
-    db.query().filter().first.return_value = None
+    db.query().filter().all.return_value = []
     result = collection_service.get_collection(db, 1)
     assert result is None
 
+def test_notification_invalidates_cached_collection():
+    db = MagicMock()
+    db.query().filter().all.return_value = [make_db_collection()]
+    collection_service.get_collection(db, 1)
+    db.query().filter().all.return_value = [make_db_collection(name="Renamed")]
+    handle_collection_notification("1")
+    assert collection_service.get_collection(db, 1).name == "Renamed"
+
 def test_get_collections():
     db = MagicMock()
     db.query().offset().limit().all.return_value = ["c1", "c2"]
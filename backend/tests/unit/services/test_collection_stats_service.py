@@ -0,0 +1,131 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.db_models import Base, Collection, PDFChunkStats, PDFDocument
+from app.rag_components.chunker import Chunk
+from app.services import collection_stats_service
+from app.services.collection_stats_service import (
+    collections_needing_recount,
+    get_collection_stats_row,
+    record_pdf_added,
+    record_pdf_indexed,
+    record_pdf_removed,
+    rebuild_collection_stats
+)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    # Configured like the app's SessionLocal
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    session.add(Collection(id=1, name="Physics"))
+    session.commit()
+    yield session
+    session.close()
+
+@pytest.fixture(autouse=True)
+def vector_rows():
+    """Rows the vector store returns when counters are recounted; empty by default."""
+    rows = []
+    def fake_iter(name, filter_collection_id, include, batch_size=500):
+        if rows:
+            yield {
+                "documents": [row[1] for row in rows],
+                "metadatas": [{"pdf_db_id": row[0], "token_count": 10} for row in rows]
+            }
+    with patch.object(collection_stats_service, "iter_collection_rows", fake_iter):
+        yield rows
+
+def make_chunks(pdf, texts):
+    return [
+        Chunk(
+            id=f"{pdf.id}_{i}", text=text, article_title="Article", source_pdf_filename=pdf.filename,
+            page_numbers=[1], chunk_sequence_id=i, collection_id=str(pdf.collection_id),
+            pdf_db_id=pdf.id, token_count=10
+        )
+        for i, text in enumerate(texts)
+    ]
+
+def add_pdf(db, pdf_id):
+    pdf = PDFDocument(id=pdf_id, filename=f"paper{pdf_id}.pdf", collection_id=1)
+    record_pdf_added(db, 1)
+    db.add(pdf)
+    db.commit()
+    return pdf
+
+def test_collection_without_counters_has_no_row(db):
+    assert get_collection_stats_row(db, 1) is None
+
+def test_indexing_adds_chunk_bytes_and_tokens(db):
+    pdf = add_pdf(db, 1)
+    record_pdf_indexed(db, pdf, make_chunks(pdf, ["abc", "défg"]))
+    db.commit()
+
+    stats = get_collection_stats_row(db, 1)
+    assert stats["pdf_count"] == 1
+    assert stats["chunk_count"] == 2
+    assert stats["text_bytes"] == 3 + 5
+    assert stats["token_count"] == 20
+    assert stats["last_ingested_at"] is not None
+
+def test_reindexing_replaces_previous_contribution(db):
+    first, second = add_pdf(db, 1), add_pdf(db, 2)
+    record_pdf_indexed(db, first, make_chunks(first, ["a", "b", "c"]))
+    record_pdf_indexed(db, second, make_chunks(second, ["d"]))
+    db.commit()
+
+    record_pdf_indexed(db, first, make_chunks(first, ["ab"]))
+    db.commit()
+
+    stats = get_collection_stats_row(db, 1)
+    assert stats["pdf_count"] == 2
+    assert stats["chunk_count"] == 2
+    assert stats["text_bytes"] == 3
+    assert stats["token_count"] == 20
+
+def test_removing_pdf_subtracts_it(db):
+    first, second = add_pdf(db, 1), add_pdf(db, 2)
+    record_pdf_indexed(db, first, make_chunks(first, ["a", "b"]))
+    record_pdf_indexed(db, second, make_chunks(second, ["c"]))
+    db.commit()
+
+    record_pdf_removed(db, first)
+    db.delete(first)
+    db.commit()
+
+    stats = get_collection_stats_row(db, 1)
+    assert stats["pdf_count"] == 1
+    assert stats["chunk_count"] == 1
+    assert stats["token_count"] == 10
+    assert db.query(PDFChunkStats).filter_by(pdf_id=1).first() is None
+
+def test_first_write_to_existing_collection_starts_at_zero_until_recounted(db, vector_rows):
+    db.add_all([PDFDocument(id=1, filename="old1.pdf", collection_id=1), PDFDocument(id=2, filename="old2.pdf", collection_id=1)])
+    db.commit()
+    vector_rows.extend([(1, "abc"), (1, "de"), (2, "f")])
+    assert collections_needing_recount(db) == [1]
+
+    # The write path does not scan the vector store
+    with patch.object(collection_stats_service, "iter_collection_rows", side_effect=AssertionError("scanned")):
+        pdf = add_pdf(db, 3)
+    assert get_collection_stats_row(db, 1)["pdf_count"] == 1
+    assert collections_needing_recount(db) == [1]
+
+    assert rebuild_collection_stats(db, collections_needing_recount(db))["success"]
+    stats = get_collection_stats_row(db, 1)
+    assert stats["pdf_count"] == 3
+    assert stats["chunk_count"] == 3
+    assert stats["text_bytes"] == 6
+    assert collections_needing_recount(db) == []
+
+    vector_rows.append((3, "gh"))
+    record_pdf_indexed(db, pdf, make_chunks(pdf, ["gh"]))
+    record_pdf_removed(db, db.get(PDFDocument, 1))
+    db.delete(db.get(PDFDocument, 1))
+    db.commit()
+    stats = get_collection_stats_row(db, 1)
+    assert stats["pdf_count"] == 2
+    assert stats["chunk_count"] == 2
+    assert stats["text_bytes"] == 3
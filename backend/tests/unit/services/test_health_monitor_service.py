@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.services import health_monitor_service
+from app.services.health_monitor_service import (
+    get_health_snapshot,
+    next_probe_delay,
+    run_health_probes
+)
+
+async def healthy():
+    return None
+
+async def failing():
+    raise ConnectionError("connection refused")
+
+@pytest.fixture(autouse=True)
+def reset_health_state():
+    with patch.dict(health_monitor_service._health_state, {
+        name: health_monitor_service._new_state() for name in health_monitor_service.PROBES
+    }):
+        yield
+
+def test_snapshot_is_unknown_before_first_probe():
+    snapshot = get_health_snapshot()
+    assert snapshot["overall_status"] == "unknown"
+    assert snapshot["ready"] is False
+
+def test_probe_results_are_cached_with_latency_and_last_success():
+    probes = {"llm_service": healthy, "vector_store": healthy, "database": failing}
+    with patch.dict(health_monitor_service.PROBES, probes):
+        asyncio.run(run_health_probes())
+        asyncio.run(run_health_probes())
+
+    snapshot = get_health_snapshot()
+    assert snapshot["overall_status"] == "degraded"
+    assert snapshot["ready"] is False
+    llm = snapshot["components"]["llm_service"]
+    assert llm["status"] == "healthy"
+    assert llm["last_success"] is not None
+    assert llm["latency_ms"] is not None
+    database = snapshot["components"]["database"]
+    assert database["status"] == "unhealthy"
+    assert database["consecutive_failures"] == 2
+    assert database["last_success"] is None
+    assert database["last_error"] == "connection refused"
+
+def test_probe_timeout_marks_component_unhealthy():
+    async def hangs():
+        await asyncio.sleep(10)
+
+    with patch.dict(health_monitor_service.PROBES, {"llm_service": hangs}), \
+         patch.object(health_monitor_service.settings, "HEALTH_PROBE_TIMEOUT_SECONDS", 0.01):
+        state = asyncio.run(health_monitor_service.probe_component("llm_service"))
+    assert state["status"] == "unhealthy"
+    assert state["last_error"] == "TimeoutError"
+
+def test_backoff_doubles_up_to_ceiling():
+    with patch.object(health_monitor_service.settings, "HEALTH_PROBE_INTERVAL_SECONDS", 10.0), \
+         patch.object(health_monitor_service.settings, "HEALTH_PROBE_MAX_BACKOFF_SECONDS", 60.0):
+        assert [next_probe_delay(n) for n in range(4)] == [10.0, 20.0, 40.0, 60.0]
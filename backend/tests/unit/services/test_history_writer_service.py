@@ -0,0 +1,80 @@
+import asyncio
+from unittest.mock import patch
+from app.models.db_models import QueryHistory
+from app.services import history_writer_service
+from app.services.history_writer_service import (
+    enqueue_history_row,
+    get_history_writer_stats,
+    start_history_writer,
+    stop_history_writer
+)
+
+def row(i):
+    return {"collection_id": 1, "question_text": f"Question {i}?", "answer_text": "Answer.", "sources_count": 1}
+
+def test_rows_are_not_buffered_while_writer_is_stopped():
+    assert enqueue_history_row(QueryHistory, row(0)) is False
+
+def test_buffered_rows_are_written_in_batches_and_flushed_on_shutdown():
+    batches = []
+
+    async def run():
+        start_history_writer()
+        accepted = [enqueue_history_row(QueryHistory, row(i)) for i in range(5)]
+        await stop_history_writer()
+        return accepted
+
+    with patch.object(history_writer_service, "_write_rows", side_effect=lambda batch: batches.append(batch)), \
+         patch.object(history_writer_service.settings, "HISTORY_FLUSH_INTERVAL_SECONDS", 60.0), \
+         patch.object(history_writer_service.settings, "HISTORY_FLUSH_BATCH_SIZE", 2):
+        accepted = asyncio.run(run())
+
+    assert all(accepted)
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [r["question_text"] for _, r in sum(batches, [])] == [f"Question {i}?" for i in range(5)]
+    stats = get_history_writer_stats()
+    assert stats["running"] is False
+    assert stats["buffer_depth"] == 0
+
+def test_full_buffer_refuses_rows_for_synchronous_write():
+    async def run():
+        start_history_writer()
+        accepted = [enqueue_history_row(QueryHistory, row(i)) for i in range(3)]
+        await stop_history_writer()
+        return accepted
+
+    rejected_before = get_history_writer_stats()["rejected"]
+    with patch.object(history_writer_service, "_write_rows"), \
+         patch.object(history_writer_service.settings, "HISTORY_BUFFER_MAX_ROWS", 2):
+        accepted = asyncio.run(run())
+
+    assert accepted == [True, True, False]
+    assert get_history_writer_stats()["rejected"] == rejected_before + 1
+
+def test_failed_flush_is_counted_not_raised():
+    async def run():
+        start_history_writer()
+        enqueue_history_row(QueryHistory, row(0))
+        await stop_history_writer()
+
+    failed_before = get_history_writer_stats()["rows_failed"]
+    with patch.object(history_writer_service, "_write_rows", side_effect=ConnectionError("db down")):
+        asyncio.run(run())
+    assert get_history_writer_stats()["rows_failed"] == failed_before + 1
+
+def test_rows_enqueued_while_stopping_are_refused_for_synchronous_write():
+    late = []
+
+    def slow_write(batch):
+        # Another request finishes while the final drain is writing
+        late.append(enqueue_history_row(QueryHistory, row(99)))
+
+    async def run():
+        start_history_writer()
+        enqueue_history_row(QueryHistory, row(0))
+        await stop_history_writer()
+
+    with patch.object(history_writer_service, "_write_rows", side_effect=slow_write):
+        asyncio.run(run())
+    assert late == [False]
+    assert get_history_writer_stats()["buffer_depth"] == 0
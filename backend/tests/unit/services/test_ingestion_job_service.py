@@ -0,0 +1,161 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.db_models import Base, Collection, IngestionJob, PDFDocument
+from app.services import collection_stats_service, ingestion_job_service
+from app.services.pdf_ingestion_service import add_pdf_record_to_db
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Collection(id=1, name="Docs"))
+    session.commit()
+    yield session
+    session.close()
+
+@pytest.fixture(autouse=True)
+def empty_vector_store():
+    # Creating a collection's stats counters recounts its stored chunks
+    with patch.object(collection_stats_service, "iter_collection_rows", return_value=[]):
+        yield
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(b"%PDF")
+    return path
+
+def run_with_result(db, job_id, result):
+    async def fake_pipeline(db, pdf_record, pdf_path, on_stage):
+        on_stage("extracting")
+        return result
+
+    with patch.object(ingestion_job_service, "process_pdf_with_rag_pipeline", fake_pipeline), \
+         patch.object(ingestion_job_service, "delete_pdf_chunks_from_vector_store"):
+        ingestion_job_service.run_job(db, job_id)
+    return db.get(IngestionJob, job_id)
+
+def test_adding_pending_pdf_enqueues_job(db, pdf_file):
+    pdf = add_pdf_record_to_db(db, "Paper", "paper.pdf", str(pdf_file), 1)
+    job = ingestion_job_service.get_ingestion_job(db, pdf.id)
+    assert job.status == "queued"
+    assert ingestion_job_service.get_ingestion_queue_depth(db) == 1
+
+def test_claimed_job_succeeds(db, pdf_file):
+    pdf = add_pdf_record_to_db(db, "Paper", "paper.pdf", str(pdf_file), 1)
+    job_id = ingestion_job_service.claim_next_job(db)
+    assert db.get(PDFDocument, pdf.id).status == "processing"
+    assert ingestion_job_service.claim_next_job(db) is None
+
+    job = run_with_result(db, job_id, {"success": True, "pdf_id": pdf.id})
+    assert job.status == "succeeded"
+    assert job.stage == "extracting"
+    assert job.attempts == 1
+    assert job.locked_until is None
+
+def test_transient_failure_is_retried_with_backoff(db, pdf_file):
+    pdf = add_pdf_record_to_db(db, "Paper", "paper.pdf", str(pdf_file), 1)
+    job_id = ingestion_job_service.claim_next_job(db)
+    job = run_with_result(db, job_id, {"success": False, "error": "Chroma unavailable", "retryable": True})
+
+    assert job.status == "queued"
+    assert job.last_error == "Chroma unavailable"
+    assert job.next_attempt_at > datetime.utcnow()
+    assert db.get(PDFDocument, pdf.id).status == "pending"
+    assert ingestion_job_service.claim_next_job(db) is None  # Not due yet
+
+    job.next_attempt_at = datetime.utcnow()
+    db.commit()
+    assert ingestion_job_service.claim_next_job(db) == job_id
+    assert db.get(IngestionJob, job_id).attempts == 2
+
+def test_content_failure_is_final(db, pdf_file):
+    pdf = add_pdf_record_to_db(db, "Paper", "paper.pdf", str(pdf_file), 1)
+    job_id = ingestion_job_service.claim_next_job(db)
+    job = run_with_result(db, job_id, {"success": False, "error": "No text content found in PDF"})
+    assert job.status == "failed"
+    assert db.get(PDFDocument, pdf.id).status == "failed"
+
+def test_expired_lease_is_claimed_again_until_attempts_run_out(db, pdf_file, monkeypatch):
+    monkeypatch.setattr(ingestion_job_service.settings, "INGESTION_JOB_MAX_ATTEMPTS", 2)
+    add_pdf_record_to_db(db, "Paper", "paper.pdf", str(pdf_file), 1)
+    job_id = ingestion_job_service.claim_next_job(db)
+
+    for _ in range(2):
+        job = db.get(IngestionJob, job_id)
+        job.locked_until = datetime.utcnow() - timedelta(seconds=1)  # Worker died
+        db.commit()
+        reclaimed = ingestion_job_service.claim_next_job(db)
+
+    assert reclaimed is None
+    job = db.get(IngestionJob, job_id)
+    assert job.status == "failed"
+    assert job.attempts == 2
+
+def test_worker_whose_lease_expired_does_not_overwrite_new_attempt(db, pdf_file):
+    pdf = add_pdf_record_to_db(db, "Paper", "paper.pdf", str(pdf_file), 1)
+    job_id = ingestion_job_service.claim_next_job(db)
+
+    async def slow_pipeline(db, pdf_record, pdf_path, on_stage):
+        on_stage("extracting")
+        # Embedding outlived the lease and another worker claimed the job again
+        job = db.get(IngestionJob, job_id)
+        job.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        assert ingestion_job_service.claim_next_job(db) == job_id
+        pdf_record.status = "processed"
+        on_stage("recording")
+        db.commit()
+        return {"success": True, "pdf_id": pdf_record.id}
+
+    with patch.object(ingestion_job_service, "process_pdf_with_rag_pipeline", slow_pipeline):
+        ingestion_job_service.run_job(db, job_id)
+
+    job = db.get(IngestionJob, job_id)
+    assert job.status == "running"
+    assert job.attempts == 2
+    assert db.get(PDFDocument, pdf.id).status == "processing"
+    assert ingestion_job_service.get_ingestion_queue_stats(db)["worker_stats"]["lease_lost"] >= 1
+
+def test_stale_outcome_is_dropped(db, pdf_file):
+    add_pdf_record_to_db(db, "Paper", "paper.pdf", str(pdf_file), 1)
+    job_id = ingestion_job_service.claim_next_job(db)
+    job = db.get(IngestionJob, job_id)
+    job.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    ingestion_job_service.claim_next_job(db)
+
+    ingestion_job_service._finish_job(db, job_id, 1, {"success": False, "error": "late"})
+    job = db.get(IngestionJob, job_id)
+    assert job.status == "running"
+    assert job.last_error is None
+
+def test_pending_pdfs_without_job_are_enqueued(db):
+    db.add(PDFDocument(id=7, filename="old.pdf", status="pending", collection_id=1))
+    db.add(PDFDocument(id=8, filename="done.pdf", status="processed", collection_id=1))
+    db.commit()
+    assert ingestion_job_service.enqueue_pending_pdfs(db) == 1
+    assert ingestion_job_service.enqueue_pending_pdfs(db) == 0
+    stats = ingestion_job_service.get_ingestion_queue_stats(db)
+    assert stats["queue_depth"] == 1
+    assert stats["jobs_by_status"] == {"queued": 1}
+
+def test_initial_corpus_pdfs_get_jobs_and_counters(db, tmp_path, monkeypatch):
+    from app.utils import initial_corpus_ingest
+
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "paper_one.pdf").write_bytes(b"%PDF")
+    monkeypatch.setattr(initial_corpus_ingest.settings, "initial_corpus_dir", str(corpus))
+    monkeypatch.setattr(initial_corpus_ingest.settings, "pdf_dir", str(tmp_path / "pdfs"))
+    monkeypatch.setattr(initial_corpus_ingest.settings, "default_collection_name", "Docs")
+
+    results = initial_corpus_ingest.ingest_initial_corpus(db)
+    assert results["processed"] == 1
+    pdf_id = results["files"][0]["pdf_id"]
+    assert ingestion_job_service.get_ingestion_job(db, pdf_id).status == "queued"
+    assert collection_stats_service.get_collection_stats_row(db, 1)["pdf_count"] == 1
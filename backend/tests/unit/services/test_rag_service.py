@@ -0,0 +1,395 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from app.services import rag_service
+from app.services.answer_cache_service import answer_cache
+from app.services.collection_cache_service import collection_cache
+from app.services.request_coalescing_service import qa_single_flight
+from app.rag_components.chunker import Chunk
+from datetime import datetime
+
+def make_chunk(i=0, pdf_db_id=1, text=None):
+    return Chunk(
+        id=f"doc.pdf_chunk_{i}",
+        text=text or f"Chunk {i} text about the topic.",
+        article_title="Doc",
+        source_pdf_filename="doc.pdf",
+        page_numbers=[i + 1],
+        chunk_sequence_id=i,
+        collection_id="1",
+        pdf_db_id=pdf_db_id
+    )
+
+def make_collection(name="Docs"):
+    collection = MagicMock()
+    collection.id = 1
+    collection.name = name
+    collection.description = None
+    collection.created_at = datetime(2025, 1, 1)
+    collection.updated_at = datetime(2025, 1, 1)
+    return collection
+
+async def collect(async_iter):
+    return [item async for item in async_iter]
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    answer_cache.clear()
+    collection_cache.clear()
+    yield
+    answer_cache.clear()
+    collection_cache.clear()
+
+def patch_pipeline(collection, chunks, embedding=(1.0, 0.0, 0.0)):
+    """Patch collection lookup, question embedding and vector search."""
+    return (
+        patch.object(rag_service, "_get_collection", return_value=collection),
+        patch.object(rag_service, "_embed_question", return_value=list(embedding)),
+        patch.object(rag_service, "_search_chunks", return_value=chunks),
+    )
+
+def test_stream_answer_emits_sources_tokens_and_done():
+    async def fake_stream(prompt):
+        for text in ["The answer ", "is forty-two."]:
+            yield {"response": text, "done": False}
+        yield {"response": "", "done": True, "eval_count": 2, "eval_duration": 1000}
+
+    db = MagicMock()
+    get_collection, embed, search = patch_pipeline(make_collection(), [make_chunk()])
+    with get_collection, embed, search, patch.object(rag_service, "stream_answer_from_context", fake_stream):
+        events = asyncio.run(collect(rag_service.stream_answer_from_collection(db, 1, "What is it?")))
+
+    assert [e["event"] for e in events] == ["sources", "token", "token", "done"]
+    assert events[0]["data"]["sources_count"] == 1
+    done = events[-1]["data"]
+    assert done["answer"] == "The answer is forty-two."
+    assert done["llm_stats"] == {"eval_count": 2, "eval_duration": 1000}
+    assert done["timings"]["time_to_first_token_ms"] is not None
+    db.add.assert_called_once()
+    db.commit.assert_called_once()
+
+def test_stream_answer_falls_back_when_llm_fails():
+    async def failing_stream(prompt):
+        raise ConnectionError("down")
+        yield  # pragma: no cover
+
+    get_collection, embed, search = patch_pipeline(make_collection(), [])
+    with get_collection, embed, search, patch.object(rag_service, "stream_answer_from_context", failing_stream):
+        events = asyncio.run(collect(rag_service.stream_answer_from_collection(MagicMock(), 1, "What is it?")))
+
+    assert events[-1]["event"] == "done"
+    assert events[-1]["data"]["answer"] == rag_service.UNAVAILABLE_ANSWER
+
+def test_stream_answer_unknown_collection():
+    with patch.object(rag_service, "_get_collection", return_value=None):
+        events = asyncio.run(collect(rag_service.stream_answer_from_collection(MagicMock(), 9, "What is it?")))
+    assert events == [{"event": "error", "data": {"error": "Collection with ID 9 not found"}}]
+
+def test_answer_served_from_exact_and_semantic_cache():
+    collection = make_collection()
+    generate = MagicMock()
+
+    async def fake_generate(prompt):
+        generate(prompt)
+        return "Paris is the capital of France."
+
+    get_collection, embed, search = patch_pipeline(collection, [make_chunk()])
+    with get_collection, embed, search, patch.object(rag_service, "generate_answer_from_context", fake_generate):
+        first = asyncio.run(rag_service.answer_question_from_collection(MagicMock(), 1, "What is the capital of France?"))
+        exact = asyncio.run(rag_service.answer_question_from_collection(MagicMock(), 1, "what is the capital of  france"))
+    assert first.get("cache_hit") is None
+    assert exact["cache_hit"] == "exact"
+    assert exact["answer"] == first["answer"]
+
+    get_collection, embed, search = patch_pipeline(collection, [make_chunk()], embedding=(0.99, 0.05, 0.0))
+    with get_collection, embed, search, patch.object(rag_service, "generate_answer_from_context", fake_generate):
+        semantic = asyncio.run(rag_service.answer_question_from_collection(MagicMock(), 1, "Which city is France's capital?"))
+    assert semantic["cache_hit"] == "semantic"
+    assert generate.call_count == 1
+
+def test_cache_invalidated_when_collection_changes():
+    collection = make_collection()
+
+    async def fake_generate(prompt):
+        return "Paris is the capital of France."
+
+    get_collection, embed, search = patch_pipeline(collection, [make_chunk()])
+    with get_collection, embed, search, patch.object(rag_service, "generate_answer_from_context", fake_generate):
+        asyncio.run(rag_service.answer_question_from_collection(MagicMock(), 1, "What is the capital of France?"))
+        collection.updated_at = datetime(2025, 1, 2)
+        invalidations_before = answer_cache.get_stats()["invalidations"]
+        again = asyncio.run(rag_service.answer_question_from_collection(MagicMock(), 1, "What is the capital of France?"))
+    assert again.get("cache_hit") is None
+    assert answer_cache.get_stats()["invalidations"] == invalidations_before + 1
+
+def test_failed_generation_is_not_cached():
+    async def no_answer(prompt):
+        return None
+
+    stores_before = answer_cache.get_stats()["stores"]
+    get_collection, embed, search = patch_pipeline(make_collection(), [])
+    with get_collection, embed, search, patch.object(rag_service, "generate_answer_from_context", no_answer):
+        asyncio.run(rag_service.answer_question_from_collection(MagicMock(), 1, "What is the capital of France?"))
+    assert answer_cache.get_stats()["stores"] == stores_before
+
+def test_concurrent_identical_questions_share_one_execution():
+    calls = []
+
+    async def slow_generate(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return "Paris is the capital of France."
+
+    async def ask_together():
+        return await asyncio.gather(
+            rag_service.answer_question_from_collection(dbs[0], 1, "What is the capital of France?"),
+            rag_service.answer_question_from_collection(dbs[1], 1, "what is the capital of france"),
+            rag_service.answer_question_from_collection(dbs[2], 1, "What is the capital of France?", top_k=3),
+        )
+
+    dbs = [MagicMock(), MagicMock(), MagicMock()]
+    saved_before = qa_single_flight.get_stats()["executions_saved"]
+    get_collection, embed, search = patch_pipeline(make_collection(), [make_chunk()])
+    with get_collection, embed, search, patch.object(rag_service, "generate_answer_from_context", slow_generate), \
+         patch.object(rag_service.settings, "ANSWER_CACHE_ENABLED", False):
+        results = asyncio.run(ask_together())
+
+    # The top_k=3 request has different parameters and runs on its own
+    assert len(calls) == 2
+    assert all(r["answer"] == "Paris is the capital of France." for r in results)
+    assert results[1]["question"] == "what is the capital of france"
+    assert qa_single_flight.get_stats()["executions_saved"] == saved_before + 1
+    for db in dbs:
+        db.add.assert_called_once()
+
+def test_batch_answers_in_completion_order_with_bulk_history():
+    collection = make_collection()
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [collection]
+    searches = []
+
+    def fake_search_batch(collection, embeddings, top_k):
+        searches.append((len(embeddings), top_k))
+        return [[make_chunk()] for _ in embeddings]
+
+    async def fake_generate(prompt):
+        # The first question takes longest, so it completes last
+        await asyncio.sleep(0.05 if "first" in prompt else 0)
+        return "A generated answer for the batch."
+
+    questions = [
+        {"question": "The first question?", "collection_id": 1, "top_k": 5},
+        {"question": "The second question?", "collection_id": 1, "top_k": 5},
+        {"question": "Unknown collection?", "collection_id": 99, "top_k": 5},
+        {"question": "Different top k?", "collection_id": 1, "top_k": 2},
+    ]
+    with patch.object(rag_service, "_embed_questions", side_effect=lambda texts: [[1.0, float(i), 0.0] for i, _ in enumerate(texts)]) as embed, \
+         patch.object(rag_service, "_search_chunks_batch", fake_search_batch), \
+         patch.object(rag_service, "generate_answer_from_context", fake_generate), \
+         patch.object(rag_service.settings, "ANSWER_CACHE_ENABLED", False):
+        lines = asyncio.run(collect(rag_service.answer_questions_batch(db, questions)))
+
+    results, summary = lines[:-1], lines[-1]
+    assert results[0]["index"] == 2 and results[0]["success"] is False
+    assert results[-1]["index"] == 0
+    assert sorted(r["index"] for r in results) == [0, 1, 2, 3]
+    assert summary == dict(summary, done=True, total=4, succeeded=3, failed=1)
+    embed.assert_called_once()
+    assert sorted(searches) == [(1, 2), (2, 5)]
+    db.add_all.assert_called_once()
+    assert len(db.add_all.call_args[0][0]) == 3
+    db.commit.assert_called_once()
+
+def test_extractive_mode_skips_generation_when_sentence_matches():
+    generate = MagicMock()
+
+    async def fake_generate(prompt):
+        generate(prompt)
+        return "A generated answer about Paris."
+
+    chunk = make_chunk(text="The capital of France is Paris. It is large.")
+    get_collection, embed, search = patch_pipeline(make_collection(), [chunk])
+    with get_collection, embed, search, \
+         patch.object(rag_service, "_embed_texts", side_effect=lambda texts, source: [[1.0, 0.0, 0.0] for _ in texts]) as embed_texts, \
+         patch.object(rag_service, "generate_answer_from_context", fake_generate):
+        extractive = asyncio.run(rag_service.answer_question_from_collection(
+            MagicMock(), 1, "What is the capital of France?", answer_mode="extractive"))
+        generative = asyncio.run(rag_service.answer_question_from_collection(
+            MagicMock(), 1, "Tell me about the capital of France?"))
+
+    assert extractive["answer"] == "The capital of France is Paris."
+    assert extractive["answer_mode"] == "extractive"
+    assert extractive["sources_count"] == 1
+    assert {call.kwargs["source"] for call in embed_texts.call_args_list} == {"extractive"}
+    assert generative["answer"] == "A generated answer about Paris."
+    assert generate.call_count == 1
+
+def test_batch_honors_extractive_answer_mode():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [make_collection()]
+    chunk = make_chunk(text="The capital of France is Paris. It is large.")
+    generate = MagicMock()
+
+    async def fake_generate(prompt):
+        generate(prompt)
+        return "A generated answer about Paris."
+
+    questions = [
+        {"question": "What is the capital of France?", "collection_id": 1, "top_k": 5, "answer_mode": "extractive"},
+        {"question": "Tell me about the capital of France?", "collection_id": 1, "top_k": 5, "answer_mode": "generative"},
+    ]
+    with patch.object(rag_service, "_embed_texts", side_effect=lambda texts, source: [[1.0, 0.0, 0.0] for _ in texts]), \
+         patch.object(rag_service, "_search_chunks_batch", side_effect=lambda collection, embeddings, top_k: [[chunk] for _ in embeddings]), \
+         patch.object(rag_service, "generate_answer_from_context", fake_generate), \
+         patch.object(rag_service.settings, "ANSWER_CACHE_ENABLED", False):
+        lines = asyncio.run(collect(rag_service.answer_questions_batch(db, questions)))
+
+    results = {line["index"]: line for line in lines[:-1]}
+    assert results[0]["answer"] == "The capital of France is Paris."
+    assert results[0]["answer_mode"] == "extractive"
+    assert results[1]["answer"] == "A generated answer about Paris."
+    assert results[1]["answer_mode"] is None
+    assert generate.call_count == 1
+
+def test_multi_collection_merges_results_by_distance():
+    docs, papers = make_collection("Docs"), make_collection("Papers")
+    papers.id = 2
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [docs, papers]
+    prompts = []
+
+    def fake_search(chroma_collection_name, query_embeddings, top_k, filter_collection_id):
+        offset = 0.05 if filter_collection_id == "2" else 0.0
+        return [[
+            # Sequence ids far apart, so the context assembler does not merge them
+            (make_chunk(i * 10, pdf_db_id=int(filter_collection_id), text=f"Collection {filter_collection_id} chunk {i}."),
+             0.1 * i + offset)
+            for i in range(top_k)
+        ]]
+
+    async def fake_generate(prompt):
+        prompts.append(prompt)
+        return "An answer drawn from both collections."
+
+    rag_service.answer_cache.clear()
+    with patch.object(rag_service, "_embed_question", return_value=[1.0, 0.0]) as embed, \
+         patch.object(rag_service, "search_scored_chunks_batch", side_effect=fake_search), \
+         patch.object(rag_service, "generate_answer_from_context", fake_generate), \
+         patch.object(rag_service.settings, "ANSWER_CACHE_ENABLED", True):
+        result = asyncio.run(rag_service.answer_question_across_collections(db, [1, 2], "Where is it described?", top_k=3))
+        repeated = asyncio.run(rag_service.answer_question_across_collections(db, [2, 1], "Where is it described?", top_k=3))
+        single = asyncio.run(rag_service.answer_question_across_collections(db, [1], "Where is it described?", top_k=3))
+
+    assert result["success"] is True
+    assert embed.call_count == 3
+    assert [s["chunk_preview"] for s in result["sources"]] == [
+        "Collection 1 chunk 0.", "Collection 2 chunk 0.", "Collection 1 chunk 1."
+    ]
+    assert [(c["collection_id"], c["chunks_retrieved"]) for c in result["collections"]] == [(1, 3), (2, 3)]
+    # One history row per question, against the collection with the closest chunk
+    assert db.add.call_args_list[0][0][0].collection_id == 1
+    # The same set of collections is served from the cache; a different set is not
+    assert repeated["cache_hit"] == "exact"
+    assert repeated["answer"] == result["answer"]
+    assert single["cache_hit"] is None
+    assert len(prompts) == 2
+    assert db.add.call_count == 3
+    rag_service.answer_cache.clear()
+
+def test_multi_collection_generates_with_primary_collections_cascade_policy():
+    docs, papers = make_collection("Docs"), make_collection("Papers")
+    papers.id = 2
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [docs, papers]
+
+    def fake_search(chroma_collection_name, query_embeddings, top_k, filter_collection_id):
+        distance = 0.1 if filter_collection_id == "2" else 0.4
+        return [[(make_chunk(pdf_db_id=int(filter_collection_id), text=f"Collection {filter_collection_id} chunk."), distance)]]
+
+    async def fake_cascade(prompt, policy, stats_key):
+        return {"text": f"Answered with {policy} for {stats_key}."}
+
+    with patch.object(rag_service, "_embed_question", return_value=[1.0, 0.0]), \
+         patch.object(rag_service, "search_scored_chunks_batch", side_effect=fake_search), \
+         patch.object(rag_service, "generate_answer_with_cascade", fake_cascade), \
+         patch.object(rag_service.settings, "LLM_CASCADE_COLLECTION_POLICIES", {"2": "cascade"}), \
+         patch.object(rag_service.settings, "ANSWER_CACHE_ENABLED", False):
+        result = asyncio.run(rag_service.answer_question_across_collections(db, [1, 2], "Where is it described?"))
+
+    assert result["answer"] == "Answered with cascade for 2."
+    db.add.assert_called_once()
+    assert db.add.call_args[0][0].collection_id == 2
+
+def test_multi_collection_reports_unknown_collections():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [make_collection()]
+    result = asyncio.run(rag_service.answer_question_across_collections(db, [1, 7], "Where is it described?"))
+    assert result["success"] is False
+    assert "[7]" in result["error"]
+
+def test_all_collections_mode_searches_routed_collections_only():
+    papers = make_collection("Papers")
+    papers.id = 2
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [papers]
+    searched = []
+
+    def fake_search(chroma_collection_name, query_embeddings, top_k, filter_collection_id):
+        searched.append(filter_collection_id)
+        return [[(make_chunk(pdf_db_id=2), 0.2)]]
+
+    async def fake_generate(prompt):
+        return "An answer drawn from the routed collection."
+
+    with patch.object(rag_service, "_embed_question", return_value=[1.0, 0.0]), \
+         patch.object(rag_service.centroid_index, "route", return_value=[(2, 0.91)]) as route, \
+         patch.object(rag_service, "search_scored_chunks_batch", side_effect=fake_search), \
+         patch.object(rag_service, "generate_answer_from_context", fake_generate):
+        result = asyncio.run(rag_service.answer_question_across_collections(db, None, "Where is it described?", fan_out=1))
+
+    assert route.call_args[0][2] == 1
+    assert searched == ["2"]
+    assert result["routed"] is True
+    assert result["collections"][0]["routing_score"] == 0.91
+
+@pytest.fixture
+def history_db():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.models.db_models import Base, Collection, QueryHistory
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Collection(id=1, name="Docs"), Collection(id=2, name="Other")])
+    # Three queries share a timestamp, so pages must break ties by id
+    timestamps = [datetime(2025, 1, 1), datetime(2025, 1, 2), datetime(2025, 1, 2), datetime(2025, 1, 2), datetime(2025, 1, 3)]
+    for i, timestamp in enumerate(timestamps, start=1):
+        session.add(QueryHistory(id=i, question_text=f"Q{i}", answer_text=f"A{i}", sources_count=1, collection_id=1, timestamp=timestamp))
+    session.add(QueryHistory(id=6, question_text="Q6", answer_text="A6", sources_count=1, collection_id=2, timestamp=datetime(2025, 1, 2)))
+    session.commit()
+    yield session
+    session.close()
+
+def test_recent_queries_keyset_pages_cover_history_once(history_db):
+    seen = []
+    cursor = None
+    while True:
+        page = asyncio.run(rag_service.get_recent_queries(history_db, 1, limit=2, cursor=cursor))
+        assert page["success"]
+        seen.extend(query["id"] for query in page["queries"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [5, 2, 3, 4, 1]
+
+def test_recent_queries_rejects_malformed_cursor(history_db):
+    result = asyncio.run(rag_service.get_recent_queries(history_db, 1, cursor="not-a-cursor"))
+    assert not result["success"]
+
+def test_query_history_export_streams_time_range(history_db):
+    rows = list(rag_service.iter_query_history(history_db, start=datetime(2025, 1, 2), end=datetime(2025, 1, 3)))
+    assert [row["id"] for row in rows] == [2, 3, 4, 6]
+    rows = list(rag_service.iter_query_history(history_db, start=datetime(2025, 1, 2), collection_id=1))
+    assert [row["id"] for row in rows] == [2, 3, 4, 5]
+    assert rows[0]["question"] == "Q2"
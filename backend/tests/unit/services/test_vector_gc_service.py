@@ -0,0 +1,127 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.services import vector_gc_service
+from app.models.db_models import Base, Collection, PDF, VectorIndexState
+
+def make_db(pdf_ids, collection_ids, recheck_pdf_ids=None):
+    """Session whose PDF ids change to recheck_pdf_ids after the first read, as if a PDF were added mid-scan."""
+    db = MagicMock()
+    reads = []
+
+    def query(column):
+        ids = collection_ids
+        if column is PDF.id:
+            ids = pdf_ids if not reads or recheck_pdf_ids is None else recheck_pdf_ids
+            reads.append(column)
+        rows = [(i,) for i in ids]
+        return MagicMock(all=MagicMock(return_value=rows), filter=MagicMock(return_value=MagicMock(all=MagicMock(return_value=rows))))
+
+    db.query.side_effect = query
+    db.get.return_value = None  # No vector_index_state row yet
+    return db
+
+def make_collection():
+    collection = MagicMock()
+    collection.count.return_value = 3
+    collection.get.side_effect = lambda **kwargs: (
+        {
+            "ids": ["keep", "gone_pdf", "gone_collection"],
+            "metadatas": [
+                {"pdf_db_id": 1, "collection_id": 1},
+                {"pdf_db_id": 2, "collection_id": 1},
+                {"pdf_db_id": 1, "collection_id": "9"},
+            ],
+        }
+        if "offset" in kwargs
+        else {
+            "embeddings": [[0.0] * 4 for _ in kwargs["ids"]],
+            "documents": ["abcd" for _ in kwargs["ids"]],
+        }
+    )
+    return collection
+
+def test_dry_run_reports_without_deleting():
+    collection = make_collection()
+    with patch.object(vector_gc_service, "get_or_create_collection", return_value=collection):
+        report = vector_gc_service.collect_vector_garbage(make_db([1], [1]), dry_run=True, batch_size=10)
+    assert report["success"] is True
+    assert report["orphans_found"] == 2
+    assert report["orphans_by_pdf"] == {2: 1, 1: 1}
+    collection.delete.assert_not_called()
+
+def test_deletes_orphans_and_reports_reclaimed_bytes():
+    collection = make_collection()
+    with patch.object(vector_gc_service, "get_or_create_collection", return_value=collection), \
+         patch.object(vector_gc_service.settings, "VECTOR_GC_REBUILD_THRESHOLD", 1.0):
+        report = vector_gc_service.collect_vector_garbage(make_db([1], [1]), batch_size=10)
+    collection.delete.assert_called_once_with(ids=["gone_pdf", "gone_collection"])
+    assert report["orphans_deleted"] == 2
+    assert report["bytes_reclaimed"] == 2 * (4 * 4 + 4)
+    assert report["rebuild_recommended"] is False
+
+def test_pdf_created_during_scan_is_not_collected():
+    collection = make_collection()
+    with patch.object(vector_gc_service, "get_or_create_collection", return_value=collection), \
+         patch.object(vector_gc_service.settings, "VECTOR_GC_REBUILD_THRESHOLD", 1.0):
+        report = vector_gc_service.collect_vector_garbage(make_db([1], [1], recheck_pdf_ids=[1, 2]), batch_size=10)
+    collection.delete.assert_called_once_with(ids=["gone_collection"])
+    assert report["orphans_by_pdf"] == {1: 1}
+
+def test_rebuild_recommended_past_threshold_but_not_run():
+    collection = make_collection()
+    with patch.object(vector_gc_service, "get_or_create_collection", return_value=collection), \
+         patch.object(vector_gc_service, "rebuild_vector_collection") as mock_rebuild, \
+         patch.object(vector_gc_service.settings, "VECTOR_GC_REBUILD_THRESHOLD", 0.5):
+        report = vector_gc_service.collect_vector_garbage(make_db([1], [1]), batch_size=10)
+    mock_rebuild.assert_not_called()
+    assert report["rebuild_recommended"] is True
+
+def test_deletions_since_rebuild_survive_a_restart():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    db.add(Collection(id=1, name="Physics"))
+    db.add(PDF(id=1, filename="a.pdf", collection_id=1))
+    db.commit()
+
+    with patch.object(vector_gc_service, "get_or_create_collection", return_value=make_collection()), \
+         patch.object(vector_gc_service.settings, "VECTOR_GC_REBUILD_THRESHOLD", 1.0):
+        first = vector_gc_service.collect_vector_garbage(db, chroma_collection_name="pdf_chunks", batch_size=10)
+        vector_gc_service._gc_stats.update(runs=0, orphans_deleted_total=0)  # As if the process restarted
+        second = vector_gc_service.collect_vector_garbage(db, chroma_collection_name="pdf_chunks", batch_size=10)
+    assert first["deleted_fraction"] == round(2 / 3, 4)
+    assert second["deleted_fraction"] == 0.8
+    assert db.get(VectorIndexState, "pdf_chunks").deleted_since_rebuild == 4
+
+    vector_gc_service.record_vector_rebuild(db, "pdf_chunks")
+    assert db.get(VectorIndexState, "pdf_chunks").deleted_since_rebuild == 0
+    db.close()
+
+def test_gc_skipped_while_another_process_holds_the_lock():
+    db = make_db([1], [1])
+    db.get_bind.return_value.dialect.name = "postgresql"
+    db.execute.return_value.scalar.return_value = False
+    with patch.object(vector_gc_service, "get_or_create_collection") as mock_get:
+        report = vector_gc_service.collect_vector_garbage(db)
+    assert report["success"] is False
+    mock_get.assert_not_called()
+
+def test_rebuild_completes_interrupted_swap():
+    client = MagicMock()
+    client.list_collections.return_value = [MagicMock(), MagicMock()]
+    client.list_collections.return_value[0].name = "pdf_chunks_rebuild"
+    client.list_collections.return_value[1].name = "other"
+    client.get_collection.return_value.count.return_value = 5
+    with patch.object(vector_gc_service, "initialize_vector_store", return_value=client), \
+         patch.object(vector_gc_service, "get_or_create_collection") as mock_get:
+        result = vector_gc_service.rebuild_vector_collection("pdf_chunks", 100)
+    client.get_collection.return_value.modify.assert_called_once_with(name="pdf_chunks")
+    mock_get.assert_not_called()
+    assert result == {"rows": 5, "recovered": True}
+
+def test_gc_failure_returns_error():
+    with patch.object(vector_gc_service, "get_or_create_collection", side_effect=Exception("down")):
+        report = vector_gc_service.collect_vector_garbage(make_db([], []))
+    assert report["success"] is False
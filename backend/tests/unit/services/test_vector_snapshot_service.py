@@ -0,0 +1,130 @@
+import json
+import pytest
+from unittest.mock import patch
+from app.services import vector_snapshot_service
+
+class FakeCollection:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.upsert_calls = 0
+
+    def count(self):
+        return len(self.rows)
+
+    def get(self, limit, offset, include):
+        page = self.rows[offset:offset + limit]
+        return {
+            "ids": [r["id"] for r in page],
+            "embeddings": [r["embedding"] for r in page],
+            "documents": [r["document"] for r in page],
+            "metadatas": [r["metadata"] for r in page],
+        }
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upsert_calls += 1
+        for i, row_id in enumerate(ids):
+            self.rows.append({
+                "id": row_id,
+                "embedding": [float(x) for x in embeddings[i]],
+                "document": documents[i],
+                "metadata": metadatas[i],
+            })
+
+def make_rows(n):
+    return [
+        {
+            "id": f"doc.pdf_chunk_{i}",
+            "embedding": [float(i), 0.5, 1.0],
+            "document": f"text {i}",
+            "metadata": {"collection_id": "1", "pdf_db_id": 1, "chunk_sequence_id": i},
+        }
+        for i in range(n)
+    ]
+
+def test_export_and_restore_round_trip(tmp_path):
+    source = FakeCollection(make_rows(5))
+    with patch.object(vector_snapshot_service, "get_existing_collection", return_value=source):
+        result = vector_snapshot_service.export_vector_snapshot(
+            snapshot_dir=str(tmp_path), collection_names=["rag_documents"], batch_size=2
+        )
+    assert result["success"] is True
+    assert result["total_rows"] == 5
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["collections"]["rag_documents"]["dimension"] == 3
+
+    target = FakeCollection()
+    with patch.object(vector_snapshot_service, "get_or_create_collection", return_value=target):
+        result = vector_snapshot_service.restore_vector_snapshot(str(tmp_path), batch_size=2)
+    assert result["success"] is True
+    assert target.rows == source.rows[:5]
+    assert target.upsert_calls == 3
+
+def test_restore_resumes_from_progress(tmp_path):
+    source = FakeCollection(make_rows(4))
+    with patch.object(vector_snapshot_service, "get_existing_collection", return_value=source):
+        vector_snapshot_service.export_vector_snapshot(
+            snapshot_dir=str(tmp_path), collection_names=["rag_documents"]
+        )
+    (tmp_path / "rag_documents" / "restore_progress.json").write_text(json.dumps({"rows_restored": 3}))
+
+    target = FakeCollection()
+    with patch.object(vector_snapshot_service, "get_or_create_collection", return_value=target):
+        result = vector_snapshot_service.restore_vector_snapshot(str(tmp_path))
+    assert result["collections"]["rag_documents"] == {"rows_restored": 1, "rows_skipped": 3}
+    assert [r["id"] for r in target.rows] == ["doc.pdf_chunk_3"]
+
+def test_restoring_same_snapshot_twice_loads_all_rows_each_time(tmp_path):
+    source = FakeCollection(make_rows(3))
+    with patch.object(vector_snapshot_service, "get_existing_collection", return_value=source):
+        vector_snapshot_service.export_vector_snapshot(
+            snapshot_dir=str(tmp_path), collection_names=["rag_documents"]
+        )
+
+    for _ in range(2):
+        target = FakeCollection()  # e.g. the vector store volume was lost again
+        with patch.object(vector_snapshot_service, "get_or_create_collection", return_value=target):
+            result = vector_snapshot_service.restore_vector_snapshot(str(tmp_path), batch_size=2)
+        assert result["collections"]["rag_documents"] == {"rows_restored": 3, "rows_skipped": 0}
+        assert len(target.rows) == 3
+    assert not (tmp_path / "rag_documents" / "restore_progress.json").exists()
+
+def test_restore_rejects_checksum_mismatch(tmp_path):
+    source = FakeCollection(make_rows(2))
+    with patch.object(vector_snapshot_service, "get_existing_collection", return_value=source):
+        vector_snapshot_service.export_vector_snapshot(
+            snapshot_dir=str(tmp_path), collection_names=["rag_documents"]
+        )
+    with open(tmp_path / "rag_documents" / "documents.jsonl", "a") as f:
+        f.write('"tampered"\n')
+    result = vector_snapshot_service.restore_vector_snapshot(str(tmp_path))
+    assert result["success"] is False
+    assert "Checksum mismatch" in result["error"]
+
+def test_export_empty_collection(tmp_path):
+    with patch.object(vector_snapshot_service, "get_existing_collection", return_value=FakeCollection()):
+        result = vector_snapshot_service.export_vector_snapshot(
+            snapshot_dir=str(tmp_path), collection_names=["rag_documents"]
+        )
+    assert result["success"] is True
+    assert result["total_rows"] == 0
+
+def test_restore_missing_manifest(tmp_path):
+    result = vector_snapshot_service.restore_vector_snapshot(str(tmp_path))
+    assert result["success"] is False
+
+def test_exporting_missing_collection_fails_without_creating_it(tmp_path):
+    with patch.object(vector_snapshot_service, "get_existing_collection", side_effect=ValueError("does not exist")), \
+         patch.object(vector_snapshot_service, "get_or_create_collection") as create:
+        result = vector_snapshot_service.export_vector_snapshot(
+            snapshot_dir=str(tmp_path), collection_names=["typo"]
+        )
+    assert result["success"] is False
+    create.assert_not_called()
+
+def test_api_snapshot_dirs_stay_inside_snapshot_root(tmp_path):
+    with patch.object(vector_snapshot_service.settings, "VECTOR_SNAPSHOT_DIR", str(tmp_path)):
+        assert vector_snapshot_service.resolve_snapshot_dir("nightly") == str(tmp_path / "nightly")
+        for outside in ["../elsewhere", "/etc", "nightly/../../elsewhere"]:
+            with pytest.raises(ValueError):
+                vector_snapshot_service.resolve_snapshot_dir(outside)
@@ -44,3 +44,19 @@ def test_postgresql_schema_creation():
             
     except Exception as e:
         pytest.skip(f"PostgreSQL not available for testing: {e}")
+
+def test_create_missing_indexes_adds_indexes_to_existing_tables():
+    """Tables created before an index was declared get it at startup"""
+    from sqlalchemy import inspect
+    from app.models.db_models import Base, QueryHistory
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_query_history_collection_timestamp_id"))
+
+    db_session.create_missing_indexes(engine)
+    db_session.create_missing_indexes(engine)  # Idempotent
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes(QueryHistory.__tablename__)}
+    assert "ix_query_history_collection_timestamp_id" in indexes